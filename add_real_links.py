@@ -3,8 +3,13 @@
 Add REAL LINKS from Brave Search research
 """
 
-import json
+import argparse
+from collections import Counter
 from pathlib import Path
+from data_io import is_ndjson, iter_ndjson, load_json, read_ndjson_metadata, save_json, write_ndjson
+from name_match import DEFAULT_THRESHOLD, NameIndex
+from place_index import write_indexed_places
+from releases import add_release_arguments, release_metadata
 
 # REAL LINKS from our Brave Search research
 REAL_LINKS = {
@@ -47,28 +52,85 @@ REAL_LINKS = {
     ]
 }
 
+def merge_real_links(places, counter, threshold=DEFAULT_THRESHOLD, index=None, matched=None, links=None):
+    """
+    Attach REAL_LINKS (or `links`, same shape) to matching places as they stream
+    by. Names are matched through a fuzzy index (accents, punctuation, word
+    order, suffixes); `matched` collects which keys were used
+    """
+    links = REAL_LINKS if links is None else links
+    index = index or NameIndex(links)
+    matched = matched if matched is not None else {}
+    for place in places:
+        nombre = place.get('nombre', '')
+        hit = index.match(nombre, threshold) if nombre else None
+        if hit:
+            key, score = hit
+            place['links_utiles'] = links[key]
+            matched.setdefault(key, []).append(nombre)
+            counter['added'] += 1
+            note = "" if key == nombre else f" (≈ {key}, {score:.2f})"
+            print(f"✓ Added {len(links[key])} links to: {nombre}{note}")
+        yield place
+
+def remember_names(places, seen):
+    """
+    Pass places through, collecting their distinct names for the unmatched report
+    """
+    for place in places:
+        seen.setdefault(place.get('nombre', ''), None)
+        yield place
+
+def unmatched_report(matched, places_seen, limit=3, min_score=0.3):
+    """
+    REAL_LINKS keys no place matched, with their closest place names: one index
+    over the names, queried only for the keys that are left
+    """
+    unmatched = [key for key in REAL_LINKS if key not in matched]
+    if not unmatched:
+        return {}
+    names = NameIndex(name for name in places_seen if name)
+    return {key: names.candidates(key, limit=limit, min_score=min_score) for key in unmatched}
+
 def main():
-    # Load enriched data
-    data_path = Path("src/app/enriched-places.json")
-    with open(data_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    parser = argparse.ArgumentParser(description="Merge researched links into the enriched places")
+    parser.add_argument("--input", default="src/app/enriched-places.json")
+    parser.add_argument("--output", help="defaults to --input")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="minimum name match score (1.0 = same name after normalizing)")
+    parser.add_argument("--unmatched-report", help="write REAL_LINKS keys that matched no place here (JSON)")
+    add_release_arguments(parser)
+    args = parser.parse_args()
+    data_path = Path(args.input)
+    output_path = Path(args.output or args.input)
+    counter = Counter()
+    matched = {}
+    seen = {}
     
-    # Add links to matching places
-    added_count = 0
-    for place in data['places']:
-        nombre = place.get('nombre', '')
-        if nombre in REAL_LINKS:
-            place['links_utiles'] = REAL_LINKS[nombre]
-            added_count += 1
-            print(f"✓ Added {len(REAL_LINKS[nombre])} links to: {nombre}")
+    if is_ndjson(data_path):
+        # Stream place by place
+        write_ndjson(output_path, merge_real_links(remember_names(iter_ndjson(data_path), seen), counter, args.threshold,
+                                                   matched=matched),
+                     read_ndjson_metadata(data_path))
+    else:
+        # Load enriched data
+        data = load_json(data_path)
+        
+        # Add links to matching places and save them with their query index (and a release delta)
+        places = list(merge_real_links(remember_names(data['places'], seen), counter, args.threshold, matched=matched))
+        write_indexed_places(output_path, places, release_metadata(places, data['metadata'], args))
     
-    # Save updated data
-    with open(data_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ Added links to {counter['added']} places!")
+    print(f"📁 Updated: {output_path}")
     
-    print(f"\n✅ Added links to {added_count} places!")
-    print(f"📁 Updated: {data_path}")
+    unmatched = unmatched_report(matched, seen)
+    for key, nearest in unmatched.items():
+        hint = ", ".join(f"{name} ({score:.2f})" for score, name in nearest) or "nothing close"
+        print(f"⚠️  No place matched '{key}'; closest: {hint}")
+    if args.unmatched_report:
+        save_json(args.unmatched_report, {key: [{"nombre": n, "score": s} for s, n in nearest]
+                                          for key, nearest in unmatched.items()})
+        print(f"📋 Unmatched report: {args.unmatched_report}")
 
 if __name__ == "__main__":
     main()
-
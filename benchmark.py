@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the enrichment hot paths
+Builds synthetic catalogs shaped like consolidated-data.json (any size, same
+seed = same catalog), times each hot path a few times, measures its peak
+Python memory and writes everything to a JSON file.
+
+    python benchmark.py --sizes 1000,10000,100000
+    python benchmark.py --compare bench_results.json     # fail on >20% regressions
+"""
+
+import argparse
+import asyncio
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+
+from clean_descriptions import clean_markdown
+from cpu_pool import CpuPool
+from crawl_engine import CrawlEngine
+from data_io import iter_places, load_json, save_json
+from rules import estimate_intensity, generate_specific_requirements
+from standin_server import fake_results
+
+DESTINOS = ["Cancún", "Cozumel", "Playa del Carmen", "Tulum", "Bacalar", "Holbox", "Mérida", "Valladolid"]
+CATEGORIAS = ["playas_recomendadas", "experiencias_snorkel_buceo", "tours_y_excursiones",
+              "cultura_y_museos", "actividades_para_todas_las_edades"]
+GASTRONOMIA = {"gastronomía_local": ["platillos_típicos", "restaurantes_recomendados"]}
+VOCABULARY = (
+    "playa arena blanca aguas cristalinas snorkel buceo cenote tirolesa zipline atv aventura "
+    "museo restaurante mirador faro acantilado tour lancha ferry reserva familia relajación "
+    "tiburón toro tortugas arrecife selva caverna clavados picante habanero gourmet económico "
+    "día completo medio día caminar nadar recorrer sendero bicicleta profesional certificado"
+).split()
+
+
+def synthetic_catalog(places, seed=42):
+    """
+    Nested destino -> categoria -> items with `places` items in total
+    """
+    rng = random.Random(seed)
+    data = {destino: {} for destino in DESTINOS}
+    for i in range(places):
+        destino = DESTINOS[i % len(DESTINOS)]
+        words = rng.choices(VOCABULARY, k=rng.randint(20, 45))
+        if i % 7 == 0:
+            words.insert(3, f"[oai_citation:{i % 3}‡example.com](https://example.com/{i})")
+        item = {
+            "nombre": f"{rng.choice(VOCABULARY).title()} {rng.choice(VOCABULARY)} {i}",
+            "descripcion": " ".join(words).capitalize() + ".",
+            "intensidad": {"fisica": rng.randint(0, 5), "vertigo": rng.randint(0, 5), "atletico": rng.randint(0, 5)},
+            "accesibilidad": rng.choice(["alta", "media", "baja"]),
+            "links": [],
+        }
+        if i % 6 == 5:
+            categoria = "gastronomía_local"
+            sub = GASTRONOMIA[categoria][i % 2]
+            data[destino].setdefault(categoria, {}).setdefault(sub, []).append(item)
+        else:
+            data[destino].setdefault(CATEGORIAS[i % len(CATEGORIAS)], []).append(item)
+    return data
+
+
+class CannedCrawler:
+    """
+    In-process crawler that answers every URL with a canned result page
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def arun(self, url, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        page = fake_results(url.rsplit("q=", 1)[-1].replace("+", " "))
+        return SimpleNamespace(url=url, success=True, markdown=page, html=page)
+
+
+def measure(fn, repeat):
+    """
+    Best/median wall time over `repeat` runs, plus peak traced memory of one run
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"best_s": round(min(times), 5), "median_s": round(statistics.median(times), 5),
+            "peak_mb": round(peak / 1024 / 1024, 2)}
+
+
+def benchmarks(data, places, workdir, crawl_places, cpu):
+    path = Path(workdir) / "catalog.json"
+    save_json(path, data)
+
+    async def crawl():
+        engine = CrawlEngine(concurrency=8, rate=0, crawler_factory=lambda: CannedCrawler(latency=0.001))
+        async with engine:
+            await asyncio.gather(*(engine.fetch(engine.search_url(p["nombre"])) for p in places[:crawl_places]))
+
+    return {
+        "flatten": lambda: sum(1 for _ in iter_places(data)),
+        "estimate_intensity": lambda: [estimate_intensity(p["descripcion"], p["nombre"]) for p in places],
+        "generate_specific_requirements": lambda: [generate_specific_requirements(p) for p in places],
+        "clean_markdown": lambda: [clean_markdown(p["descripcion"]) for p in places],
+        # The three CPU transforms through the process pool (--workers)
+        "cpu_pool_transforms": lambda: [cpu.map(kind, places) for kind in ("intensity", "requirements", "clean")],
+        "json_save": lambda: save_json(path, data),
+        "json_load": lambda: load_json(path),
+        "crawl_canned": lambda: asyncio.run(crawl()),
+    }
+
+
+def run(sizes, repeat, only=None, seed=42, workers=1):
+    results = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeat": repeat,
+            "workers": workers,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as workdir, CpuPool(workers) as cpu:
+        for size in sizes:
+            print(f"\n📦 {size:,} places")
+            data = synthetic_catalog(size, seed)
+            places = [{**item, "categoria": categoria} for _, categoria, item in iter_places(data)]
+            crawl_places = min(size, 2000)
+            for name, fn in benchmarks(data, places, workdir, crawl_places, cpu).items():
+                if only and name not in only:
+                    continue
+                stats = measure(fn, repeat)
+                items = crawl_places if name == "crawl_canned" else size
+                stats["items_per_s"] = round(items / stats["best_s"]) if stats["best_s"] else None
+                results["results"].setdefault(name, {})[str(size)] = stats
+                print(f"  {name:<32} {stats['best_s']:9.4f}s  {stats['items_per_s'] or 0:>10,}/s  {stats['peak_mb']:8.2f} MB")
+    return results
+
+
+def compare(current, baseline, threshold):
+    """
+    Names of benchmarks whose best time got slower than baseline * threshold
+    """
+    regressions = []
+    for name, by_size in current["results"].items():
+        for size, stats in by_size.items():
+            before = baseline.get("results", {}).get(name, {}).get(size)
+            if before and stats["best_s"] > before["best_s"] * threshold:
+                regressions.append(f"{name}[{size}]: {before['best_s']}s → {stats['best_s']}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the enrichment hot paths on synthetic catalogs")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated catalog sizes (up to 1000000)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", help="comma-separated benchmark names")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes for cpu_pool_transforms")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="baseline results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown factor that counts as a regression")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    only = set(args.only.split(",")) if args.only else None
+    baseline = load_json(args.compare) if args.compare else None
+
+    results = run(sizes, args.repeat, only, args.seed, args.workers)
+    save_json(args.output, results)
+    print(f"\n✅ Results written to {args.output}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"  🐢 {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"  ✓ No regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
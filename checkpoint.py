@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Checkpoint journal for enrichment runs
+Every finished place is appended to an NDJSON journal together with a
+fingerprint of its input fields. With --resume a run reuses journaled places
+whose fingerprint didn't change, so a crash or a rerun only costs the places
+that are new or were edited.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+JOURNAL_PATH = ".enrich_state/enriched-places.journal.ndjson"
+FINGERPRINT_FIELDS = ("nombre", "descripcion", "intensidad")
+
+
+def place_key(destino, categoria, item):
+    return f"{destino}|{categoria}|{item.get('nombre', '')}"
+
+
+def fingerprint(item):
+    """
+    Short hash of the fields the enrichment depends on
+    """
+    payload = {field: item.get(field) for field in FINGERPRINT_FIELDS}
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class CheckpointJournal:
+    def __init__(self, path=JOURNAL_PATH, resume=False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.previous = self._read() if resume else {}
+        self.current = {}
+        self.reused = 0
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    def _read(self):
+        entries = {}
+        if not self.path.exists():
+            return entries
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from a crash
+                entries[entry["key"]] = entry
+        return entries
+
+    def lookup(self, key, fp):
+        """
+        Previously enriched place for `key` if its inputs are unchanged
+        """
+        entry = self.previous.get(key)
+        if entry and entry["fingerprint"] == fp:
+            self.reused += 1
+            self.current[key] = entry
+            return entry["place"]
+        return None
+
+    def record(self, key, fp, place):
+        entry = {"key": key, "fingerprint": fp, "place": place}
+        self.current[key] = entry
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def compact(self):
+        """
+        Rewrite the journal with one entry per place of this run; it becomes the
+        baseline for the next --resume
+        """
+        self._file.close()
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for entry in self.current.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def close(self):
+        self._file.close()
+
+
+def add_checkpoint_arguments(parser):
+    parser.add_argument("--journal", default=JOURNAL_PATH, help="checkpoint journal (NDJSON)")
+    parser.add_argument("--resume", action="store_true",
+                        help="reuse journaled places whose nombre/descripcion/intensidad didn't change")
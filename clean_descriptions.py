@@ -3,8 +3,12 @@
 Limpiar markdown links de todas las descripciones
 """
 
-import json
+import argparse
 import re
+from collections import Counter
+from data_io import is_ndjson, iter_ndjson, load_json, read_ndjson_metadata, write_ndjson
+from place_index import write_indexed_places
+from releases import add_release_arguments, release_metadata
 
 def clean_markdown(text):
     if not text:
@@ -18,23 +22,41 @@ def clean_markdown(text):
     
     return text.strip()
 
-# Cargar datos
-with open('src/app/enriched-places.json', 'r', encoding='utf-8') as f:
-    data = json.load(f)
+def clean_places(places, counter):
+    """
+    Limpiar descripciones lugar por lugar
+    """
+    for place in places:
+        original = place.get('descripcion', '')
+        cleaned_desc = clean_markdown(original)
+        
+        if original != cleaned_desc:
+            place['descripcion'] = cleaned_desc
+            counter['cleaned'] += 1
+            print(f"✅ {place['nombre']}")
+        yield place
 
-# Limpiar descripciones
-cleaned = 0
-for place in data['places']:
-    original = place.get('descripcion', '')
-    cleaned_desc = clean_markdown(original)
+def main():
+    parser = argparse.ArgumentParser(description="Limpiar markdown de las descripciones")
+    parser.add_argument("--input", default="src/app/enriched-places.json")
+    parser.add_argument("--output", help="por default sobreescribe --input")
+    add_release_arguments(parser)
+    args = parser.parse_args()
+    output = args.output or args.input
+    counter = Counter()
     
-    if original != cleaned_desc:
-        place['descripcion'] = cleaned_desc
-        cleaned += 1
-        print(f"✅ {place['nombre']}")
-
-# Guardar
-with open('src/app/enriched-places.json', 'w', encoding='utf-8') as f:
-    json.dump(data, f, ensure_ascii=False, indent=2)
+    if is_ndjson(args.input):
+        # Streaming: un lugar a la vez
+        write_ndjson(output, clean_places(iter_ndjson(args.input), counter), read_ndjson_metadata(args.input))
+    else:
+        # Cargar datos
+        data = load_json(args.input)
+        
+        # Limpiar descripciones y guardar junto con el índice de búsqueda (y el delta del release)
+        places = list(clean_places(data['places'], counter))
+        write_indexed_places(output, places, release_metadata(places, data['metadata'], args))
+    
+    print(f"\n🎉 {counter['cleaned']} descripciones limpiadas")
 
-print(f"\n🎉 {cleaned} descripciones limpiadas")
+if __name__ == "__main__":
+    main()
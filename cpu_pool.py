@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Process pool for the CPU-bound per-place transforms
+Intensity estimation, requirement generation and markdown cleaning are pure
+functions of a few fields, so places are shipped to worker processes in chunks
+(only the fields each transform reads) and the results come back in input
+order. From async code, `await pool.submit(kind, place)` batches whatever the
+crawl tasks submit in the same loop iteration into one chunk, so the event
+loop keeps serving crawl I/O while the workers compute.
+
+    with CpuPool(workers=8) as pool:
+        requirements = pool.map("requirements", places)
+"""
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from clean_descriptions import clean_markdown
+from rules import estimate_intensity, generate_specific_requirements
+
+DEFAULT_CHUNK = 512
+
+
+def _intensity_chunk(items):
+    return [estimate_intensity(item.get('descripcion', ''), item.get('nombre', '')) for item in items]
+
+
+def _requirements_chunk(items):
+    return [generate_specific_requirements(item) for item in items]
+
+
+def _clean_chunk(items):
+    return [clean_markdown(item.get('descripcion', '')) for item in items]
+
+
+# kind -> (chunk function, fields it reads)
+TRANSFORMS = {
+    "intensity": (_intensity_chunk, ("descripcion", "nombre")),
+    "requirements": (_requirements_chunk, ("descripcion", "categoria", "intensidad")),
+    "clean": (_clean_chunk, ("descripcion",)),
+}
+
+
+def _project(item, fields):
+    return {field: item[field] for field in fields if field in item}
+
+
+class CpuPool:
+    """
+    workers <= 1 runs everything inline, which is also the fallback for tiny inputs
+    """
+
+    def __init__(self, workers=None, chunk_size=DEFAULT_CHUNK):
+        self.workers = (os.cpu_count() or 1) if workers is None else max(1, workers)
+        self.chunk_size = max(1, chunk_size)
+        self._executor = None
+        self._pending = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        if self._executor:
+            self._executor.shutdown()
+            self._executor = None
+
+    @property
+    def executor(self):
+        if self._executor is None and self.workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _chunks(self, kind, items):
+        fields = TRANSFORMS[kind][1]
+        slim = [_project(item, fields) for item in items]
+        return [slim[i:i + self.chunk_size] for i in range(0, len(slim), self.chunk_size)]
+
+    def map(self, kind, items):
+        """
+        Results of transform `kind` for every item, in input order
+        """
+        items = list(items)
+        chunk_fn = TRANSFORMS[kind][0]
+        if self.workers <= 1 or len(items) <= self.chunk_size:
+            return chunk_fn(items)
+        results = []
+        for chunk_result in self.executor.map(chunk_fn, self._chunks(kind, items)):
+            results.extend(chunk_result)
+        return results
+
+    async def submit(self, kind, item):
+        """
+        Result of transform `kind` for one item, computed in a batch with its neighbours
+        """
+        if self.workers <= 1:
+            return TRANSFORMS[kind][0]([item])[0]
+        future = asyncio.get_running_loop().create_future()
+        batch = self._pending.setdefault(kind, [])
+        batch.append((item, future))
+        if len(batch) >= self.chunk_size:
+            self._flush(kind)
+        elif len(batch) == 1:
+            # Let the other tasks of this loop iteration join the batch first
+            asyncio.get_running_loop().call_soon(self._flush, kind)
+        return await future
+
+    def _flush(self, kind):
+        batch = self._pending.pop(kind, None)
+        if not batch:
+            return
+        chunk_fn, fields = TRANSFORMS[kind]
+        loop = asyncio.get_running_loop()
+        done = loop.run_in_executor(self.executor, chunk_fn, [_project(item, fields) for item, _ in batch])
+        done.add_done_callback(lambda task: self._resolve(batch, task))
+
+    @staticmethod
+    def _resolve(batch, task):
+        error = task.exception()
+        results = None if error else task.result()
+        for i, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if error:
+                future.set_exception(error)
+            else:
+                future.set_result(results[i])
+
+
+def add_worker_arguments(parser):
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes for the CPU-bound transforms (1 = in-process)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK, help="places per worker task")
+
+
+def pool_from_args(args):
+    return CpuPool(workers=args.workers, chunk_size=args.chunk_size)
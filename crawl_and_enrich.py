@@ -4,253 +4,176 @@ SERIOUS Crawl4AI Script - Get REAL data for each place
 This will actually crawl websites and extract useful info
 """
 
-import json
 import asyncio
+import argparse
+import time
+from collections import deque
 from pathlib import Path
-from crawl4ai import AsyncWebCrawler
-from crawl4ai.extraction_strategy import LLMExtractionStrategy
-import os
+from crawl_engine import add_engine_arguments, engine_from_args
+from metrics import add_metrics_arguments, metrics_from_args
+from checkpoint import CheckpointJournal, add_checkpoint_arguments, fingerprint, place_key
+from cpu_pool import CpuPool, add_worker_arguments, pool_from_args
+from crawl_scheduler import CrawlScheduler, add_scheduler_arguments, save_state, scheduler_from_args
+from link_extract import extract_links
+from data_io import NdjsonWriter, is_ndjson, iter_ndjson, iter_places, load_json, read_ndjson_metadata
+from place_index import index_path_for, place_id, write_indexed_places
 
 # Load consolidated data
-def load_data():
-    data_path = Path("src/app/consolidated-data.json")
-    with open(data_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+def load_data(data_path="src/app/consolidated-data.json"):
+    return load_json(Path(data_path))
 
-def save_enriched_data(data):
-    output_path = Path("src/app/enriched-places.json")
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f"\n✅ Saved enriched data to: {output_path}")
+def save_enriched_data(data, output_path="src/app/enriched-places.json"):
+    output_path = Path(output_path)
+    write_indexed_places(output_path, data["places"], data["metadata"])
+    print(f"\n✅ Saved enriched data to: {output_path} (+ {index_path_for(output_path).name})")
 
-async def search_and_extract_info(place_name, destino):
+async def search_and_extract_info(place_name, destino, engine):
     """
-    Search for a place and extract real information
+    Search for a place and extract real information. A failed crawl leaves
+    `error` set to its record in engine.failures
     """
     # Search query
     search_query = f"{place_name} {destino} Mexico things to know visit guide"
-    search_url = f"https://www.google.com/search?q={search_query.replace(' ', '+')}"
+    search_url = engine.search_url(search_query)
     
     enriched_info = {
         "realidad_check": "",
         "requisitos_especificos": [],
         "consejos_practicos": [],
         "links_utiles": [],
-        "imagen_url": ""
+        "imagen_url": "",
+        "error": None
     }
     
     try:
-        async with AsyncWebCrawler(verbose=False) as crawler:
-            # Search Google
-            result = await crawler.arun(
-                url=search_url,
-                bypass_cache=True,
-                word_count_threshold=10
-            )
-            
-            # Extract links from markdown
-            if result.markdown:
-                lines = result.markdown.split('\n')
-                links = []
-                for line in lines:
-                    if 'http' in line and not 'google.com' in line:
-                        # Extract URL
-                        if '[' in line and '](' in line:
-                            try:
-                                url = line.split('](')[1].split(')')[0]
-                                title = line.split('[')[1].split(']')[0]
-                                if url.startswith('http') and 'youtube' not in url and 'facebook' not in url:
-                                    links.append({
-                                        "titulo": title[:100],
-                                        "url": url,
-                                        "descripcion": f"Información sobre {place_name}"
-                                    })
-                            except:
-                                pass
-                
-                # Take top 3 unique links
-                unique_links = []
-                seen_domains = set()
-                for link in links[:10]:
-                    domain = link['url'].split('/')[2] if '/' in link['url'] else link['url']
-                    if domain not in seen_domains and len(unique_links) < 3:
-                        unique_links.append(link)
-                        seen_domains.add(domain)
-                
-                enriched_info['links_utiles'] = unique_links
-                
-            print(f"  ✓ Found {len(enriched_info['links_utiles'])} links for {place_name}")
-            
+        # Search Google with one of the engine's pooled crawler sessions
+        result = await engine.fetch(
+            search_url,
+            bypass_cache=True,
+            word_count_threshold=10
+        )
+        
+        # Rank outbound links from the whole result page
+        document = str(result.markdown or "") or (result.html or "")
+        enriched_info['links_utiles'] = extract_links(document, place_name)
     except Exception as e:
-        print(f"  ✗ Error crawling {place_name}: {e}")
+        enriched_info['error'] = engine.record_failure(e, nombre=place_name, destino=destino, query=search_query)
     
     return enriched_info
 
-def generate_specific_requirements(item):
+async def enrich_place(item, destino, categoria, engine, journal, position, total, cpu, crawl=True, links=None):
     """
-    Generate SPECIFIC human-readable requirements based on the place
+    Requirements + crawled links for a single place. Places the scheduler left out
+    this run (crawl=False) keep `links` (their current links_utiles) uncrawled
     """
-    nombre = item.get('nombre', '')
-    descripcion = item.get('descripcion', '')
-    categoria = item.get('categoria', '')
-    
-    requisitos = []
-    
-    # Physical requirements
-    fisica = item.get('intensidad', {}).get('fisica', 0)
-    if fisica == 0:
-        requisitos.append("👌 Puedes ir en pijama - cero esfuerzo físico")
-    elif fisica == 1:
-        requisitos.append("🚶 Caminar tranquilo por 15-30 minutos")
-    elif fisica == 2:
-        if 'snorkel' in descripcion.lower() or 'nadar' in descripcion.lower():
-            requisitos.append("🏊 Nadar/snorkelear por 30-60 minutos")
-        else:
-            requisitos.append("🚶 Caminar 1-2 horas, pausas incluidas")
-    elif fisica == 3:
-        if 'buceo' in descripcion.lower():
-            requisitos.append("🤿 Bucear 1-2 horas - certificación recomendada")
-        elif 'cenote' in descripcion.lower():
-            requisitos.append("💦 Nadar en cenote 1-2 horas, escaleras/rocas")
-        else:
-            requisitos.append("🏃 Actividad física moderada 2-3 horas")
-    elif fisica == 4:
-        if 'tirolesa' in descripcion.lower() or 'zipline' in descripcion.lower():
-            requisitos.append("🎢 Circuito de tirolesas - resistencia y fuerza en brazos")
-        elif 'atv' in descripcion.lower():
-            requisitos.append("🏍️ Manejar ATV por terreno irregular - fuerza y coordinación")
-        else:
-            requisitos.append("💪 Alta energía - 3+ horas de actividad intensa")
-    else:
-        requisitos.append("🔥 Nivel atlético extremo - entrenamiento previo recomendado")
+    nombre = item.get('nombre', 'Unknown')
+    key = place_key(destino, categoria, item)
+    fp = fingerprint(item)
     
-    # Emotion/Thrill requirements
-    vertigo = item.get('intensidad', {}).get('vertigo', 0)
-    if vertigo >= 3:
-        if 'tirolesa' in descripcion.lower():
-            requisitos.append("🎢 Alturas de 10-30 metros - no apto si tienes miedo a las alturas")
-        elif 'acantilado' in descripcion.lower() or 'mirador' in descripcion.lower():
-            requisitos.append("🏔️ Vistas desde acantilados - puede dar vértigo")
-        elif 'faro' in descripcion.lower():
-            requisitos.append("🗼 Subir torre/faro - escaleras empinadas")
+    previous = journal.lookup(key, fp)
+    if previous is not None:
+        print(f"[{position}/{total}] {nombre}: unchanged, reusing checkpoint")
+        return previous
     
-    if 'clavados' in descripcion.lower() or 'salto' in descripcion.lower():
-        requisitos.append("🤸 Plataformas de salto disponibles (opcionales)")
-    
-    # Skill requirements
-    atletico = item.get('intensidad', {}).get('atletico', 0)
-    if atletico >= 3:
-        if 'buceo' in descripcion.lower():
-            if 'certificado' in descripcion.lower() or 'certificación' in descripcion.lower():
-                requisitos.append("📜 Certificación de buceo REQUERIDA")
-            else:
-                requisitos.append("🤿 Experiencia en buceo recomendada")
-        elif 'tiburón' in descripcion.lower():
-            requisitos.append("🦈 Experiencia de snorkel/buceo + no tener miedo")
+    # Generate specific requirements in the process pool, batched with the other places in flight
+    started = time.perf_counter()
+    requisitos = await cpu.submit("requirements", item)
+    engine.metrics.observe_task("requirements", time.perf_counter() - started)
     
-    # Environmental
-    if 'sol' in descripcion.lower() or 'playa' in categoria.lower():
-        requisitos.append("☀️ Protector solar obligatorio - sol caribeño fuerte")
-    
-    if 'cenote' in descripcion.lower():
-        requisitos.append("🧊 Agua fría (22-25°C) - wetsuit opcional pero ayuda")
-    
-    # Time requirements
-    if 'día completo' in descripcion.lower() or 'full day' in descripcion.lower():
-        requisitos.append("🕐 Día completo (6-8 horas)")
-    elif 'medio día' in descripcion.lower() or 'half day' in descripcion.lower():
-        requisitos.append("🕐 Medio día (3-4 horas)")
-    elif 'tour' in categoria.lower():
-        requisitos.append("🕐 Duración: 2-4 horas típicamente")
+    enriched_info = {
+        "requisitos_especificos": requisitos,
+        "links_utiles": links or item.get('links_utiles') or item.get('links', [])
+    }
     
-    # Special requirements
-    if 'lancha' in descripcion.lower() or 'barco' in descripcion.lower() or 'ferry' in descripcion.lower():
-        requisitos.append("⛵ Transporte en lancha/barco incluido")
+    if not crawl:
+        print(f"[{position}/{total}] {nombre}: {len(requisitos)} requirements, not scheduled for crawling")
+        return {**item, **enriched_info, "destino": destino, "categoria": categoria}
     
-    if 'reserva' in descripcion.lower() or 'tour' in descripcion.lower():
-        requisitos.append("📅 Reservación anticipada recomendada")
+    # Crawl for real data - the engine's per-domain rate limit keeps Google happy
+    crawled = await search_and_extract_info(nombre, destino, engine)
+    if crawled['links_utiles']:
+        enriched_info['links_utiles'] = crawled['links_utiles']
+    engine.metrics.observe_links(len(crawled['links_utiles']))
     
-    # Food requirements
-    if 'restaurante' in categoria.lower() or 'gastronom' in categoria.lower():
-        if 'picante' in descripcion.lower() or 'habanero' in descripcion.lower():
-            requisitos.append("🌶️ Comida puede ser picante - pide 'sin chile' si prefieres")
-        if 'precio' in descripcion.lower() or 'económico' in descripcion.lower():
-            requisitos.append("💰 Económico - menos de $200 MXN por persona")
-        elif 'gourmet' in descripcion.lower() or 'exclusiv' in descripcion.lower():
-            requisitos.append("💰💰 Precio alto - $500+ MXN por persona")
+    failed = f" (crawl failed: {crawled['error']['kind']})" if crawled['error'] else ""
+    print(f"[{position}/{total}] {nombre}: {len(requisitos)} requirements, "
+          f"{len(enriched_info['links_utiles'])} useful links{failed}")
     
-    return requisitos
+    # Combine all info
+    enriched_place = {
+        **item,
+        **enriched_info,
+        "destino": destino,
+        "categoria": categoria
+    }
+    # Failed crawls stay out of the journal so a resumed run tries them again
+    if not crawled['error']:
+        journal.record(key, fp, enriched_place)
+    return enriched_place
+
+def mark_crawled(scheduler, engine, pid, place):
+    """
+    A failed crawl isn't a crawl: those places keep their priority for the next run
+    """
+    if not engine.failures.failed(place.get('nombre', 'Unknown'), place['destino']):
+        scheduler.mark(pid, len(place['links_utiles']))
+
+def current_links(output_path):
+    """
+    place id -> links_utiles of the last written output (JSON or NDJSON): what the
+    scheduler ranks on and what places left uncrawled this run keep
+    """
+    output_path = Path(output_path)
+    if not output_path.exists():
+        return {}
+    places = iter_ndjson(output_path) if is_ndjson(output_path) else load_json(output_path)["places"]
+    return {place_id(place): place.get('links_utiles') for place in places}
+
 
-async def enrich_all_places():
+def scheduled_ids(scheduler, entries, current):
+    """
+    Ids the scheduler picks from (id, place) entries, judging each place by its
+    current (last written) links; only the links are kept while ranking
+    """
+    return set(scheduler.plan(
+        (pid, {"links_utiles": current[pid] if pid in current else item.get('links_utiles')})
+        for pid, item in entries
+    ))
+
+
+async def enrich_all_places(engine, journal, output_path="src/app/enriched-places.json",
+                            input_path="src/app/consolidated-data.json", cpu=None, scheduler=None):
     """
     Main function - enrich ALL places with real data
     """
     print("🚀 Starting REAL crawl4ai enrichment...\n")
+    metrics = engine.metrics
+    scheduler = scheduler or CrawlScheduler(budget=None)
     
-    data = load_data()
-    enriched_places = []
-    total = 0
-    processed = 0
-    
-    # Count total
-    for destino, categories in data.items():
-        for categoria, content in categories.items():
-            if isinstance(content, dict):
-                for subitems in content.values():
-                    if isinstance(subitems, list):
-                        total += len(subitems)
-            elif isinstance(content, list):
-                total += len(content)
+    with metrics.stage("load"):
+        data = load_data(input_path)
+        places = list(iter_places(data))
+        ids = [place_id({**item, "destino": destino, "categoria": categoria}) for destino, categoria, item in places]
+        current = current_links(output_path) if scheduler.budget is not None else {}
+    total = len(places)
     
     print(f"📊 Total places to process: {total}\n")
+    selected = scheduled_ids(scheduler, zip(ids, (item for _, _, item in places)), current)
+    scheduler.report(selected)
     
-    # Process each place
-    for destino, categories in data.items():
-        print(f"\n🏝️ Processing {destino}...")
-        
-        for categoria, content in categories.items():
-            items_to_process = []
-            
-            if isinstance(content, dict):
-                for subitems in content.values():
-                    if isinstance(subitems, list):
-                        items_to_process.extend(subitems)
-            elif isinstance(content, list):
-                items_to_process = content
-            
-            for item in items_to_process:
-                processed += 1
-                nombre = item.get('nombre', 'Unknown')
-                print(f"\n[{processed}/{total}] Processing: {nombre}")
-                
-                # Generate specific requirements
-                requisitos = generate_specific_requirements(item)
-                
-                # Crawl for real data (every 5th item to avoid rate limiting)
-                enriched_info = {
-                    "requisitos_especificos": requisitos,
-                    "links_utiles": item.get('links', [])
-                }
-                
-                if processed % 5 == 0:  # Crawl every 5th item
-                    print(f"  🌐 Crawling web for {nombre}...")
-                    crawled = await search_and_extract_info(nombre, destino)
-                    if crawled['links_utiles']:
-                        enriched_info['links_utiles'] = crawled['links_utiles']
-                
-                # Combine all info
-                enriched_place = {
-                    **item,
-                    **enriched_info,
-                    "destino": destino,
-                    "categoria": categoria
-                }
-                
-                enriched_places.append(enriched_place)
-                
-                print(f"  ✓ Added {len(requisitos)} specific requirements")
-                if enriched_info['links_utiles']:
-                    print(f"  ✓ Has {len(enriched_info['links_utiles'])} useful links")
+    # Crawl the scheduled places, `engine.concurrency` at a time; gather keeps input order
+    with metrics.stage("enrich"):
+        async with engine:
+            enriched_places = await asyncio.gather(*(
+                enrich_place(item, destino, categoria, engine, journal, position, total, cpu or CpuPool(1),
+                             crawl=pid in selected, links=current.get(pid))
+                for position, ((destino, categoria, item), pid) in enumerate(zip(places, ids), 1)
+            ))
+    engine.report()
+    for pid, place in zip(ids, enriched_places):
+        if pid in selected:
+            mark_crawled(scheduler, engine, pid, place)
+    print(f"♻️  Reused {journal.reused} unchanged places from the checkpoint journal")
     
     # Save enriched data
     output = {
@@ -259,15 +182,94 @@ async def enrich_all_places():
             "enriched_at": "2025-10-02",
             "version": "2.0"
         },
-        "places": enriched_places
+        "places": list(enriched_places)
     }
     
-    save_enriched_data(output)
+    with metrics.stage("save"):
+        save_enriched_data(output, output_path)
+        journal.compact()
     
     print(f"\n\n🎉 SUCCESS! Enriched {len(enriched_places)} places")
-    print(f"📁 File: src/app/enriched-places.json")
+    print(f"📁 File: {output_path}")
     print(f"💾 Ready to use in the app!")
 
-if __name__ == "__main__":
-    asyncio.run(enrich_all_places())
+async def enrich_stream(engine, journal, input_path, output_path, cpu=None, scheduler=None):
+    """
+    NDJSON in, NDJSON out: places are read, enriched and written one by one with
+    only a small window of them in flight, so memory doesn't grow with the catalog
+    """
+    print(f"🚀 Streaming enrichment: {input_path} → {output_path}\n")
+    
+    # A budget needs one extra pass over the input to rank the places, judged by
+    # their links in the last output (read before the writer replaces it)
+    scheduler = scheduler or CrawlScheduler(budget=None)
+    selected = None
+    current = {}
+    if scheduler.budget is not None:
+        current = current_links(output_path)
+        selected = scheduled_ids(scheduler, ((place_id(place), place) for place in iter_ndjson(input_path)), current)
+        scheduler.report(selected)
+    
+    window = engine.concurrency * 2
+    pending = deque()
+    metadata = {**read_ndjson_metadata(input_path), "enriched_at": "2025-10-02", "version": "2.0"}
+    metadata.pop("total_places", None)
+    
+    with engine.metrics.stage("enrich"), NdjsonWriter(output_path, metadata) as writer:
+        async with engine:
+            for position, place in enumerate(iter_ndjson(input_path), 1):
+                pid = place_id(place)
+                crawl = selected is None or pid in selected
+                destino = place.pop('destino', '')
+                categoria = place.pop('categoria', '')
+                pending.append(asyncio.ensure_future(
+                    enrich_place(place, destino, categoria, engine, journal, position, "?", cpu or CpuPool(1),
+                                 crawl=crawl, links=current.get(pid))
+                ))
+                if crawl:
+                    pending[-1].add_done_callback(lambda task, pid=pid: mark_crawled(scheduler, engine, pid,
+                                                                                     task.result()))
+                # Write in input order as soon as the oldest place is done
+                if len(pending) >= window:
+                    writer.write(await pending.popleft())
+            while pending:
+                writer.write(await pending.popleft())
+    engine.report()
+    journal.compact()
+    
+    print(f"\n🎉 SUCCESS! Streamed {writer.count} places to {output_path}")
 
+def main():
+    parser = argparse.ArgumentParser(description="Enrich every place with requirements and crawled links")
+    parser.add_argument("--input", default="src/app/consolidated-data.json",
+                        help="consolidated JSON, or flat .ndjson places to stream")
+    parser.add_argument("--output", default="src/app/enriched-places.json")
+    add_engine_arguments(parser)
+    add_checkpoint_arguments(parser)
+    add_metrics_arguments(parser)
+    add_worker_arguments(parser)
+    add_scheduler_arguments(parser)
+    args = parser.parse_args()
+    if is_ndjson(args.input) and not is_ndjson(args.output):
+        parser.error("streaming mode writes NDJSON; convert with `python data_io.py to-json`")
+    metrics = metrics_from_args(args)
+    engine = engine_from_args(args, metrics)
+    journal = CheckpointJournal(args.journal, resume=args.resume)
+    scheduler = scheduler_from_args(args)
+    try:
+        with pool_from_args(args) as cpu:
+            if is_ndjson(args.input):
+                asyncio.run(enrich_stream(engine, journal, args.input, args.output, cpu, scheduler))
+            else:
+                asyncio.run(enrich_all_places(engine, journal, args.output, args.input, cpu, scheduler))
+    finally:
+        journal.close()
+        save_state(args.schedule_state, scheduler.state)
+        engine.failures.save(args.fetch_errors)
+    if engine.failures.records:
+        print(f"📋 {len(engine.failures.records)} failed crawls recorded in {args.fetch_errors}")
+    metrics.report()
+    metrics.write(args.metrics_json, args.metrics_prom)
+
+if __name__ == "__main__":
+    main()
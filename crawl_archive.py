@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Record/replay archive for crawled pages
+--record appends every response the crawler returns (zlib-compressed JSON, one
+record after another) to an archive file and writes a sorted, fixed-width
+offset index next to it on close; until then each record's entry goes to an
+append-only log, so a killed run keeps what it recorded. --replay memory-maps that index, binary-searches it by
+URL hash and serves the pages back with no network, optionally sleeping a
+recorded, fixed or random latency per fetch, so runs are reproducible offline
+and the concurrent crawl path can be load-tested.
+
+    python crawl_and_enrich.py --record runs/oct.archive          # live crawl, recorded
+    python crawl_and_enrich.py --replay runs/oct.archive --replay-latency 0.05-0.4 --concurrency 32
+    python crawl_archive.py runs/oct.archive                      # what's in it
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import random
+import struct
+import time
+import zlib
+from pathlib import Path
+from types import SimpleNamespace
+
+from crawl_cache import normalize_url
+
+INDEX_MAGIC = b"VFCRAWL1"
+# sha256(url)[:16], offset, length, recorded fetch seconds
+ENTRY = struct.Struct("<16sQIf")
+
+
+def url_key(url):
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).digest()[:16]
+
+
+def index_path_for(path):
+    path = Path(path)
+    return path.with_name(path.name + ".idx")
+
+
+def index_log_path_for(path):
+    path = Path(path)
+    return path.with_name(path.name + ".idx.log")
+
+
+class ArchiveWriter:
+    """
+    Append-only. Each record's index entry is also appended to a .idx.log next
+    to the archive, flushed every `flush_every` records (0 = only on close);
+    close() merges it into the sorted index (newest record wins) and removes
+    it. A recording killed before close leaves the log for the next open to fold in
+    """
+
+    def __init__(self, path, flush_every=50):
+        self.path = Path(path)
+        self.flush_every = flush_every
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        recover_index(self.path)
+        self.entries = {key: (offset, length, elapsed) for key, offset, length, elapsed in _read_index(self.path)}
+        self.file = open(self.path, "ab")
+        self.log = open(index_log_path_for(self.path), "ab")
+        self.recorded = 0
+
+    def put(self, url, result, elapsed):
+        record = {
+            "url": url,
+            "status_code": getattr(result, "status_code", None),
+            "success": getattr(result, "success", True),
+            "markdown": str(getattr(result, "markdown", "") or ""),
+            "html": getattr(result, "html", "") or "",
+            "elapsed": elapsed,
+            "recorded_at": time.time(),
+        }
+        payload = zlib.compress(json.dumps(record, ensure_ascii=False).encode("utf-8"))
+        offset = self.file.tell()
+        self.file.write(payload)
+        key = url_key(url)
+        self.entries[key] = (offset, len(payload), elapsed)
+        self.log.write(ENTRY.pack(key, offset, len(payload), elapsed))
+        self.recorded += 1
+        if self.flush_every and self.recorded % self.flush_every == 0:
+            self.flush()
+
+    def flush(self):
+        """
+        Hand the records and their log entries to the OS, data first; costs only
+        what was written since the last flush, so it's fine on the event loop
+        """
+        self.file.flush()
+        self.log.flush()
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.close()
+        self.log.close()
+        _write_index(self.path, self.entries)
+        index_log_path_for(self.path).unlink(missing_ok=True)
+
+
+def _write_index(path, entries):
+    index_path = index_path_for(path)
+    tmp = index_path.with_name(index_path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(INDEX_MAGIC)
+        for key in sorted(entries):
+            f.write(ENTRY.pack(key, *entries[key]))
+    os.replace(tmp, index_path)
+
+
+def _read_index(path):
+    index_path = index_path_for(path)
+    if not index_path.exists():
+        return []
+    data = index_path.read_bytes()[len(INDEX_MAGIC):]
+    return list(ENTRY.iter_unpack(data))
+
+
+def recover_index(path):
+    """
+    Fold the .idx.log of a recording that never closed into the index; returns
+    how many entries it recovered. Entries past the end of the data (a torn
+    write) are left out
+    """
+    path = Path(path)
+    log_path = index_log_path_for(path)
+    if not log_path.exists():
+        return 0
+    entries = {key: (offset, length, elapsed) for key, offset, length, elapsed in _read_index(path)}
+    size = path.stat().st_size if path.exists() else 0
+    log = log_path.read_bytes()
+    recovered = 0
+    for key, offset, length, elapsed in ENTRY.iter_unpack(log[:len(log) - len(log) % ENTRY.size]):
+        if offset + length <= size:
+            entries[key] = (offset, length, elapsed)
+            recovered += 1
+    _write_index(path, entries)
+    log_path.unlink()
+    return recovered
+
+
+class ArchiveReader:
+    def __init__(self, path):
+        self.path = Path(path)
+        recover_index(self.path)
+        index_path = index_path_for(self.path)
+        if not index_path.exists():
+            raise FileNotFoundError(f"no index for {self.path} (record with --record first)")
+        self._index_file = open(index_path, "rb")
+        self._index = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._index[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            raise ValueError(f"{index_path} is not a crawl archive index")
+        self.count = (len(self._index) - len(INDEX_MAGIC)) // ENTRY.size
+        self._data_file = open(self.path, "rb")
+        # mmap can't map an empty file (an archive recorded with no successful fetches)
+        empty = os.fstat(self._data_file.fileno()).st_size == 0
+        self._data = b"" if empty else mmap.mmap(self._data_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _entry(self, i):
+        return ENTRY.unpack_from(self._index, len(INDEX_MAGIC) + i * ENTRY.size)
+
+    def lookup(self, url):
+        """
+        (offset, length, elapsed) of the latest record for `url`, or None
+        """
+        key = url_key(url)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entry(mid)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count:
+            entry = self._entry(lo)
+            if entry[0] == key:
+                return entry[1:]
+        return None
+
+    def get(self, url):
+        entry = self.lookup(url)
+        if entry is None:
+            return None
+        offset, length, _ = entry
+        return json.loads(zlib.decompress(self._data[offset:offset + length]))
+
+    def __iter__(self):
+        for i in range(self.count):
+            _, offset, length, _ = self._entry(i)
+            yield json.loads(zlib.decompress(self._data[offset:offset + length]))
+
+    def close(self):
+        self._index.close()
+        self._index_file.close()
+        if self._data:
+            self._data.close()
+        self._data_file.close()
+
+
+def parse_latency(value):
+    """
+    "recorded", seconds ("0.2") or a uniform range ("0.05-0.4")
+    """
+    if value == "recorded":
+        return value
+    low, _, high = value.partition("-")
+    try:
+        return (float(low), float(high or low))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected 'recorded', seconds or a min-max range, got {value!r}")
+
+
+class RecordingCrawler:
+    """
+    Wraps a real crawler session and archives every successful response
+    """
+
+    def __init__(self, crawler, writer):
+        self.crawler = crawler
+        self.writer = writer
+
+    async def __aenter__(self):
+        await self.crawler.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc):
+        return await self.crawler.__aexit__(*exc)
+
+    async def arun(self, url, **kwargs):
+        started = time.perf_counter()
+        result = await self.crawler.arun(url=url, **kwargs)
+        if getattr(result, "success", True):
+            self.writer.put(url, result, time.perf_counter() - started)
+        return result
+
+
+class ReplayCrawler:
+    """
+    Serves arun() from an archive; a URL that was never recorded fails like a network error
+    """
+
+    def __init__(self, reader, latency=(0.0, 0.0), seed=None):
+        self.reader = reader
+        self.latency = latency
+        self.rng = random.Random(seed)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def arun(self, url, **kwargs):
+        entry = self.reader.lookup(url)
+        if self.latency == "recorded":
+            delay = entry[2] if entry else 0.0
+        else:
+            delay = self.rng.uniform(*self.latency)
+        if delay:
+            await asyncio.sleep(delay)
+        if entry is None:
+            raise ConnectionError(f"not in the crawl archive: {url}")
+        record = self.reader.get(url)
+        return SimpleNamespace(url=record["url"], status_code=record["status_code"], success=record["success"],
+                               markdown=record["markdown"], html=record["html"], from_archive=True)
+
+
+def add_archive_arguments(parser):
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--record", metavar="ARCHIVE", help="write every crawled response to this archive")
+    group.add_argument("--replay", metavar="ARCHIVE", help="serve fetches from this archive, no network")
+    parser.add_argument("--record-flush", type=int, default=50, metavar="N",
+                        help="flush the archive and its index log every N recorded responses (0 = only at the end)")
+    parser.add_argument("--replay-latency", type=parse_latency, default=(0.0, 0.0),
+                        help="per fetch when replaying: 'recorded', seconds, or a min-max range")
+    parser.add_argument("--replay-seed", type=int, help="seed for random replay latencies")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect a crawl archive")
+    parser.add_argument("archive")
+    parser.add_argument("--url", help="print the recorded markdown for this URL")
+    args = parser.parse_args()
+
+    reader = ArchiveReader(args.archive)
+    if args.url:
+        record = reader.get(args.url)
+        print(record["markdown"] if record else f"❌ Not recorded: {args.url}")
+        return
+    size = os.path.getsize(args.archive)
+    elapsed = [reader._entry(i)[3] for i in range(reader.count)]
+    print(f"📼 {args.archive}: {reader.count} URLs, {size / 1024:.0f} KB compressed")
+    if elapsed:
+        elapsed.sort()
+        print(f"  recorded fetch time: median {elapsed[len(elapsed) // 2]:.3f}s, max {elapsed[-1]:.3f}s")
+    for record in list(reader)[:20]:
+        print(f"  {len(record['markdown']):>7} chars  {record['elapsed']:.3f}s  {record['url']}")
+    reader.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+On-disk cache for crawled pages
+Entries are keyed by the hash of the normalized URL, stored gzip-compressed,
+expire after a TTL (0 = never) and are evicted least-recently-used once the
+cache passes its byte budget. Every put and drop is appended to index.log as it
+happens, like the checkpoint journal, and folded into index.json on close, so a
+crashed run doesn't orphan the pages it cached. `python crawl_cache.py` prints
+what's in it.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+CACHE_DIR = ".crawl_cache"
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def normalize_url(url):
+    """
+    Same page, same key: lowercase scheme/host, default ports and fragments
+    dropped, query parameters sorted
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not (scheme, parts.port) in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def cache_key(url):
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+
+class CrawlCache:
+    def __init__(self, path=CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES, refresh=False):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.path / "index.json"
+        self.log_path = self.path / "index.log"
+        self.index = {}
+        if self.index_path.exists():
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        self._replay_log()
+        self.bytes = sum(entry["size"] for entry in self.index.values())
+        self._log = None
+
+    def _replay_log(self):
+        """
+        Apply what a run that never reached close() logged after the last index.json
+        """
+        if not self.log_path.exists():
+            return
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from a crash
+                key = entry.pop("key")
+                if entry.get("dropped"):
+                    self.index.pop(key, None)
+                else:
+                    self.index[key] = entry
+
+    def _log_entry(self, key, entry):
+        if self._log is None:
+            self._log = open(self.log_path, 'a', encoding='utf-8')
+        self._log.write(json.dumps({"key": key, **entry}, ensure_ascii=False) + "\n")
+        self._log.flush()
+
+    def _file(self, key):
+        return self.path / key[:2] / f"{key}.json.gz"
+
+    def _drop(self, key):
+        entry = self.index.pop(key, None)
+        if entry:
+            self.bytes -= entry["size"]
+            self._log_entry(key, {"dropped": True})
+        try:
+            self._file(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def get(self, url):
+        """
+        Cached crawl result for `url`, or None (always None with refresh=True)
+        """
+        key = cache_key(url)
+        entry = self.index.get(key)
+        if self.refresh or entry is None:
+            self.misses += 1
+            return None
+        now = time.time()
+        if self.ttl and now - entry["fetched_at"] > self.ttl:
+            self._drop(key)
+            self.expired += 1
+            self.misses += 1
+            return None
+        try:
+            with gzip.open(self._file(key), 'rt', encoding='utf-8') as f:
+                page = json.load(f)
+        except (OSError, ValueError):
+            self._drop(key)
+            self.misses += 1
+            return None
+        entry["accessed_at"] = now
+        self.hits += 1
+        return SimpleNamespace(url=page["url"], success=True, from_cache=True,
+                               markdown=page.get("markdown") or "", html=page.get("html") or "")
+
+    def put(self, url, result):
+        markdown = str(getattr(result, "markdown", "") or "")
+        html = getattr(result, "html", "") or ""
+        if not (markdown or html):
+            return
+        key = cache_key(url)
+        now = time.time()
+        page = {"url": normalize_url(url), "fetched_at": now, "markdown": markdown, "html": html}
+        target = self._file(key)
+        target.parent.mkdir(exist_ok=True)
+        tmp = target.with_suffix(".tmp")
+        with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+            json.dump(page, f, ensure_ascii=False)
+        os.replace(tmp, target)
+        if key in self.index:
+            self.bytes -= self.index[key]["size"]
+        self.index[key] = {"url": page["url"], "size": target.stat().st_size,
+                           "fetched_at": now, "accessed_at": now}
+        self.bytes += self.index[key]["size"]
+        self._log_entry(key, self.index[key])
+        self.evict()
+
+    def evict(self):
+        """
+        Drop least recently used entries until the cache fits its byte budget
+        """
+        if self.bytes <= self.max_bytes:
+            return
+        for key, entry in sorted(self.index.items(), key=lambda kv: kv[1]["accessed_at"]):
+            if self.bytes <= self.max_bytes:
+                break
+            self._drop(key)
+            self.evictions += 1
+
+    def close(self):
+        self.evict()
+        tmp = self.index_path.with_suffix(".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False)
+        os.replace(tmp, self.index_path)
+        # Everything logged is in index.json now
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        self.log_path.unlink(missing_ok=True)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "entries": len(self.index),
+            "bytes": self.bytes,
+        }
+
+    def report(self):
+        s = self.stats()
+        print(f"🗄️  Cache: {s['hits']} hits / {s['misses']} misses ({s['hit_rate']:.0%}), "
+              f"{s['expired']} expired, {s['evictions']} evicted, "
+              f"{s['entries']} entries ({s['bytes'] / 1024:.0f} KB)")
+
+
+def add_cache_arguments(parser):
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL / 3600, help="hours before an entry expires (0 = never expires)")
+    parser.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_BYTES / 1024 / 1024)
+    parser.add_argument("--refresh", action="store_true", help="ignore cached pages (they still get rewritten)")
+    parser.add_argument("--no-cache", action="store_true", help="don't read or write the crawl cache")
+
+
+def cache_from_args(args):
+    if args.no_cache:
+        return None
+    return CrawlCache(
+        path=args.cache_dir,
+        ttl=args.cache_ttl * 3600,
+        max_bytes=int(args.cache_max_mb * 1024 * 1024),
+        refresh=args.refresh,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the crawl cache")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--clear", action="store_true", help="delete every cached page")
+    args = parser.parse_args()
+
+    cache = CrawlCache(args.cache_dir)
+    if args.clear:
+        for key in list(cache.index):
+            cache._drop(key)
+        cache.close()
+        print(f"🧹 Cleared {args.cache_dir}")
+        return
+    cache.report()
+    for entry in sorted(cache.index.values(), key=lambda e: e["accessed_at"], reverse=True)[:20]:
+        age_h = (time.time() - entry["fetched_at"]) / 3600
+        print(f"  {entry['size']:>7} B  {age_h:6.1f}h  {entry['url']}")
+
+
+if __name__ == "__main__":
+    main()
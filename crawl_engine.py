@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Concurrent crawl engine for the enrichment scripts
+Keeps a pool of crawler sessions open for the whole run, runs N fetches at once,
+rate limits every domain with a token bucket and applies the fetch policy
+(timeouts, retries, per-host circuit breaker; see fetch_policy.py)
+"""
+
+import asyncio
+import time
+import urllib.request
+from types import SimpleNamespace
+from urllib.parse import quote_plus, urlsplit
+
+from crawl_archive import ArchiveReader, ArchiveWriter, RecordingCrawler, ReplayCrawler, add_archive_arguments
+from crawl_cache import add_cache_arguments, cache_from_args
+from fetch_policy import (TRANSIENT_STATUSES, FailureLog, FetchError, FetchPolicy, add_policy_arguments, classify,
+                          policy_from_args)
+from metrics import Metrics
+
+SEARCH_URL = "https://www.google.com/search?q={query}"
+USER_AGENT = "Mozilla/5.0 (VotacionFamilia enrichment)"
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second, up to `burst` saved up
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class StandInCrawler:
+    """
+    Plain-HTTP look-alike of AsyncWebCrawler, used against a local stand-in server
+    (see standin_server.py). The page body is returned as both html and markdown.
+    """
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def _get(self, url):
+        request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return response.status, response.read().decode("utf-8", errors="replace")
+
+    async def arun(self, url, **kwargs):
+        status, body = await asyncio.to_thread(self._get, url)
+        return SimpleNamespace(url=url, status_code=status, success=True, html=body, markdown=body)
+
+
+def default_crawler_factory():
+    # Imported here so scripts that never crawl don't pay for loading a browser stack
+    from crawl4ai import AsyncWebCrawler
+    return AsyncWebCrawler(verbose=False)
+
+
+def domain_of(url):
+    return urlsplit(url).hostname or url
+
+
+class CrawlEngine:
+    """
+    Shared crawler pool. Use as `async with CrawlEngine(...) as engine:` and call
+    `await engine.fetch(url)` from as many tasks as you like. Sessions are only
+    opened when a fetch misses the cache.
+    """
+
+    def __init__(self, concurrency=4, rate=1.0, burst=2, crawler_factory=None, search_url=SEARCH_URL,
+                 cache=None, metrics=None, archive=None, policy=None):
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.burst = burst
+        self.crawler_factory = crawler_factory or default_crawler_factory
+        self.search_url_template = search_url
+        self.cache = cache
+        self.metrics = metrics or Metrics()
+        self.archive = archive
+        self.policy = policy or FetchPolicy()
+        self.failures = FailureLog()
+        self._crawlers = []
+        self._sessions = None
+        self._buckets = {}
+        self.fetches = 0
+        self.errors = 0
+        self.retries = 0
+        self.fast_failures = 0
+        self.started = None
+        self.finished = None
+
+    async def __aenter__(self):
+        self._sessions = asyncio.Queue()
+        self._opening = 0
+        self.started = time.perf_counter()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.finished = time.perf_counter()
+        for crawler in self._crawlers:
+            await crawler.__aexit__(None, None, None)
+        self._crawlers = []
+        if self.cache:
+            self.cache.close()
+        if self.archive:
+            self.archive.close()
+        return False
+
+    async def _checkout(self):
+        if self._sessions.empty() and len(self._crawlers) + self._opening < self.concurrency:
+            self._opening += 1
+            try:
+                crawler = self.crawler_factory()
+                await crawler.__aenter__()
+            finally:
+                self._opening -= 1
+            self._crawlers.append(crawler)
+            return crawler
+        return await self._sessions.get()
+
+    def search_url(self, query):
+        return self.search_url_template.format(query=quote_plus(query))
+
+    def _bucket(self, domain):
+        if domain not in self._buckets:
+            self._buckets[domain] = TokenBucket(self.rate, self.burst)
+        return self._buckets[domain]
+
+    async def fetch(self, url, **kwargs):
+        """
+        Fetch one URL with a pooled crawler session, retrying transient failures
+        within the policy's deadline; raises FetchError once it gives up
+        """
+        if self.cache:
+            cached = self.cache.get(url)
+            if cached is not None:
+                return cached
+        host = domain_of(url)
+        breaker = self.policy.breaker(host)
+        deadline = None
+        attempt = 0
+        first_started = time.monotonic()
+        while True:
+            if self.policy.run_expired():
+                raise FetchError("deadline", url, "crawl deadline passed", attempts=attempt,
+                                 elapsed=time.monotonic() - first_started)
+            if not breaker.allow():
+                self.fast_failures += 1
+                raise FetchError("circuit_open", url, f"{host} is failing, circuit open", attempts=attempt,
+                                 elapsed=time.monotonic() - first_started)
+            if self.rate > 0:
+                await self._bucket(host).acquire()
+            attempt += 1
+            if deadline is None and self.policy.deadline is not None:
+                # The deadline starts with the first attempt, not the rate limiter queue
+                deadline = time.monotonic() + self.policy.deadline
+            result, error = await self._attempt(url, deadline, kwargs)
+            if error is None:
+                breaker.success()
+                if self.cache and getattr(result, "success", True):
+                    self.cache.put(url, result)
+                return result
+            breaker.failure()
+            delay = self.policy.backoff_delay(attempt)
+            out_of_time = deadline is not None and time.monotonic() + delay >= deadline
+            if not error.transient or attempt > self.policy.retries or out_of_time:
+                error.attempts = attempt
+                error.elapsed = time.monotonic() - first_started
+                raise error
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    async def _attempt(self, url, deadline, kwargs):
+        """
+        (result, None) or (None, FetchError) for a single try
+        """
+        crawler = await self._checkout()
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(crawler.arun(url=url, **kwargs), self.policy.attempt_timeout(deadline))
+        except Exception as exc:
+            error = classify(url, exc)
+        else:
+            status = getattr(result, "status_code", None)
+            error = None
+            if status in TRANSIENT_STATUSES:
+                error = FetchError("http", url, f"HTTP {status}", status=status)
+        finally:
+            self._sessions.put_nowait(crawler)
+            self.fetches += 1
+        if error is not None:
+            self.errors += 1
+            self.metrics.observe_fetch(time.perf_counter() - started, "error")
+            return None, error
+        empty = not (getattr(result, "markdown", None) or getattr(result, "html", None))
+        self.metrics.observe_fetch(time.perf_counter() - started, "empty" if empty else "ok")
+        return result, None
+
+    def record_failure(self, error, **place):
+        """
+        Per-place failure record (place fields: nombre, destino, ...); returns it
+        """
+        return self.failures.record(error if isinstance(error, FetchError) else classify(None, error), **place)
+
+    def stats(self):
+        end = self.finished or time.perf_counter()
+        elapsed = end - self.started if self.started else 0.0
+        return {
+            "fetches": self.fetches,
+            "errors": self.errors,
+            "elapsed_s": round(elapsed, 3),
+            "fetches_per_s": round(self.fetches / elapsed, 2) if elapsed > 0 else 0.0,
+            "retries": self.retries,
+            "failed_places": len(self.failures.records),
+            "failures_by_kind": self.failures.by_kind(),
+            "circuit_opens": self.policy.open_breakers(),
+            "concurrency": self.concurrency,
+            "cache": self.cache.stats() if self.cache else None,
+        }
+
+    def report(self):
+        s = self.stats()
+        print(f"\n⚡ Crawl: {s['fetches']} fetches ({s['errors']} errors) in {s['elapsed_s']}s "
+              f"→ {s['fetches_per_s']} fetches/s with {s['concurrency']} sessions")
+        if s["retries"] or s["failed_places"]:
+            kinds = ", ".join(f"{count} {kind}" for kind, count in s["failures_by_kind"].items()) or "none"
+            print(f"🔁 {s['retries']} retries; {s['failed_places']} places failed ({kinds})")
+        for host, opens in s["circuit_opens"].items():
+            print(f"🚧 Circuit for {host} opened {opens}x ({self.fast_failures} fetches failed fast)")
+        if self.cache:
+            self.cache.report()
+        if isinstance(self.archive, ArchiveWriter):
+            print(f"📼 Recorded {self.archive.recorded} responses to {self.archive.path}")
+        elif self.archive:
+            print(f"📼 Replayed from {self.archive.path} ({self.archive.count} URLs archived)")
+
+
+def add_engine_arguments(parser):
+    """
+    Shared CLI flags for every script that crawls
+    """
+    parser.add_argument("--concurrency", type=int, default=4, help="crawler sessions / fetches in flight")
+    parser.add_argument("--rate", type=float, default=1.0, help="max fetches per second per domain (0 = unlimited)")
+    parser.add_argument("--burst", type=int, default=2, help="token bucket size per domain")
+    parser.add_argument("--search-url", default=SEARCH_URL, help="search URL template with {query}")
+    parser.add_argument("--stand-in", action="store_true", help="fetch with plain HTTP (local stand-in server)")
+    add_cache_arguments(parser)
+    add_archive_arguments(parser)
+    add_policy_arguments(parser)
+
+
+def engine_from_args(args, metrics=None):
+    # The stand-in's socket timeout follows the attempt timeout so abandoned attempts don't hold threads
+    factory = (lambda: StandInCrawler(args.fetch_timeout or 30)) if args.stand_in else default_crawler_factory
+    cache = cache_from_args(args)
+    archive = None
+    # Recording and replaying bypass the cache: every fetch goes to the crawler (or the archive)
+    if args.record:
+        archive = ArchiveWriter(args.record, args.record_flush)
+        live_factory = factory
+        factory = lambda: RecordingCrawler(live_factory(), archive)
+        cache = None
+    elif args.replay:
+        archive = ArchiveReader(args.replay)
+        factory = lambda: ReplayCrawler(archive, args.replay_latency, args.replay_seed)
+        cache = None
+    return CrawlEngine(
+        concurrency=args.concurrency,
+        rate=args.rate,
+        burst=args.burst,
+        crawler_factory=factory,
+        search_url=args.search_url,
+        cache=cache,
+        metrics=metrics,
+        archive=archive,
+        policy=policy_from_args(args),
+    )
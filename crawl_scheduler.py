@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Budgeted crawl scheduler
+With --budget N a run crawls only the N places that need it most: places with
+no links_utiles first, then the ones whose last crawl is oldest and the ones
+with the most votes. Places left out gain priority every run they wait, and
+when each place was crawled is kept in a state file between runs, so a small
+per-run budget still cycles through the whole catalog.
+
+    python crawl_and_enrich.py --budget 20 --votes data/votes-snapshot.json
+    python crawl_scheduler.py --budget 20 --votes votes.csv           # show the plan only
+"""
+
+import argparse
+import heapq
+import math
+import time
+from collections import Counter
+from pathlib import Path
+
+from data_io import load_json, save_json
+from place_index import place_id
+
+STATE_PATH = ".enrich_state/schedule.json"
+EMPTY_LINKS_WEIGHT = 10.0
+# Per `stale_days` since the last crawl, capped; never crawled counts as the cap
+STALE_WEIGHT = 1.0
+MAX_STALENESS = 5.0
+VOTE_WEIGHT = 2.0
+DEFERRED_WEIGHT = 0.5
+
+
+def load_vote_counts(path):
+    """
+    place id -> votes, from a votes_aggregate snapshot (.json) or a raw votes export
+    """
+    if Path(path).suffix == ".json":
+        return load_json(path)["counts"]
+    from votes_aggregate import VoteSource
+    return Counter(pid for _, _, pid in VoteSource(str(path)).rows())
+
+
+class CrawlScheduler:
+    def __init__(self, budget, state=None, votes=None, stale_days=30, now=None):
+        self.budget = budget
+        self.state = state or {"places": {}}
+        self.votes = votes or {}
+        self.stale_days = stale_days
+        self.now = now or time.time()
+
+    def priority(self, pid, place):
+        entry = self.state["places"].get(pid, {})
+        score = 0.0
+        if not place.get("links_utiles"):
+            score += EMPTY_LINKS_WEIGHT
+        if "crawled_at" in entry:
+            age_days = (self.now - entry["crawled_at"]) / 86400
+            score += STALE_WEIGHT * min(MAX_STALENESS, age_days / self.stale_days)
+        else:
+            score += STALE_WEIGHT * MAX_STALENESS
+        score += VOTE_WEIGHT * math.log1p(self.votes.get(pid, 0))
+        score += DEFERRED_WEIGHT * entry.get("deferred", 0)
+        return score
+
+    def plan(self, entries):
+        """
+        entries: (place id, place). Ids to crawl this run, highest priority first;
+        everything when there is no budget
+        """
+        entries = list(entries)
+        if self.budget is None:
+            return [pid for pid, _ in entries]
+        heap = [(-self.priority(pid, place), position, pid) for position, (pid, place) in enumerate(entries)]
+        heapq.heapify(heap)
+        selected = [heapq.heappop(heap)[2] for _ in range(min(self.budget, len(heap)))]
+        queue = [heapq.heappop(heap) for _ in range(len(heap))]
+        for _, _, pid in queue:
+            entry = self.state["places"].setdefault(pid, {})
+            entry["deferred"] = entry.get("deferred", 0) + 1
+        self.state["queue"] = [{"id": pid, "priority": round(-score, 3)} for score, _, pid in queue]
+        return selected
+
+    def mark(self, pid, links):
+        self.state["places"][pid] = {"crawled_at": self.now, "links": links, "deferred": 0}
+
+    def report(self, selected):
+        if self.budget is None:
+            return
+        waiting = self.state.get("queue", [])
+        print(f"📅 Budget {self.budget}: crawling {len(selected)} places, {len(waiting)} wait for a later run")
+
+
+def load_state(path):
+    return load_json(path) if Path(path).exists() else {"places": {}}
+
+
+def save_state(path, state):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    save_json(path, state)
+
+
+def add_scheduler_arguments(parser):
+    parser.add_argument("--budget", type=int, help="max places to crawl this run (default: all)")
+    parser.add_argument("--schedule-state", default=STATE_PATH, help="last crawl per place and the waiting queue")
+    parser.add_argument("--votes", help="votes snapshot (.json from votes_aggregate.py) or votes export")
+    parser.add_argument("--stale-days", type=float, default=30, help="days after which a crawl counts as stale")
+
+
+def scheduler_from_args(args):
+    votes = load_vote_counts(args.votes) if args.votes else None
+    return CrawlScheduler(args.budget, load_state(args.schedule_state), votes, args.stale_days)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show which places a budgeted crawl would pick")
+    parser.add_argument("--input", default="src/app/enriched-places.json")
+    add_scheduler_arguments(parser)
+    args = parser.parse_args()
+    scheduler = scheduler_from_args(args)
+    places = load_json(args.input)["places"]
+    entries = [(place_id(place), place) for place in places]
+    by_id = dict(entries)
+    selected = scheduler.plan(entries)
+    for pid in selected[:50]:
+        print(f"  {scheduler.priority(pid, by_id[pid]):6.2f}  {by_id[pid].get('nombre')}")
+    scheduler.report(selected)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Shared data I/O for the enrichment scripts
+Whole-file JSON (what the Next.js app imports) and NDJSON, one place per line,
+for streaming runs with constant memory. An NDJSON file may start with a
+{"metadata": {...}} line; every other line is a place.
+
+    python data_io.py to-ndjson src/app/enriched-places.json places.ndjson
+    python data_io.py to-json places.ndjson src/app/enriched-places.json
+    python data_io.py flatten src/app/consolidated-data.json consolidated.ndjson
+    python data_io.py compress public/places/manifest.json    # .gz + .br next to it
+    python data_io.py bench src/app/enriched-places.json --scale 100
+
+Writes go through orjson when it's installed, producing the same bytes as the
+stdlib; --compact drops the indentation.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib writes the same bytes, just slower
+    orjson = None
+
+PRECOMPRESS_FORMATS = ("gzip", "br")
+
+
+def is_ndjson(path):
+    return Path(path).suffix in (".ndjson", ".jsonl")
+
+
+def loads(text):
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass  # NaN/Infinity and friends: the stdlib accepts them
+    return json.loads(text)
+
+
+def _odd_floats(data):
+    """
+    True when a float would be spelled differently by orjson (1e16 vs 1e+16,
+    1e-05 vs 1e-5, NaN vs null). The stdlib and orjson agree on everything in
+    between, and walking the data is much cheaper than scanning the output
+    """
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        kind = type(value)
+        if kind is dict:
+            stack.extend(value.values())
+        elif kind is list or kind is tuple:
+            stack.extend(value)
+        elif kind is float and value and not 1e-4 <= abs(value) < 1e16:
+            return True
+    return False
+
+
+def dump_bytes(data, compact=False):
+    """
+    UTF-8 bytes of exactly what json.dumps(data, ensure_ascii=False, indent=2)
+    returns (or with separators=(",", ":") when compact), through orjson when
+    it's installed
+    """
+    if orjson is not None and not _odd_floats(data):
+        try:
+            return orjson.dumps(data, option=0 if compact else orjson.OPT_INDENT_2)
+        except TypeError:
+            pass  # non-str keys, ints past 64 bits: the stdlib handles them
+    if compact:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def dumps(data, compact=False):
+    return dump_bytes(data, compact).decode("utf-8")
+
+
+def load_json(path):
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def _tmp_path(path):
+    path = Path(path)
+    return path.with_name(path.name + ".tmp")
+
+
+def save_json(path, data, compact=False):
+    """
+    Atomic write: a crash mid-write never leaves a truncated file behind.
+    compact=True drops the indentation for machine-only artifacts
+    """
+    _write_bytes(path, dump_bytes(data, compact))
+
+
+def _write_bytes(path, data):
+    tmp = _tmp_path(path)
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def write_precompressed(path, formats=PRECOMPRESS_FORMATS):
+    """
+    Write <path>.gz / <path>.br next to `path` for static serving; returns {suffix: bytes}.
+    Brotli is optional and skipped (with a warning) when the module isn't installed
+    """
+    path = Path(path)
+    data = path.read_bytes()
+    written = {}
+    if "gzip" in formats:
+        # mtime=0 so the same file always compresses to the same bytes
+        _write_bytes(path.with_name(path.name + ".gz"), gzip.compress(data, compresslevel=9, mtime=0))
+        written[".gz"] = path.with_name(path.name + ".gz").stat().st_size
+    if "br" in formats:
+        try:
+            import brotli
+        except ImportError:
+            print(f"⚠️  brotli isn't installed (pip install brotli); no .br for {path.name}")
+            return written
+        _write_bytes(path.with_name(path.name + ".br"), brotli.compress(data, quality=11))
+        written[".br"] = path.with_name(path.name + ".br").stat().st_size
+    return written
+
+
+def parse_formats(value):
+    formats = tuple(f.strip() for f in value.split(",") if f.strip())
+    unknown = [f for f in formats if f not in PRECOMPRESS_FORMATS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown format(s): {', '.join(unknown)} (choose from gzip,br)")
+    return formats
+
+
+def add_output_arguments(parser):
+    parser.add_argument("--compact", action="store_true", help="minified JSON output (no indentation)")
+    parser.add_argument("--precompress", type=parse_formats, default=(),
+                        help="also write .gz/.br variants of each JSON artifact: gzip,br")
+
+
+def precompressed_variants(path):
+    path = Path(path)
+    return [path.with_name(path.name + suffix) for suffix in (".gz", ".br")]
+
+
+def iter_places(data):
+    """
+    Flatten consolidated destino -> categoria -> items (gastronomy nests one
+    more level) into (destino, categoria, item)
+    """
+    for destino, categories in data.items():
+        for categoria, content in categories.items():
+            if isinstance(content, dict):
+                for subitems in content.values():
+                    if isinstance(subitems, list):
+                        for item in subitems:
+                            yield destino, categoria, item
+            elif isinstance(content, list):
+                for item in content:
+                    yield destino, categoria, item
+
+
+def read_ndjson_metadata(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        first = f.readline()
+    if first.strip():
+        record = loads(first)
+        if set(record) == {"metadata"}:
+            return record["metadata"]
+    return {}
+
+
+def iter_ndjson(path):
+    """
+    Stream places from an NDJSON file, skipping the metadata line and blanks
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = loads(line)
+            if set(record) == {"metadata"}:
+                continue
+            yield record
+
+
+class NdjsonWriter:
+    """
+    Writes places one line at a time into a temp file that replaces `path` on
+    close, so a stage can stream a file into itself
+    """
+
+    def __init__(self, path, metadata=None):
+        self.path = Path(path)
+        self.tmp = _tmp_path(path)
+        self.count = 0
+        self._file = open(self.tmp, 'w', encoding='utf-8')
+        if metadata is not None:
+            self._file.write(json.dumps({"metadata": metadata}, ensure_ascii=False) + "\n")
+
+    def write(self, place):
+        self._file.write(json.dumps(place, ensure_ascii=False) + "\n")
+        self.count += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self._file.close()
+        if exc_type is None:
+            os.replace(self.tmp, self.path)
+        else:
+            self.tmp.unlink()
+        return False
+
+
+def write_ndjson(path, places, metadata=None):
+    """
+    Write places as they arrive; returns how many were written
+    """
+    with NdjsonWriter(path, metadata) as writer:
+        for place in places:
+            writer.write(place)
+    return writer.count
+
+
+def _indented(value, prefix):
+    return dumps(value).replace("\n", "\n" + prefix)
+
+
+def write_places_json(path, places, metadata, compact=False):
+    """
+    Stream places into the {"metadata":..., "places":[...]} file the app imports,
+    byte-identical to json.dump(..., indent=2) (or the compact separators) without
+    holding every place
+    """
+    tmp = _tmp_path(path)
+    with open(tmp, 'w', encoding='utf-8') as f:
+        if compact:
+            f.write('{"metadata":' + dumps(metadata, True) + ',"places":[')
+            for i, place in enumerate(places):
+                f.write(("," if i else "") + dumps(place, True))
+            f.write(']}')
+        else:
+            f.write('{\n  "metadata": ' + _indented(metadata, "  ") + ',\n  "places": [')
+            first = True
+            for place in places:
+                f.write(("\n    " if first else ",\n    ") + _indented(place, "    "))
+                first = False
+            f.write('\n  ]\n}' if not first else ']\n}')
+    os.replace(tmp, path)
+
+
+def ndjson_to_json(ndjson_path, json_path, write=write_places_json):
+    metadata = dict(read_ndjson_metadata(ndjson_path))
+    metadata["total_places"] = sum(1 for _ in iter_ndjson(ndjson_path))
+    write(json_path, iter_ndjson(ndjson_path), metadata)
+    return metadata["total_places"]
+
+
+def json_to_ndjson(json_path, ndjson_path):
+    data = load_json(json_path)
+    return write_ndjson(ndjson_path, data["places"], data.get("metadata", {}))
+
+
+def consolidated_to_ndjson(json_path, ndjson_path):
+    data = load_json(json_path)
+    places = ({**item, "destino": destino, "categoria": categoria} for destino, categoria, item in iter_places(data))
+    return write_ndjson(ndjson_path, places)
+
+
+def _timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench(path, scale=1):
+    """
+    Encode/decode times (in memory, so the disk doesn't blur them) and file sizes:
+    stdlib indent=2 (what every writer used to do) vs. this module, indented and compact
+    """
+    data = load_json(path)
+    if scale > 1 and isinstance(data.get("places"), list):
+        data = {**data, "places": data["places"] * scale}
+    backend = f"orjson {orjson.__version__}" if orjson is not None else "stdlib json (pip install orjson for speed)"
+    print(f"⏱️  {path} x{scale}, backend: {backend}")
+
+    rows = [
+        ("stdlib indent=2 (before)", lambda: json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"),
+         lambda raw: json.loads(raw.decode("utf-8"))),
+        ("data_io indented", lambda: dump_bytes(data), loads),
+        ("data_io compact", lambda: dump_bytes(data, compact=True), loads),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, encode, decode in rows:
+            encode_s, raw = _timed(encode)
+            decode_s, _ = _timed(lambda: decode(raw))
+            target = Path(tmp) / "bench.json"
+            target.write_bytes(raw)
+            sizes = write_precompressed(target)
+            variants = "  ".join(f"{suffix} {size / 1024:,.0f} KB" for suffix, size in sizes.items())
+            print(f"  {label:<26} encode {encode_s * 1000:7.1f} ms  decode {decode_s * 1000:7.1f} ms  "
+                  f"{len(raw) / 1024:,.0f} KB  {variants}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert between place JSON and NDJSON, or time JSON I/O")
+    parser.add_argument("command", choices=["to-ndjson", "to-json", "flatten", "compress", "bench"])
+    parser.add_argument("source")
+    parser.add_argument("target", nargs="?")
+    parser.add_argument("--scale", type=int, default=1, help="bench: repeat the places this many times")
+    add_output_arguments(parser)
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        bench(args.source, args.scale)
+        return
+    if args.command == "compress":
+        sizes = write_precompressed(args.source, args.precompress or PRECOMPRESS_FORMATS)
+        print(f"✅ {args.source}: " + ", ".join(f"{suffix} {size / 1024:.1f} KB" for suffix, size in sizes.items()))
+        return
+    if not args.target:
+        parser.error(f"{args.command} needs a target file")
+    if args.command == "to-json":
+        # place_index builds on this module, so it's imported here
+        from place_index import write_indexed_places
+        count = ndjson_to_json(args.source, args.target, write=lambda path, places, metadata: write_indexed_places(
+            path, places, metadata, compact=args.compact, precompress=args.precompress))
+    else:
+        convert = {"to-ndjson": json_to_ndjson, "flatten": consolidated_to_ndjson}
+        count = convert[args.command](args.source, args.target)
+    print(f"✅ {count} places: {args.source} → {args.target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Cross-source place deduplication
+Places from every source (enriched, consolidated, enhanced, data.json and the
+researched ADDITIONAL_LOCATIONS) are shingled on their normalized name (char
+trigrams) and description (word 3-grams) and MinHashed; LSH bands over the
+signatures give candidate pairs, so no pair is compared unless it shares a
+band. Pairs close enough on name or description are clustered (union-find)
+and each cluster is merged into one place, fields taken by source precedence,
+so the crawl only sees distinct places.
+
+    python dedup.py                                          # report clusters over the default sources
+    python dedup.py src/app/consolidated-data.json src/app/data.json --output merged.json
+"""
+
+import argparse
+import hashlib
+import random
+from pathlib import Path
+
+from data_io import is_ndjson, iter_ndjson, iter_places, load_json, save_json
+from name_match import name_tokens, normalize_name, trigrams
+from place_index import place_id, write_indexed_places
+
+DEFAULT_SOURCES = (
+    "src/app/enriched-places.json",
+    "src/app/consolidated-data.json",
+    "src/app/enhanced-data.json",
+    "src/app/data.json",
+)
+REPORT_PATH = ".enrich_state/dedup.json"
+NUM_PERM = 64
+# (bands, rows): a pair becomes a candidate with probability 1 - (1 - J^rows)^bands
+NAME_BANDS = (16, 4)
+DESCRIPTION_BANDS = (32, 2)
+NAME_THRESHOLD = 0.7
+DESCRIPTION_THRESHOLD = 0.5
+# List fields merged across a cluster instead of taken from one source
+UNION_FIELDS = ("links", "links_utiles", "image_urls", "image_sources")
+MERSENNE = (1 << 61) - 1
+
+
+def description_shingles(text, size=3):
+    tokens = name_tokens(text or "")
+    if len(tokens) < size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def _hash(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "little")
+
+
+class MinHasher:
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        rng = random.Random(seed)
+        self.perms = [(rng.randrange(1, MERSENNE), rng.randrange(MERSENNE)) for _ in range(num_perm)]
+
+    def signature(self, shingles):
+        if not shingles:
+            return None
+        hashes = [_hash(s) for s in shingles]
+        return tuple(min((a * h + b) % MERSENNE for h in hashes) for a, b in self.perms)
+
+
+def similarity(sig_a, sig_b):
+    """
+    Estimated Jaccard of the two shingle sets
+    """
+    if sig_a is None or sig_b is None:
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+class LshIndex:
+    """
+    Buckets per band; `block` keeps e.g. different destinos from ever colliding
+    """
+
+    def __init__(self, bands, rows):
+        self.bands = bands
+        self.rows = rows
+        self.buckets = {}
+
+    def add(self, key, signature, block=""):
+        if signature is None:
+            return set()
+        found = set()
+        for band in range(self.bands):
+            bucket = (block, band, signature[band * self.rows:(band + 1) * self.rows])
+            members = self.buckets.setdefault(bucket, [])
+            found.update(members)
+            members.append(key)
+        return found
+
+
+def _find(parents, i):
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+
+class Deduplicator:
+    def __init__(self, name_threshold=NAME_THRESHOLD, description_threshold=DESCRIPTION_THRESHOLD,
+                 across_destinos=False, seed=1):
+        self.name_threshold = name_threshold
+        self.description_threshold = description_threshold
+        self.across_destinos = across_destinos
+        self.hasher = MinHasher(seed=seed)
+
+    def clusters(self, records):
+        """
+        Groups of record positions, each sorted (so the first is the highest-precedence one)
+        """
+        names = LshIndex(*NAME_BANDS)
+        descriptions = LshIndex(*DESCRIPTION_BANDS)
+        parents = list(range(len(records)))
+        self.scores = {}
+        signatures = []
+        for i, record in enumerate(records):
+            block = "" if self.across_destinos else record.get("destino", "")
+            name_sig = self.hasher.signature(trigrams(normalize_name(record.get("nombre", ""))))
+            desc_sig = self.hasher.signature(description_shingles(record.get("descripcion")))
+            signatures.append((name_sig, desc_sig))
+            candidates = names.add(i, name_sig, block) | descriptions.add(i, desc_sig, block)
+            for j in candidates:
+                name_score = similarity(name_sig, signatures[j][0])
+                desc_score = similarity(desc_sig, signatures[j][1])
+                if name_score >= self.name_threshold or desc_score >= self.description_threshold:
+                    root_i, root_j = _find(parents, i), _find(parents, j)
+                    if root_i != root_j:
+                        parents[max(root_i, root_j)] = min(root_i, root_j)
+                    self.scores[i] = max(self.scores.get(i, 0), round(max(name_score, desc_score), 3))
+
+        groups = {}
+        for i in range(len(records)):
+            groups.setdefault(_find(parents, i), []).append(i)
+        return list(groups.values())
+
+
+def merge_cluster(records):
+    """
+    One place out of a cluster: each field from the first record (highest
+    precedence) that has it non-empty, link/image lists unioned in that order
+    """
+    merged = {}
+    for record in records:
+        for field, value in record.items():
+            if field in UNION_FIELDS:
+                continue
+            if value not in (None, "", [], {}) and merged.get(field) in (None, "", [], {}):
+                merged[field] = value
+    for field in UNION_FIELDS:
+        values, seen = [], set()
+        for record in records:
+            for value in record.get(field) or []:
+                key = value.get("url") if isinstance(value, dict) else value
+                if key not in seen:
+                    seen.add(key)
+                    values.append(value)
+        if values or any(field in record for record in records):
+            merged[field] = values
+    aliases = list(dict.fromkeys(r["nombre"] for r in records[1:] if r.get("nombre") != merged.get("nombre")))
+    if aliases:
+        merged["nombres_alternos"] = aliases
+    return merged
+
+
+def dedup_places(sources, deduplicator):
+    """
+    sources: [(label, places)] in precedence order. Returns (places, report)
+    """
+    records, origins = [], []
+    for label, places in sources:
+        for place in places:
+            records.append(place)
+            origins.append(label)
+
+    merged, report = [], []
+    for cluster in sorted(deduplicator.clusters(records)):
+        members = [records[i] for i in cluster]
+        place = merge_cluster(members) if len(cluster) > 1 else members[0]
+        merged.append(place)
+        if len(cluster) > 1:
+            kept = place_id(members[0])
+            report.append({
+                "id": kept,
+                "nombre": place.get("nombre"),
+                "members": [{"id": place_id(records[i]), "nombre": records[i].get("nombre"),
+                             "source": origins[i], "score": deduplicator.scores.get(i, 1.0)} for i in cluster],
+            })
+    return merged, report
+
+
+def load_source(path):
+    """
+    Flat places (with destino/categoria) from consolidated JSON, {metadata, places} or NDJSON
+    """
+    if is_ndjson(path):
+        return list(iter_ndjson(path))
+    data = load_json(path)
+    if isinstance(data.get("places"), list):
+        return data["places"]
+    return [{**item, "destino": destino, "categoria": categoria} for destino, categoria, item in iter_places(data)]
+
+
+def save_report(path, report):
+    """
+    Clusters plus an id map (merged-away id -> kept id) so votes on old ids can be moved
+    """
+    id_map = {member["id"]: cluster["id"] for cluster in report for member in cluster["members"]
+              if member["id"] != cluster["id"]}
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    save_json(path, {"clusters": report, "id_map": id_map})
+
+
+def add_dedup_arguments(parser):
+    parser.add_argument("--dedup-sources", type=lambda value: [p for p in value.split(",") if p], default=[],
+                        help="extra place files merged in, lower precedence than --input")
+    parser.add_argument("--name-threshold", type=float, default=NAME_THRESHOLD)
+    parser.add_argument("--description-threshold", type=float, default=DESCRIPTION_THRESHOLD)
+    parser.add_argument("--across-destinos", action="store_true",
+                        help="also cluster places of different destinos (off: same name, different town)")
+    parser.add_argument("--dedup-report", default=REPORT_PATH, help="clusters and old id -> kept id map")
+
+
+def deduplicator_from_args(args):
+    return Deduplicator(args.name_threshold, args.description_threshold, args.across_destinos)
+
+
+def print_report(report, before, after):
+    print(f"🧬 {before} places → {after} distinct ({len(report)} clusters merged)")
+    for cluster in report:
+        names = " | ".join(f"{m['nombre']} [{Path(m['source']).stem}]" for m in cluster["members"])
+        print(f"  • {names}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cluster near-duplicate places across sources and merge them")
+    parser.add_argument("sources", nargs="*", default=list(DEFAULT_SOURCES),
+                        help="place files, highest precedence first")
+    parser.add_argument("--output", help="write the merged places here (report only without it)")
+    parser.add_argument("--no-additional", action="store_true", help="leave enrich_data.ADDITIONAL_LOCATIONS out")
+    add_dedup_arguments(parser)
+    args = parser.parse_args()
+
+    sources = [(path, load_source(path)) for path in args.sources + args.dedup_sources]
+    if not args.no_additional:
+        from enrich_data import ADDITIONAL_LOCATIONS
+        additional = [{**item, "destino": destino, "categoria": categoria}
+                      for destino, categories in ADDITIONAL_LOCATIONS.items()
+                      for categoria, items in categories.items() for item in items]
+        sources.insert(1, ("enrich_data.ADDITIONAL_LOCATIONS", additional))
+    before = sum(len(places) for _, places in sources)
+    places, report = dedup_places(sources, deduplicator_from_args(args))
+    print_report(report, before, len(places))
+    save_report(args.dedup_report, report)
+    print(f"📋 Report: {args.dedup_report}")
+    if args.output:
+        write_indexed_places(args.output, places, {"total_places": len(places), "version": "2.0"})
+        print(f"📁 Wrote {len(places)} places to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,14 @@ Uses crawl4ai to gather real information and links for all destinations
 
 import json
 import asyncio
-from crawl4ai import AsyncWebCrawler
+import time
+import argparse
 from pathlib import Path
+from crawl_engine import add_engine_arguments, engine_from_args
+from metrics import add_metrics_arguments, metrics_from_args
+from cpu_pool import CpuPool, add_worker_arguments, pool_from_args
+from data_io import save_json
+from link_extract import extract_links
 
 # Load original data
 def load_original_data():
@@ -103,103 +109,43 @@ ADDITIONAL_LOCATIONS = {
     }
 }
 
-def estimate_intensity(descripcion, nombre):
-    """
-    Estimate intensity ratings based on keywords in description
-    """
-    desc_lower = (descripcion + " " + nombre).lower()
-    
-    # Physical intensity (0-5)
-    fisica = 0
-    if any(word in desc_lower for word in ['nadar', 'snorkel', 'buceo', 'caminar', 'recorrer']):
-        fisica = 2
-    if any(word in desc_lower for word in ['tirolesa', 'zipline', 'atv', 'aventura', 'exploración', 'caverna']):
-        fisica = 3
-    if any(word in desc_lower for word in ['extrema', 'adrenalina', 'bungee', 'clavados', 'tiburón']):
-        fisica = 4
-    if any(word in desc_lower for word in ['museo', 'museo', 'restaurante', 'playa', 'descansar', 'relajación']):
-        fisica = min(fisica, 1)
-        
-    # Vertigo (0-5)
-    vertigo = 0
-    if any(word in desc_lower for word in ['altura', 'faro', 'torre', 'acantilado', 'mirador']):
-        vertigo = 2
-    if any(word in desc_lower for word in ['tirolesa', 'zipline', 'clavados']):
-        vertigo = 3
-    if any(word in desc_lower for word in ['bungee', 'columpio']):
-        vertigo = 4
-    if any(word in desc_lower for word in ['profund', 'submarino', 'buceo', 'cueva', 'cenote cerrado']):
-        vertigo = 1
-        
-    # Athletic (0-5)
-    atletico = 0
-    if any(word in desc_lower for word in ['caminar', 'nadar', 'snorkel']):
-        atletico = 1
-    if any(word in desc_lower for word in ['buceo', 'exploración', 'sendero', 'bicicleta']):
-        atletico = 2
-    if any(word in desc_lower for word in ['tirolesa', 'atv', 'aventura', 'circuito']):
-        atletico = 2
-    if any(word in desc_lower for word in ['extrema', 'adrenalina', 'certificado']):
-        atletico = 3
-    if any(word in desc_lower for word in ['tiburón toro', 'avanzado', 'profesional']):
-        atletico = 4
-        
-    # Accessibility
-    if fisica <= 1 and vertigo == 0 and atletico <= 1:
-        accesibilidad = "alta"
-    elif fisica >= 4 or vertigo >= 4 or atletico >= 3:
-        accesibilidad = "baja"
-    else:
-        accesibilidad = "media"
-    
-    return {
-        "intensidad": {
-            "fisica": fisica,
-            "vertigo": vertigo,
-            "atletico": atletico
-        },
-        "accesibilidad": accesibilidad
-    }
-
-async def search_and_extract_links(query, max_links=3):
+async def search_and_extract_links(query, engine, max_links=3):
     """
     Use crawl4ai to search and extract relevant links
     """
-    search_url = f"https://www.google.com/search?q={query}"
+    search_url = engine.search_url(query)
     
     try:
-        async with AsyncWebCrawler(verbose=False) as crawler:
-            result = await crawler.arun(
-                url=search_url,
-                bypass_cache=True,
-                word_count_threshold=10,
-                exclude_external_links=False
-            )
-            
-            # Extract links from result
-            # Note: In production, you'd parse the HTML more carefully
-            # For now, we'll return an empty list and manually add some
-            return []
+        result = await engine.fetch(
+            search_url,
+            bypass_cache=True,
+            word_count_threshold=10,
+            exclude_external_links=False
+        )
+        
+        # Extract links from result
+        document = str(result.markdown or "") or (result.html or "")
+        return extract_links(document, query, max_links)
     except Exception as e:
-        print(f"Error searching for {query}: {e}")
+        engine.record_failure(e, query=query)
         return []
 
-async def enrich_item(item, destino, categoria):
+async def enrich_item(item, destino, categoria, engine, cpu):
     """
     Enrich a single item with intensity ratings and links
     """
     print(f"Processing: {item.get('nombre', 'Unknown')}")
     
-    # Add intensity ratings
-    intensity_data = estimate_intensity(
-        item.get('descripcion', ''),
-        item.get('nombre', '')
-    )
+    # Add intensity ratings (computed in the process pool, batched with the other items)
+    started = time.perf_counter()
+    intensity_data = await cpu.submit("intensity", item)
+    engine.metrics.observe_task("intensity", time.perf_counter() - started)
     item.update(intensity_data)
     
     # Add links if we have a search query
     if 'search_query' in item:
-        links = await search_and_extract_links(item['search_query'])
+        links = await search_and_extract_links(item['search_query'], engine)
+        engine.metrics.observe_links(len(links))
         item['links'] = links
         del item['search_query']  # Remove search query from final data
     elif 'links' not in item:
@@ -207,23 +153,28 @@ async def enrich_item(item, destino, categoria):
     
     return item
 
-async def process_all_data():
+async def process_all_data(engine, cpu=None):
     """
     Main function to process and enrich all data
     """
+    metrics = engine.metrics
     print("Loading original data...")
-    original_data = load_original_data()
+    with metrics.stage("load"):
+        original_data = load_original_data()
     
     # Merge with additional locations
     print("Merging with additional researched locations...")
-    for destino, categories in ADDITIONAL_LOCATIONS.items():
-        if destino not in original_data:
-            original_data[destino] = {}
-        for categoria, items in categories.items():
-            original_data[destino][categoria] = items
+    with metrics.stage("merge"):
+        for destino, categories in ADDITIONAL_LOCATIONS.items():
+            if destino not in original_data:
+                original_data[destino] = {}
+            for categoria, items in categories.items():
+                original_data[destino][categoria] = items
     
-    # Enrich all items
+    # Enrich all items - items are updated in place, the engine bounds the crawling
     print("\nEnriching all items with intensity ratings...")
+    cpu = cpu or CpuPool(1)
+    tasks = []
     for destino, categories in original_data.items():
         for categoria, content in categories.items():
             if isinstance(content, dict) and 'platillos_típicos' in content:
@@ -231,16 +182,20 @@ async def process_all_data():
                 for subcategoria, items in content.items():
                     if isinstance(items, list):
                         for item in items:
-                            await enrich_item(item, destino, f"{categoria}_{subcategoria}")
+                            tasks.append(enrich_item(item, destino, f"{categoria}_{subcategoria}", engine, cpu))
             elif isinstance(content, list):
                 for item in content:
-                    await enrich_item(item, destino, categoria)
+                    tasks.append(enrich_item(item, destino, categoria, engine, cpu))
+    with metrics.stage("enrich"):
+        async with engine:
+            await asyncio.gather(*tasks)
+    engine.report()
     
     # Save enriched data
     output_path = Path("src/app/consolidated-data.json")
     print(f"\nSaving consolidated data to {output_path}...")
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(original_data, f, ensure_ascii=False, indent=2)
+    with metrics.stage("save"):
+        save_json(output_path, original_data)
     
     # Count items
     total_items = 0
@@ -257,6 +212,20 @@ async def process_all_data():
     print(f"📊 Data saved to: {output_path}")
     return original_data
 
+def main():
+    parser = argparse.ArgumentParser(description="Merge researched locations and add intensity ratings")
+    add_engine_arguments(parser)
+    add_metrics_arguments(parser)
+    add_worker_arguments(parser)
+    args = parser.parse_args()
+    metrics = metrics_from_args(args)
+    engine = engine_from_args(args, metrics)
+    with pool_from_args(args) as cpu:
+        asyncio.run(process_all_data(engine, cpu))
+    engine.failures.save(args.fetch_errors)
+    metrics.report()
+    metrics.write(args.metrics_json, args.metrics_prom)
+
 if __name__ == "__main__":
-    asyncio.run(process_all_data())
+    main()
 
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Timeouts, retries and circuit breaking for crawl fetches
+Every attempt gets a timeout and every fetch an overall deadline (retries and
+backoff included). Transient failures (timeouts, connection errors, 408/429/5xx)
+are retried with jittered exponential backoff, and a circuit breaker per host
+fails fetches fast once a host keeps erroring instead of piling more requests
+on it. A fetch that still fails raises FetchError, which the enrichment scripts
+turn into a per-place error record (.enrich_state/fetch-errors.json).
+
+    python crawl_and_enrich.py --fetch-timeout 10 --fetch-deadline 30 --retries 2
+    python fetch_policy.py --bench 200 --fail-rate 0.2 --hang-rate 0.05   # tail latency, policy on vs. off
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from pathlib import Path
+
+from data_io import save_json
+
+ERRORS_PATH = ".enrich_state/fetch-errors.json"
+TRANSIENT_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    """
+    A fetch that failed for good. kind: timeout, network, http, circuit_open or deadline
+    """
+
+    def __init__(self, kind, url, message="", status=None, attempts=0, elapsed=0.0):
+        super().__init__(f"{kind}: {message}" if message else kind)
+        self.kind = kind
+        self.url = url
+        self.message = message
+        self.status = status
+        self.attempts = attempts
+        self.elapsed = elapsed
+
+    @property
+    def transient(self):
+        return self.kind in ("timeout", "network") or self.status in TRANSIENT_STATUSES
+
+    def to_dict(self):
+        return {"kind": self.kind, "url": self.url, "message": self.message, "status": self.status,
+                "attempts": self.attempts, "elapsed_s": round(self.elapsed, 3)}
+
+
+def classify(url, exc):
+    """
+    FetchError for whatever a crawler raised
+    """
+    if isinstance(exc, FetchError):
+        return exc
+    if isinstance(exc, TimeoutError):
+        return FetchError("timeout", url, str(exc) or "timed out")
+    status = getattr(exc, "code", None)
+    if isinstance(status, int):
+        return FetchError("http", url, str(exc), status=status)
+    return FetchError("network", url, f"{type(exc).__name__}: {exc}")
+
+
+class CircuitBreaker:
+    """
+    Closed until `threshold` failures in a row, then open: calls fail fast for
+    `cooldown` seconds, after which one probe is let through (half-open). The
+    probe succeeding closes the breaker, failing opens it again.
+    threshold=0 never opens
+    """
+
+    def __init__(self, threshold=5, cooldown=30.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.opens = 0
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if self.probing else "open"
+
+    def allow(self):
+        if self.opened_at is None:
+            return True
+        if not self.probing and self.clock() - self.opened_at >= self.cooldown:
+            self.probing = True
+            return True
+        return False
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def failure(self):
+        self.failures += 1
+        if self.probing or (self.threshold and self.opened_at is None and self.failures >= self.threshold):
+            self.opened_at = self.clock()
+            self.opens += 1
+        self.probing = False
+
+
+class FetchPolicy:
+    """
+    timeout: seconds per attempt; deadline: seconds for the whole fetch, retries
+    and backoff included; run_deadline: seconds after which no new fetch starts.
+    None turns each of them off
+    """
+
+    def __init__(self, timeout=20.0, deadline=60.0, retries=2, backoff=0.5, max_backoff=8.0,
+                 breaker_threshold=5, breaker_cooldown=30.0, run_deadline=None, seed=None):
+        self.timeout = timeout
+        self.deadline = deadline
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.run_deadline = run_deadline
+        self.rng = random.Random(seed)
+        self.breakers = {}
+        self.started = time.monotonic()
+
+    def breaker(self, host):
+        if host not in self.breakers:
+            self.breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+        return self.breakers[host]
+
+    def run_expired(self):
+        return self.run_deadline is not None and time.monotonic() - self.started >= self.run_deadline
+
+    def attempt_timeout(self, fetch_deadline):
+        """
+        Seconds the next attempt may take: the per-attempt timeout, cut short by the fetch deadline
+        """
+        if fetch_deadline is None:
+            return self.timeout
+        remaining = max(0.0, fetch_deadline - time.monotonic())
+        return remaining if self.timeout is None else min(self.timeout, remaining)
+
+    def backoff_delay(self, attempt):
+        """
+        "Full jitter": uniform between 0 and the exponential step, so retries from
+        many places don't hit a recovering host in lockstep
+        """
+        return self.rng.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+
+    def open_breakers(self):
+        return {host: breaker.opens for host, breaker in self.breakers.items() if breaker.opens}
+
+
+class FailureLog:
+    """
+    One record per place whose crawl failed, instead of a line lost in the output
+    """
+
+    def __init__(self):
+        self.records = []
+        self._failed = set()
+
+    def record(self, error, **place):
+        entry = {**place, **error.to_dict(), "at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        self.records.append(entry)
+        self._failed.add((place.get("nombre"), place.get("destino")))
+        return entry
+
+    def failed(self, nombre, destino):
+        return (nombre, destino) in self._failed
+
+    def by_kind(self):
+        counts = {}
+        for entry in self.records:
+            counts[entry["kind"]] = counts.get(entry["kind"], 0) + 1
+        return counts
+
+    def save(self, path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        save_json(path, {"failures": len(self.records), "by_kind": self.by_kind(), "places": self.records})
+
+
+def add_policy_arguments(parser):
+    parser.add_argument("--fetch-timeout", type=float, default=20.0, help="seconds per fetch attempt (0 = none)")
+    parser.add_argument("--fetch-deadline", type=float, default=60.0,
+                        help="seconds per fetch, retries and backoff included (0 = none)")
+    parser.add_argument("--crawl-deadline", type=float, default=0,
+                        help="seconds into the run after which no new fetch starts (0 = none)")
+    parser.add_argument("--retries", type=int, default=2, help="retries for timeouts, connection errors, 429/5xx")
+    parser.add_argument("--retry-backoff", type=float, default=0.5, help="first backoff step in seconds (doubles)")
+    parser.add_argument("--breaker-threshold", type=int, default=5,
+                        help="failures in a row that open a host's circuit (0 = never)")
+    parser.add_argument("--breaker-cooldown", type=float, default=30.0, help="seconds a circuit stays open")
+    parser.add_argument("--fetch-errors", default=ERRORS_PATH, help="per-place records of failed crawls")
+
+
+def policy_from_args(args):
+    return FetchPolicy(
+        timeout=args.fetch_timeout or None,
+        deadline=args.fetch_deadline or None,
+        retries=args.retries,
+        backoff=args.retry_backoff,
+        breaker_threshold=args.breaker_threshold,
+        breaker_cooldown=args.breaker_cooldown,
+        run_deadline=args.crawl_deadline or None,
+    )
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def _bench_run(count, policy, port, concurrency):
+    from crawl_engine import CrawlEngine, StandInCrawler
+    engine = CrawlEngine(concurrency=concurrency, rate=0, crawler_factory=lambda: StandInCrawler(policy.timeout or 60),
+                         search_url=f"http://127.0.0.1:{port}/search?q={{query}}", policy=policy)
+
+    # Timed once a slot is free, so the numbers are per-fetch latency rather than queueing
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with slots:
+            started = time.perf_counter()
+            try:
+                await engine.fetch(engine.search_url(f"lugar {i}"))
+                ok = True
+            except Exception:  # FetchError, but run as a script this module's class isn't crawl_engine's
+                ok = False
+            return time.perf_counter() - started, ok
+
+    async with engine:
+        results = await asyncio.gather(*(one(i) for i in range(count)))
+    return results, engine
+
+
+def bench(args):
+    """
+    The same faulty stand-in server crawled with no policy (the old behaviour:
+    no timeout, no retries) and with the configured one
+    """
+    import threading
+    from standin_server import Faults, serve
+
+    faults = Faults(args.fail_rate, args.hang_rate, args.hang, args.reset_rate, seed=args.seed)
+    server = serve(0, faults=faults)
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"🧪 {args.bench} fetches against a stand-in that fails {args.fail_rate:.0%}, hangs {args.hang_rate:.0%} "
+          f"({args.hang:g}s) and resets {args.reset_rate:.0%} of requests; {args.concurrency} in flight")
+    runs = [
+        ("no policy", FetchPolicy(timeout=None, deadline=None, retries=0, breaker_threshold=0)),
+        ("policy", policy_from_args(args)),
+    ]
+    try:
+        for label, policy in runs:
+            faults.reset()
+            started = time.perf_counter()
+            results, engine = asyncio.run(_bench_run(args.bench, policy, port, args.concurrency))
+            elapsed = time.perf_counter() - started
+            latencies = [seconds for seconds, _ in results]
+            ok = sum(1 for _, success in results if success)
+            print(f"  {label:<10} ok {ok}/{len(results)}  p50 {percentile(latencies, 0.5):6.3f}s  "
+                  f"p95 {percentile(latencies, 0.95):6.3f}s  p99 {percentile(latencies, 0.99):6.3f}s  "
+                  f"max {max(latencies):6.3f}s  total {elapsed:6.1f}s  retries {engine.retries}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure crawl tail latency against a faulty stand-in server")
+    parser.add_argument("--bench", type=int, default=200, metavar="N", help="fetches per run")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--fail-rate", type=float, default=0.2, help="share of requests answered 503")
+    parser.add_argument("--hang-rate", type=float, default=0.05, help="share of requests that hang")
+    parser.add_argument("--hang", type=float, default=10.0, help="seconds a hanging request takes")
+    parser.add_argument("--reset-rate", type=float, default=0.05, help="share of connections dropped unanswered")
+    parser.add_argument("--seed", type=int, default=7)
+    add_policy_arguments(parser)
+    parser.set_defaults(fetch_timeout=2.0, fetch_deadline=8.0)
+    bench(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Pooled keep-alive HTTP client for the asset checks
+Standard library only: idle http.client connections are kept per host and
+reused, requests run in worker threads, and `concurrency`/`per_host` bound
+how many are in flight at once.
+
+    async with HttpPool(concurrency=16) as pool:
+        response = await pool.request("GET", url, headers={"If-None-Match": etag})
+"""
+
+import asyncio
+import http.client
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+from data_io import load_json, save_json
+
+USER_AGENT = "Mozilla/5.0 (VotacionFamilia enrichment)"
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+
+def conditional_headers(entry):
+    """
+    If-None-Match / If-Modified-Since from a URL's state entry of the previous run
+    """
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def load_state(path):
+    """
+    Per-URL state (status, ETag, Last-Modified...) kept between runs by the asset checks
+    """
+    return load_json(path) if Path(path).exists() else {}
+
+
+def save_state(path, state):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    save_json(path, state)
+
+
+class Response:
+    __slots__ = ("url", "status", "headers", "body", "elapsed", "redirects")
+
+    def __init__(self, url, status, headers, body, elapsed, redirects):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.elapsed = elapsed
+        self.redirects = redirects
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+
+class HttpPool:
+    def __init__(self, concurrency=16, per_host=4, timeout=15, max_redirects=5, max_body=20 * 1024 * 1024):
+        self.concurrency = max(1, concurrency)
+        self.per_host = max(1, per_host)
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self.max_body = max_body
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._limit = None
+        self._host_limits = {}
+        self.requests = 0
+        self.connections = 0
+
+    async def __aenter__(self):
+        self._limit = asyncio.Semaphore(self.concurrency)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+    def _connection(self, scheme, netloc):
+        with self._lock:
+            idle = self._idle.get((scheme, netloc))
+            if idle:
+                return idle.pop()
+            self.connections += 1
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(netloc, timeout=self.timeout)
+
+    def _release(self, scheme, netloc, connection):
+        with self._lock:
+            self._idle.setdefault((scheme, netloc), []).append(connection)
+
+    def _send(self, method, url, headers, body_limit=None):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"unsupported URL: {url}")
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+        headers = {"User-Agent": USER_AGENT, **(headers or {})}
+        # A pooled connection may have been closed by the server; retry once on a fresh one
+        for attempt in (1, 2):
+            connection = self._connection(parts.scheme, parts.netloc)
+            try:
+                connection.request(method, target, headers=headers)
+                response = connection.getresponse()
+                limit = body_limit or self.max_body
+                body = response.read(limit + 1)
+                truncated = len(body) > limit
+                if truncated and not body_limit:
+                    raise ValueError(f"body larger than {self.max_body} bytes: {url}")
+                response_headers = {k.lower(): v for k, v in response.getheaders()}
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                connection.close()
+                if attempt == 2:
+                    raise
+                continue
+            except Exception:
+                connection.close()
+                raise
+            if truncated or response.will_close or not response.isclosed():
+                connection.close()
+            else:
+                self._release(parts.scheme, parts.netloc, connection)
+            return response.status, response_headers, body[:limit]
+
+    def request_sync(self, method, url, headers=None, follow_redirects=True, body_limit=None):
+        started = time.perf_counter()
+        redirects = []
+        with self._lock:
+            self.requests += 1
+        status, response_headers, body = self._send(method, url, headers, body_limit)
+        while follow_redirects and status in REDIRECT_STATUSES and "location" in response_headers:
+            if len(redirects) >= self.max_redirects:
+                raise ValueError(f"too many redirects: {url}")
+            redirects.append((status, url))
+            url = urljoin(url, response_headers["location"])
+            if status == 303 and method != "HEAD":
+                method = "GET"
+            with self._lock:
+                self.requests += 1
+            status, response_headers, body = self._send(method, url, headers, body_limit)
+        return Response(url, status, response_headers, body, time.perf_counter() - started, redirects)
+
+    def _host_limit(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self._host_limits[host]
+
+    async def request(self, method, url, headers=None, follow_redirects=True, body_limit=None):
+        """
+        Run one request in a worker thread; raises on network errors, not on HTTP status.
+        With body_limit only that many bytes are read and the connection isn't reused
+        """
+        # Per host first: requests queued behind a busy host don't hold global slots
+        async with self._host_limit(url), self._limit:
+            return await asyncio.to_thread(self.request_sync, method, url, headers, follow_redirects, body_limit)
+
+    def stats(self):
+        return {"requests": self.requests, "connections": self.connections}
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Image pipeline for image_urls
+Checks every image URL concurrently through a pooled keep-alive client with
+conditional requests (ETag / Last-Modified kept in a state file), drops dead
+images, turns the rest into resized WebP thumbnails named after their content
+hash and rewrites image_urls to point at them. The original URLs are kept in
+image_sources so the next run can revalidate them.
+
+    python images.py                                   # check + thumbnails (needs Pillow)
+    python images.py --no-thumbnails                   # only drop dead images
+    python -m http.server 8000 -d /tmp/imgs            # local static server to test against
+"""
+
+import argparse
+import asyncio
+import hashlib
+import io
+import time
+from collections import Counter
+from pathlib import Path
+
+from data_io import is_ndjson, iter_ndjson, load_json, read_ndjson_metadata, write_ndjson
+from http_pool import HttpPool, conditional_headers, load_state, save_state
+from place_index import write_indexed_places
+
+THUMB_DIR = "public/images/places"
+THUMB_URL = "/images/places/"
+STATE_PATH = ".enrich_state/images.json"
+# Statuses that mean the image is gone for good; 5xx and network errors are retried next run
+DEAD_STATUSES = range(400, 500)
+
+
+def make_thumbnail(data, size, quality):
+    """
+    WebP bytes of `data` scaled to fit size x size
+    """
+    # Imported here so --no-thumbnails runs don't need Pillow
+    from PIL import Image
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        image.thumbnail((size, size))
+        out = io.BytesIO()
+        image.save(out, "WEBP", quality=quality, method=4)
+    return out.getvalue()
+
+
+def thumb_name(data):
+    return hashlib.sha256(data).hexdigest()[:16] + ".webp"
+
+
+class ImageProcessor:
+    def __init__(self, pool, state, thumb_dir=THUMB_DIR, thumb_url=THUMB_URL, size=640, quality=80,
+                 check_only=False):
+        self.pool = pool
+        self.state = state
+        self.thumb_dir = Path(thumb_dir)
+        self.thumb_url = thumb_url
+        self.size = size
+        self.quality = quality
+        self.check_only = check_only
+        self.outcomes = Counter()
+
+    def _thumb_ok(self, entry):
+        return self.check_only or (entry.get("thumb") and (self.thumb_dir / entry["thumb"]).exists())
+
+    async def process(self, url):
+        """
+        URL to use for `url` (its thumbnail once there is one), or None if it's dead
+        """
+        entry = self.state.get(url, {})
+        headers = conditional_headers(entry) if self._thumb_ok(entry) else {}
+        try:
+            response = await self.pool.request("GET", url, headers=headers)
+        except Exception as e:
+            # Transient: keep whatever we had
+            self.outcomes["error"] += 1
+            print(f"  ✗ {url}: {e}")
+            return self._current(url, entry)
+
+        entry = {**entry, "status": response.status, "checked_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        self.state[url] = entry
+        if response.status == 304:
+            self.outcomes["unchanged"] += 1
+            return self._current(url, entry)
+        if response.status in DEAD_STATUSES:
+            return self._dead(url, entry, f"HTTP {response.status}")
+        if not response.ok:
+            self.outcomes["error"] += 1
+            return self._current(url, entry)
+        if not response.headers.get("content-type", "").startswith("image/"):
+            return self._dead(url, entry, f"not an image ({response.headers.get('content-type')})")
+
+        entry.pop("dead", None)
+        entry["etag"] = response.headers.get("etag")
+        entry["last_modified"] = response.headers.get("last-modified")
+        if self.check_only:
+            self.outcomes["alive"] += 1
+            return self._current(url, entry)
+        try:
+            thumb = await asyncio.to_thread(make_thumbnail, response.body, self.size, self.quality)
+        except Exception as e:
+            return self._dead(url, entry, f"undecodable ({e})")
+        name = thumb_name(thumb)
+        path = self.thumb_dir / name
+        if not path.exists():
+            self.thumb_dir.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(name + ".tmp")
+            tmp.write_bytes(thumb)
+            tmp.replace(path)
+        entry["thumb"] = name
+        entry["bytes"] = {"original": len(response.body), "thumb": len(thumb)}
+        self.outcomes["thumbnailed"] += 1
+        return self.thumb_url + name
+
+    def _current(self, url, entry):
+        if entry.get("thumb") and (self.thumb_dir / entry["thumb"]).exists():
+            return self.thumb_url + entry["thumb"]
+        return url
+
+    def _dead(self, url, entry, reason):
+        entry["dead"] = reason
+        self.outcomes["dead"] += 1
+        print(f"  🗑️  {url}: {reason}")
+        return None
+
+    async def process_places(self, places):
+        """
+        Check each distinct URL once, then rewrite image_urls/image_sources in place
+        """
+        sources = {}
+        for place in places:
+            for url in place.get("image_sources") or place.get("image_urls") or []:
+                if url.startswith(("http://", "https://")):
+                    sources.setdefault(url, None)
+        print(f"🖼️  Checking {len(sources)} distinct image URLs")
+        results = await asyncio.gather(*(self.process(url) for url in sources))
+        resolved = dict(zip(sources, results))
+
+        for place in places:
+            originals = place.get("image_sources") or place.get("image_urls")
+            if not originals:
+                continue
+            alive = [url for url in originals if resolved.get(url, url) is not None]
+            rewritten = list(dict.fromkeys(resolved.get(url, url) for url in alive))
+            place["image_urls"] = rewritten
+            if "image_sources" in place or rewritten != alive:
+                place["image_sources"] = alive
+        return places
+
+    def report(self):
+        o = self.outcomes
+        print(f"\n🖼️  Images: {o['thumbnailed']} thumbnailed, {o['unchanged']} unchanged (304), "
+              f"{o['alive']} alive, {o['dead']} dead, {o['error']} errors; "
+              f"{self.pool.requests} requests over {self.pool.connections} connections")
+
+
+def add_image_arguments(parser):
+    parser.add_argument("--thumb-dir", default=THUMB_DIR, help="where WebP thumbnails are written")
+    parser.add_argument("--thumb-url", default=THUMB_URL, help="URL prefix the app serves thumb-dir under")
+    parser.add_argument("--thumb-size", type=int, default=640, help="max thumbnail width/height in px")
+    parser.add_argument("--thumb-quality", type=int, default=80)
+    parser.add_argument("--image-state", default=STATE_PATH, help="ETag/Last-Modified state file")
+    parser.add_argument("--image-concurrency", type=int, default=16)
+    parser.add_argument("--no-thumbnails", action="store_true", help="only drop dead images, no Pillow needed")
+
+
+async def run_images(places, args):
+    if not args.no_thumbnails:
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            raise SystemExit("❌ Thumbnails need Pillow (pip install Pillow), or run with --no-thumbnails")
+    state = load_state(args.image_state)
+    async with HttpPool(concurrency=args.image_concurrency) as pool:
+        processor = ImageProcessor(pool, state, args.thumb_dir, args.thumb_url, args.thumb_size,
+                                   args.thumb_quality, check_only=args.no_thumbnails)
+        places = await processor.process_places(places)
+    save_state(args.image_state, state)
+    processor.report()
+    return places
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate image_urls and replace them with WebP thumbnails")
+    parser.add_argument("--input", default="src/app/enriched-places.json")
+    parser.add_argument("--output", help="defaults to --input")
+    add_image_arguments(parser)
+    args = parser.parse_args()
+    output = args.output or args.input
+
+    if is_ndjson(args.input):
+        places = asyncio.run(run_images(list(iter_ndjson(args.input)), args))
+        write_ndjson(output, places, read_ndjson_metadata(args.input))
+    else:
+        data = load_json(args.input)
+        places = asyncio.run(run_images(data["places"], args))
+        write_indexed_places(output, places, data["metadata"])
+    print(f"📁 Updated: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Link extraction for crawled result pages
+One regex pass over the whole markdown/HTML document picks up markdown links
+and <a href> anchors; URLs are unwrapped from Google redirects, stripped of
+tracking parameters and deduplicated per registrable domain, then ranked by how
+well they match the place name.
+
+    python link_extract.py --cache-dir .crawl_cache          # batch over cached pages
+    python link_extract.py --bench                           # vs. the old line parser
+"""
+
+import argparse
+import gzip
+import html
+import json
+import re
+import time
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit, urlunsplit
+
+LINK_PATTERN = re.compile(
+    r'\[(?P<md_title>[^\]\n]{0,300})\]\((?P<md_url>https?://[^)\s]+)[^)]*\)'
+    r'|<a\s[^>]*?href\s*=\s*["\'](?P<a_url>[^"\']+)["\'][^>]*>(?P<a_title>.*?)</a>',
+    re.IGNORECASE | re.DOTALL,
+)
+TAG_PATTERN = re.compile(r'<[^>]+>')
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+TRACKING_PARAMS = {"gclid", "fbclid", "yclid", "msclkid", "igshid", "srsltid", "mc_cid", "mc_eid", "_ga", "ved", "usg", "ei"}
+TRACKING_PATTERN = re.compile(r'(?:^|&)(?:utm_|' + "|".join(sorted(TRACKING_PARAMS)) + r')', re.IGNORECASE)
+BLOCKED_DOMAINS = {"youtube.com", "youtu.be", "facebook.com", "gstatic.com", "googleusercontent.com"}
+# Second-level labels under which the registrable domain has three labels (no tldextract here)
+SECOND_LEVEL = {"com", "org", "net", "gob", "gov", "edu", "co", "ac"}
+STOPWORDS = {"de", "del", "la", "las", "el", "los", "en", "con", "y", "the", "and", "of", "to", "a"}
+
+
+def fold(text):
+    """
+    Lowercase and strip accents: "Cancún" -> "cancun"
+    """
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+@lru_cache(maxsize=4096)
+def registrable_domain(host):
+    labels = host.lower().rstrip(".").split(".")
+    if len(labels) >= 3 and labels[-2] in SECOND_LEVEL and len(labels[-1]) == 2:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+def _is_google(domain):
+    return domain.split(".")[0] == "google"
+
+
+def _normalize(url):
+    """
+    (canonical url, host, path) or None if it isn't an outbound http(s) link
+    """
+    if "&" in url:
+        url = html.unescape(url)
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if not host:
+        return None
+    # Google wraps results as /url?q=<target> (or url=<target>)
+    if parts.path in ("/url", "/imgres") and _is_google(registrable_domain(host)):
+        params = dict(parse_qsl(parts.query))
+        target = params.get("q") or params.get("url") or params.get("imgurl")
+        return _normalize(target) if target else None
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https"):
+        return None
+    query = parts.query
+    if query and TRACKING_PATTERN.search(query):
+        query = urlencode([
+            (key, value) for key, value in parse_qsl(query, keep_blank_values=True)
+            if key.lower() not in TRACKING_PARAMS and not key.lower().startswith("utm_")
+        ])
+    netloc = host if not parts.port else f"{host}:{parts.port}"
+    path = parts.path or "/"
+    return urlunsplit((scheme, netloc, path, query, "")), host, path
+
+
+def normalize_url(url):
+    """
+    Canonical form of a result URL, or None if it isn't an outbound http(s) link
+    """
+    normalized = _normalize(url)
+    return normalized[0] if normalized else None
+
+
+def name_tokens(text):
+    return {word for word in WORD_PATTERN.findall(fold(text)) if len(word) > 2 and word not in STOPWORDS}
+
+
+def iter_raw_links(document):
+    """
+    (title, url) for every markdown link and anchor, in document order
+    """
+    for match in LINK_PATTERN.finditer(document):
+        if match.group("md_url"):
+            yield match.group("md_title"), match.group("md_url")
+        else:
+            title = TAG_PATTERN.sub("", match.group("a_title"))
+            yield html.unescape(" ".join(title.split())), match.group("a_url")
+
+
+def extract_links(document, place_name, max_links=3):
+    """
+    Top `max_links` outbound links of a result page, one per registrable domain,
+    most relevant to `place_name` first
+    """
+    if not document:
+        return []
+    wanted = name_tokens(place_name)
+    candidates = {}
+    for position, (title, raw_url) in enumerate(iter_raw_links(document)):
+        normalized = _normalize(raw_url)
+        if normalized is None:
+            continue
+        url, host, path = normalized
+        domain = registrable_domain(host)
+        if domain in BLOCKED_DOMAINS or _is_google(domain):
+            continue
+        best = candidates.get(domain)
+        if best is not None and best[0] >= 1.0:
+            continue  # nothing can beat a full match; earlier position wins ties
+        haystack = name_tokens(title) | name_tokens(unquote(path).replace("-", " "))
+        score = len(wanted & haystack) / len(wanted) if wanted else 1.0
+        # Keep the best link per domain
+        if best is None or score > best[0]:
+            candidates[domain] = (score, position, title.strip(), url)
+
+    ranked = sorted(candidates.values(), key=lambda c: (-c[0], c[1]))
+    return [
+        {
+            "titulo": (title or urlsplit(url).hostname or url)[:100],
+            "url": url,
+            "descripcion": f"Información sobre {place_name}"
+        }
+        for _, _, title, url in ranked[:max_links]
+    ]
+
+
+def legacy_extract_links(markdown, place_name):
+    """
+    The original line-by-line parser from crawl_and_enrich, kept for --bench
+    """
+    links = []
+    for line in markdown.split('\n'):
+        if 'http' in line and not 'google.com' in line:
+            if '[' in line and '](' in line:
+                try:
+                    url = line.split('](')[1].split(')')[0]
+                    title = line.split('[')[1].split(']')[0]
+                    if url.startswith('http') and 'youtube' not in url and 'facebook' not in url:
+                        links.append({"titulo": title[:100], "url": url,
+                                      "descripcion": f"Información sobre {place_name}"})
+                except:
+                    pass
+    unique_links = []
+    seen_domains = set()
+    for link in links[:10]:
+        domain = link['url'].split('/')[2] if '/' in link['url'] else link['url']
+        if domain not in seen_domains and len(unique_links) < 3:
+            unique_links.append(link)
+            seen_domains.add(domain)
+    return unique_links
+
+
+def iter_cached_pages(cache_dir):
+    """
+    (query, document) for every page in the crawl cache
+    """
+    for path in sorted(Path(cache_dir).glob("*/*.json.gz")):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            page = json.load(f)
+        query = dict(parse_qsl(urlsplit(page["url"]).query)).get("q", "")
+        yield query, page.get("markdown") or page.get("html") or ""
+
+
+def extract_batch(pages, max_links=3):
+    """
+    Run extraction over many (place_name, document) pairs
+    """
+    return [(name, extract_links(document, name, max_links)) for name, document in pages]
+
+
+def synthetic_pages(count=2000):
+    """
+    Google-like result documents: redirect-wrapped links, tracking params,
+    duplicate domains and some noise around them
+    """
+    pages = []
+    for i in range(count):
+        name = f"Cenote Azul {i}"
+        lines = [f"# {name} Playa del Carmen", ""]
+        for j in range(25):
+            target = f"https://www.site{j % 12}.com/cenote-azul-{i}/guia?utm_source=google&id={j}"
+            lines.append(f"[{name} guía {j}](https://www.google.com/url?q={target}&sa=U&ved=x{j})")
+            lines.append(f"[Directo {j}](http://site{j % 7}.com.mx/info/{j}) texto de relleno " * 2)
+            lines.append("Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 3)
+        lines.append('<p><a href="https://blog.example.org/cenote">Blog del cenote</a></p>')
+        pages.append((name, "\n".join(lines)))
+    return pages
+
+
+def bench(pages, repeat=3):
+    results = {}
+    for label, parser in (("legacy", legacy_extract_links), ("extract_links", extract_links)):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            found = sum(len(parser(document, name)) for name, document in pages)
+            best = min(best, time.perf_counter() - start)
+        results[label] = {"seconds": round(best, 4), "pages_per_s": round(len(pages) / best), "links": found}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract ranked links from crawled pages")
+    parser.add_argument("--cache-dir", default=".crawl_cache")
+    parser.add_argument("--bench", action="store_true", help="compare against the old parser")
+    parser.add_argument("--pages", type=int, default=2000, help="synthetic pages for --bench without a cache")
+    args = parser.parse_args()
+
+    pages = list(iter_cached_pages(args.cache_dir)) if Path(args.cache_dir).exists() else []
+    if args.bench:
+        if not pages:
+            pages = synthetic_pages(args.pages)
+        print(f"🏁 Benchmarking {len(pages)} pages")
+        for label, result in bench(pages).items():
+            print(f"  {label:<14} {result['seconds']:8.4f}s  {result['pages_per_s']:>8} pages/s  {result['links']} links")
+        return
+
+    start = time.perf_counter()
+    results = extract_batch(pages)
+    elapsed = time.perf_counter() - start
+    for name, links in results:
+        print(f"  {len(links)} links  {name}")
+    print(f"\n✅ {sum(len(l) for _, l in results)} links from {len(results)} cached pages in {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
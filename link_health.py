@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Link health checker for links_utiles, links and REAL_LINKS
+Every distinct URL is checked once per run over pooled keep-alive connections:
+HEAD first, GET when the server won't answer HEAD properly, with
+If-None-Match/If-Modified-Since from the previous run so unchanged pages are a
+304. Status, redirect target and latency per URL are kept in a state file
+that doubles as the report.
+
+    python link_health.py                                  # check and report
+    python link_health.py --drop-dead --follow-redirects   # and fix the places file
+"""
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+from add_real_links import REAL_LINKS
+from data_io import is_ndjson, iter_ndjson, load_json, read_ndjson_metadata, write_ndjson
+from http_pool import HttpPool, conditional_headers, load_state, save_state
+from place_index import write_indexed_places
+
+STATE_PATH = ".enrich_state/links.json"
+LINK_FIELDS = ("links_utiles", "links")
+# Statuses that say the page is gone; 401/403/429 are usually bot blocking, not dead pages
+GONE_STATUSES = {404, 410, 451}
+PERMANENT_REDIRECTS = (301, 308)
+GET_BODY_LIMIT = 64 * 1024
+
+
+def iter_link_urls(places):
+    for place in places:
+        for field in LINK_FIELDS:
+            for link in place.get(field) or []:
+                if isinstance(link, dict) and link.get("url"):
+                    yield link["url"]
+
+
+def real_link_urls():
+    return [link["url"] for links in REAL_LINKS.values() for link in links]
+
+
+class LinkChecker:
+    def __init__(self, pool, state, dead_after=2):
+        self.pool = pool
+        self.state = state
+        self.dead_after = dead_after
+        self.outcomes = Counter()
+
+    async def _probe(self, url, headers):
+        response = await self.pool.request("HEAD", url, headers=headers)
+        # Plenty of servers reject or mishandle HEAD; ask again with a (truncated) GET
+        if response.status >= 400:
+            response = await self.pool.request("GET", url, headers=headers, body_limit=GET_BODY_LIMIT)
+            return response, "GET"
+        return response, "HEAD"
+
+    async def check(self, url):
+        previous = self.state.get(url, {})
+        headers = conditional_headers(previous) if previous.get("ok") else {}
+        entry = {**previous, "checked_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        started = time.perf_counter()
+        try:
+            response, method = await self._probe(url, headers)
+        except Exception as e:
+            entry.update(error=str(e) or type(e).__name__, latency_ms=round((time.perf_counter() - started) * 1000),
+                         failures=previous.get("failures", 0) + 1)
+            entry["ok"] = False
+            entry["dead"] = entry["failures"] >= self.dead_after
+            self.outcomes["error"] += 1
+            self.state[url] = entry
+            return entry
+
+        entry.pop("error", None)
+        entry.update(method=method, latency_ms=round(response.elapsed * 1000), failures=0)
+        if response.status == 304:
+            self.outcomes["unchanged"] += 1
+        else:
+            entry.update(
+                status=response.status,
+                final_url=response.url,
+                redirects=[status for status, _ in response.redirects],
+                etag=response.headers.get("etag"),
+                last_modified=response.headers.get("last-modified"),
+                ok=response.ok,
+                dead=response.status in GONE_STATUSES,
+            )
+            self.outcomes["dead" if entry["dead"] else "ok" if entry["ok"] else "failing"] += 1
+        self.state[url] = entry
+        return entry
+
+    async def check_all(self, urls):
+        urls = list(dict.fromkeys(urls))
+        print(f"🔗 Checking {len(urls)} distinct URLs")
+        await asyncio.gather(*(self.check(url) for url in urls))
+        return urls
+
+    def replacement(self, url, follow_redirects):
+        """
+        New URL for a link: None to drop it, the redirect target if it moved for good
+        """
+        entry = self.state.get(url, {})
+        if entry.get("dead"):
+            return None
+        redirects = entry.get("redirects") or []
+        if follow_redirects and redirects and all(s in PERMANENT_REDIRECTS for s in redirects) and entry.get("ok"):
+            return entry["final_url"]
+        return url
+
+    def fix_places(self, places, drop_dead=False, follow_redirects=False):
+        changed = Counter()
+        for place in places:
+            for field in LINK_FIELDS:
+                links = place.get(field)
+                if not links:
+                    continue
+                fixed = []
+                for link in links:
+                    url = link.get("url") if isinstance(link, dict) else None
+                    if not url:
+                        # Nothing was checked, so there's nothing to drop or redirect
+                        fixed.append(link)
+                        continue
+                    new = self.replacement(url, follow_redirects)
+                    if new is None and drop_dead:
+                        changed["dropped"] += 1
+                        continue
+                    if new and new != url:
+                        link = {**link, "url": new}
+                        changed["redirected"] += 1
+                    fixed.append(link)
+                place[field] = fixed
+        return changed
+
+    def report(self, urls):
+        o = self.outcomes
+        print(f"\n🔗 Links: {o['ok']} ok, {o['unchanged']} unchanged (304), {o['failing']} failing, "
+              f"{o['dead']} dead, {o['error']} errors; "
+              f"{self.pool.requests} requests over {self.pool.connections} connections")
+        for url in urls:
+            entry = self.state[url]
+            if entry.get("dead"):
+                print(f"  🪦 {url} ({entry.get('status') or entry.get('error')})")
+            elif entry.get("redirects"):
+                print(f"  ↪️  {url} → {entry['final_url']}")
+            elif url.startswith("http://"):
+                print(f"  🔓 {url} (plain http)")
+
+
+def add_link_check_arguments(parser):
+    parser.add_argument("--link-state", default=STATE_PATH, help="per-URL status/ETag state (and report)")
+    parser.add_argument("--link-concurrency", type=int, default=16)
+    parser.add_argument("--per-host", type=int, default=2, help="requests in flight per host")
+    parser.add_argument("--link-timeout", type=float, default=10)
+    parser.add_argument("--dead-after", type=int, default=2, help="consecutive network failures that count as dead")
+    parser.add_argument("--drop-dead", action="store_true", help="remove dead links from the places")
+    parser.add_argument("--follow-redirects", action="store_true", help="rewrite permanently redirected links")
+
+
+async def run_link_check(places, args, include_real_links=True):
+    state = load_state(args.link_state)
+    urls = list(iter_link_urls(places)) + (real_link_urls() if include_real_links else [])
+    async with HttpPool(concurrency=args.link_concurrency, per_host=args.per_host, timeout=args.link_timeout) as pool:
+        checker = LinkChecker(pool, state, args.dead_after)
+        urls = await checker.check_all(urls)
+    save_state(args.link_state, state)
+    checker.report(urls)
+    if args.drop_dead or args.follow_redirects:
+        changed = checker.fix_places(places, args.drop_dead, args.follow_redirects)
+        print(f"  ✓ {changed['dropped']} dead links dropped, {changed['redirected']} redirects followed")
+    dead_real = [url for url in real_link_urls() if state.get(url, {}).get("dead")] if include_real_links else []
+    for url in dead_real:
+        print(f"  ⚠️  REAL_LINKS entry is dead, fix it in add_real_links.py: {url}")
+    return places
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check links_utiles / REAL_LINKS and optionally fix dead ones")
+    parser.add_argument("--input", default="src/app/enriched-places.json")
+    parser.add_argument("--output", help="defaults to --input (only written with --drop-dead/--follow-redirects)")
+    parser.add_argument("--no-real-links", action="store_true", help="don't check add_real_links.REAL_LINKS")
+    add_link_check_arguments(parser)
+    args = parser.parse_args()
+    output = args.output or args.input
+    rewrite = args.drop_dead or args.follow_redirects
+
+    if is_ndjson(args.input):
+        places = asyncio.run(run_link_check(list(iter_ndjson(args.input)), args, not args.no_real_links))
+        if rewrite:
+            write_ndjson(output, places, read_ndjson_metadata(args.input))
+    else:
+        data = load_json(args.input)
+        places = asyncio.run(run_link_check(data["places"], args, not args.no_real_links))
+        if rewrite:
+            write_indexed_places(output, places, data["metadata"])
+    if rewrite:
+        print(f"📁 Updated: {output}")
+    print(f"📋 Link report: {args.link_state}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Run metrics for the enrichment scripts
+Per-stage wall/CPU time, crawl latency histograms by outcome (ok/error/empty),
+links found per place and peak RSS, exported as a JSON summary and optionally
+as Prometheus text. One stage can be run under cProfile.
+"""
+
+import cProfile
+import pstats
+import resource
+import sys
+import time
+from contextlib import contextmanager
+
+from data_io import save_json
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+LINK_BUCKETS = (0, 1, 2, 3, 5, 10)
+TASK_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+FETCH_OUTCOMES = ("ok", "error", "empty")
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.total += 1
+        self.sum += value
+
+    def cumulative(self):
+        running = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            running += count
+            yield bound, running
+
+    def summary(self):
+        return {
+            "count": self.total,
+            "sum": round(self.sum, 4),
+            "mean": round(self.sum / self.total, 4) if self.total else 0.0,
+            "buckets": {str(bound): count for bound, count in self.cumulative()},
+        }
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class Metrics:
+    def __init__(self, profile_stage=None, profile_out=None):
+        self.stages = {}
+        self.fetch_latency = {outcome: Histogram(LATENCY_BUCKETS) for outcome in FETCH_OUTCOMES}
+        self.links_per_place = Histogram(LINK_BUCKETS)
+        # Per-item latency of work submitted from concurrent tasks; those overlap, so they
+        # can't be stages (their wall times would add up past the run's)
+        self.task_latency = {}
+        self.profile_stage = profile_stage
+        self.profile_out = profile_out
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Time a block as stage `name`; repeated stages add up
+        """
+        profiler = cProfile.Profile() if name == self.profile_stage else None
+        wall, cpu = time.perf_counter(), time.process_time()
+        if profiler:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+                self._report_profile(profiler)
+            stats = self.stages.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0, "calls": 0})
+            stats["wall_s"] += time.perf_counter() - wall
+            stats["cpu_s"] += time.process_time() - cpu
+            stats["calls"] += 1
+
+    def _report_profile(self, profiler):
+        if self.profile_out:
+            profiler.dump_stats(self.profile_out)
+            print(f"🔬 Profile of '{self.profile_stage}' saved to {self.profile_out}")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
+
+    def observe_fetch(self, seconds, outcome):
+        self.fetch_latency[outcome].observe(seconds)
+
+    def observe_links(self, count):
+        self.links_per_place.observe(count)
+
+    def observe_task(self, kind, seconds):
+        self.task_latency.setdefault(kind, Histogram(TASK_BUCKETS)).observe(seconds)
+
+    def summary(self):
+        return {
+            "elapsed_s": round(time.perf_counter() - self.started, 3),
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": {
+                name: {"wall_s": round(s["wall_s"], 4), "cpu_s": round(s["cpu_s"], 4), "calls": s["calls"]}
+                for name, s in self.stages.items()
+            },
+            "fetch_latency_s": {outcome: h.summary() for outcome, h in self.fetch_latency.items()},
+            "links_per_place": self.links_per_place.summary(),
+            "task_latency_s": {kind: h.summary() for kind, h in self.task_latency.items()},
+        }
+
+    def to_prometheus(self, prefix="enrichment"):
+        lines = [
+            f"# TYPE {prefix}_stage_wall_seconds gauge",
+            *(f'{prefix}_stage_wall_seconds{{stage="{n}"}} {s["wall_s"]:.6f}' for n, s in self.stages.items()),
+            f"# TYPE {prefix}_stage_cpu_seconds gauge",
+            *(f'{prefix}_stage_cpu_seconds{{stage="{n}"}} {s["cpu_s"]:.6f}' for n, s in self.stages.items()),
+            f"# TYPE {prefix}_fetch_seconds histogram",
+        ]
+        for outcome, histogram in self.fetch_latency.items():
+            for bound, count in histogram.cumulative():
+                lines.append(f'{prefix}_fetch_seconds_bucket{{outcome="{outcome}",le="{bound}"}} {count}')
+            lines.append(f'{prefix}_fetch_seconds_sum{{outcome="{outcome}"}} {histogram.sum:.6f}')
+            lines.append(f'{prefix}_fetch_seconds_count{{outcome="{outcome}"}} {histogram.total}')
+        lines.append(f"# TYPE {prefix}_links_per_place histogram")
+        for bound, count in self.links_per_place.cumulative():
+            lines.append(f'{prefix}_links_per_place_bucket{{le="{bound}"}} {count}')
+        lines.append(f"{prefix}_links_per_place_sum {self.links_per_place.sum:g}")
+        lines.append(f"{prefix}_links_per_place_count {self.links_per_place.total}")
+        if self.task_latency:
+            lines.append(f"# TYPE {prefix}_task_seconds histogram")
+        for kind, histogram in self.task_latency.items():
+            for bound, count in histogram.cumulative():
+                lines.append(f'{prefix}_task_seconds_bucket{{kind="{kind}",le="{bound}"}} {count}')
+            lines.append(f'{prefix}_task_seconds_sum{{kind="{kind}"}} {histogram.sum:.6f}')
+            lines.append(f'{prefix}_task_seconds_count{{kind="{kind}"}} {histogram.total}')
+        lines.append(f"# TYPE {prefix}_peak_rss_megabytes gauge")
+        lines.append(f"{prefix}_peak_rss_megabytes {peak_rss_mb()}")
+        return "\n".join(lines) + "\n"
+
+    def report(self):
+        print("\n⏱️  Stages (wall / cpu):")
+        for name, s in self.stages.items():
+            print(f"  {name:<13} {s['wall_s']:8.3f}s / {s['cpu_s']:8.3f}s")
+        fetches = {outcome: h.total for outcome, h in self.fetch_latency.items()}
+        if any(fetches.values()):
+            ok = self.fetch_latency["ok"]
+            mean = f", mean ok {ok.sum / ok.total:.3f}s" if ok.total else ""
+            print(f"🌐 Fetches: {fetches['ok']} ok / {fetches['error']} error / {fetches['empty']} empty{mean}")
+        if self.links_per_place.total:
+            print(f"🔗 Links per place: {self.links_per_place.sum / self.links_per_place.total:.2f} avg")
+        for kind, histogram in self.task_latency.items():
+            print(f"🧮 {kind}: {histogram.total} items, mean latency {histogram.sum / histogram.total * 1000:.1f} ms")
+        print(f"🧠 Peak RSS: {peak_rss_mb()} MB")
+
+    def write(self, json_path=None, prom_path=None):
+        if json_path:
+            save_json(json_path, self.summary())
+            print(f"📈 Metrics written to {json_path}")
+        if prom_path:
+            with open(prom_path, 'w', encoding='utf-8') as f:
+                f.write(self.to_prometheus())
+            print(f"📈 Prometheus metrics written to {prom_path}")
+
+
+def add_metrics_arguments(parser):
+    parser.add_argument("--metrics-json", help="write a JSON metrics summary here")
+    parser.add_argument("--metrics-prom", help="write Prometheus text metrics here")
+    parser.add_argument("--profile-stage", help="run this stage under cProfile")
+    parser.add_argument("--profile-out", help="save the cProfile stats to this file")
+
+
+def metrics_from_args(args):
+    return Metrics(profile_stage=args.profile_stage, profile_out=args.profile_out)
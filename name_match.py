@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Fuzzy place-name index for merging curated sources
+Names are folded (accents, case, punctuation), stopwords dropped and tokens
+sorted, so "Snorkel con tortugas en Akumal" and "Snorkel con Tortugas en
+Akumal" share a key. Anything that isn't an exact key hit is scored (trigram
+Dice) only against entries that share one of its rarest trigrams, found through
+an inverted index, never against every key.
+
+    python name_match.py --bench 50000          # lookup speed on synthetic records
+"""
+
+import argparse
+import math
+import random
+import re
+import time
+from itertools import combinations
+
+from link_extract import STOPWORDS, fold
+
+NON_WORD = re.compile(r'[^a-z0-9]+')
+DEFAULT_THRESHOLD = 0.8
+# When every token of a curated name appears in the place name ("Playa Norte" in
+# "Playa Norte - Isla Mujeres") the match is strong but not exact
+CONTAINMENT_SCORE = 0.9
+MAX_SUBSET_TOKENS = 10
+
+
+def name_tokens(name):
+    return [t for t in NON_WORD.split(fold(name)) if t and t not in STOPWORDS]
+
+
+def normalize_name(name):
+    """
+    Folded, stopword-free, deduplicated, token-sorted key: "Playa Norte - Isla Mujeres" -> "isla mujeres norte playa"
+    """
+    return " ".join(sorted(set(name_tokens(name))))
+
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    def __init__(self, names=()):
+        self.names = []
+        self.gram_sets = []
+        self.exact = {}
+        self.postings = {}
+        for name in names:
+            self.add(name)
+
+    def add(self, name):
+        entry = len(self.names)
+        key = normalize_name(name)
+        grams = trigrams(key)
+        self.names.append(name)
+        self.gram_sets.append(grams)
+        self.exact.setdefault(key, entry)
+        for gram in grams:
+            self.postings.setdefault(gram, []).append(entry)
+        return entry
+
+    def _contained(self, tokens):
+        """
+        Entries whose every token (two or more) appears in `tokens`: exact lookups of the subsets
+        """
+        tokens = sorted(set(tokens))[:MAX_SUBSET_TOKENS]
+        for size in range(len(tokens) - 1, 1, -1):
+            for subset in combinations(tokens, size):
+                entry = self.exact.get(" ".join(subset))
+                if entry is not None:
+                    yield entry
+
+    def candidates(self, name, limit=5, min_score=0.5):
+        """
+        [(score, curated name)] best first, down to min_score; 1.0 is a normalized exact match
+        """
+        key = normalize_name(name)
+        if not key:
+            return []
+        exact = self.exact.get(key)
+        if exact is not None:
+            return [(1.0, self.names[exact])]
+
+        scored = {}
+        if CONTAINMENT_SCORE >= min_score:
+            scored = {entry: CONTAINMENT_SCORE for entry in self._contained(key.split())}
+        floor = min_score
+        if limit == 1 and scored:
+            # Only a better Dice score could still win
+            floor = max(min_score, CONTAINMENT_SCORE)
+
+        grams = trigrams(key)
+        # Prefix filter: an entry with Dice >= floor shares at least `needed` grams with
+        # the query, so it must share one of the len(grams) - needed + 1 rarest ones
+        needed = max(1, math.ceil(floor * len(grams) / (2 - floor)))
+        rarest = sorted(grams, key=lambda gram: len(self.postings.get(gram, ())))
+        pool = set()
+        for gram in rarest[:len(grams) - needed + 1]:
+            pool.update(self.postings.get(gram, ()))
+
+        for entry in pool:
+            entry_grams = self.gram_sets[entry]
+            score = 2 * len(grams & entry_grams) / (len(grams) + len(entry_grams))
+            if score >= floor and score > scored.get(entry, 0):
+                scored[entry] = score
+
+        ranked = sorted(scored.items(), key=lambda pair: (-pair[1], pair[0]))
+        return [(round(score, 3), self.names[entry]) for entry, score in ranked[:limit]]
+
+    def match(self, name, threshold=DEFAULT_THRESHOLD):
+        """
+        (curated name, score) of the best candidate at or above threshold, else None
+        """
+        found = self.candidates(name, limit=1, min_score=threshold)
+        if found:
+            return found[0][1], found[0][0]
+        return None
+
+    def __len__(self):
+        return len(self.names)
+
+
+def _synthetic_names(count, seed=7):
+    rng = random.Random(seed)
+    words = ("playa cenote arrecife parque museo ruinas punta isla laguna selva río tortugas "
+             "norte sur azul verde maya mirador faro club jardín caleta xel").split()
+    return [f"{rng.choice(words).title()} {rng.choice(words).title()} {rng.choice(words)} {i}" for i in range(count)]
+
+
+def bench(count, lookups=2000):
+    names = _synthetic_names(count)
+    start = time.perf_counter()
+    index = NameIndex(names)
+    built = time.perf_counter() - start
+    rng = random.Random(1)
+    queries = [fold(rng.choice(names)).upper() + " - Quintana Roo" for _ in range(lookups)]
+    start = time.perf_counter()
+    hits = sum(1 for q in queries if index.match(q))
+    elapsed = time.perf_counter() - start
+    print(f"🔎 {count:,} names indexed in {built:.2f}s; {lookups:,} fuzzy lookups in {elapsed:.2f}s "
+          f"({lookups / elapsed:,.0f}/s), {hits} matched")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzzy name index for curated sources")
+    parser.add_argument("--bench", type=int, metavar="N", help="index N synthetic names and time lookups")
+    parser.add_argument("names", nargs="*", help="look these up against REAL_LINKS")
+    args = parser.parse_args()
+    if args.bench:
+        bench(args.bench)
+        return
+    from add_real_links import REAL_LINKS
+    index = NameIndex(REAL_LINKS)
+    for name in args.names:
+        print(f"{name}: {index.candidates(name)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Enrichment pipeline runner
+Loads the data once, runs the enrichment steps of enrich_data.py,
+crawl_and_enrich.py, add_real_links.py and clean_descriptions.py as in-memory
+stages and writes the result once, atomically. By default that's the four
+scripts' steps (locations, intensity, requirements, crawl, links, clean);
+dedup, linkcheck, similar and images only run when asked for.
+
+    python pipeline.py                                  # the four scripts' steps
+    python pipeline.py --with dedup,similar             # ...plus some optional stages
+    python pipeline.py --stages requirements,links,clean --input src/app/enriched-places.json
+"""
+
+import argparse
+import asyncio
+from collections import Counter
+from datetime import date
+
+from add_real_links import REAL_LINKS, merge_real_links
+from crawl_and_enrich import current_links, scheduled_ids, search_and_extract_info
+from cpu_pool import add_worker_arguments, pool_from_args
+from crawl_scheduler import add_scheduler_arguments, save_state, scheduler_from_args
+from crawl_engine import add_engine_arguments, engine_from_args
+from metrics import add_metrics_arguments, metrics_from_args
+from dedup import add_dedup_arguments, dedup_places, deduplicator_from_args, load_source, print_report, save_report
+from data_io import (add_output_arguments, is_ndjson, iter_ndjson, iter_places, load_json, read_ndjson_metadata,
+                     write_ndjson)
+from enrich_data import ADDITIONAL_LOCATIONS
+from images import add_image_arguments, run_images
+from link_health import add_link_check_arguments, run_link_check
+from place_index import place_id, write_indexed_places
+from releases import add_release_arguments, release_metadata
+from shards import add_shard_arguments, write_shards
+from similar_places import add_similar_arguments, run_similar
+
+PLACE_KEYS_LAST = ("destino", "categoria")
+# What the four scripts did; the other stages are opt-in (--with / --stages)
+DEFAULT_STAGES = ("locations", "intensity", "requirements", "crawl", "links", "clean")
+
+
+class PipelineContext:
+    """
+    What a stage may need besides the places: CLI args, run metrics, a lazily
+    built crawl engine and the curated ADDITIONAL_LOCATIONS / REAL_LINKS
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.metadata = {}
+        self.nested = False
+        self.metrics = metrics_from_args(args)
+        self.cpu = pool_from_args(args)
+        self.locations = ADDITIONAL_LOCATIONS
+        self.real_links = REAL_LINKS
+
+    def engine(self):
+        return engine_from_args(self.args, self.metrics)
+
+
+def stage_locations(places, ctx):
+    """
+    Researched ADDITIONAL_LOCATIONS replace their categories (enrich_data merge)
+    """
+    if not ctx.nested:
+        print("  ↷ locations only applies to consolidated (nested) input")
+        return places
+    additions = {
+        (destino, categoria): [{**item, "destino": destino, "categoria": categoria} for item in items]
+        for destino, categories in ctx.locations.items()
+        for categoria, items in categories.items()
+    }
+    # Existing categories are replaced where they stand...
+    merged = []
+    for place in places:
+        key = (place["destino"], place["categoria"])
+        if key in additions:
+            merged.extend(additions.pop(key))
+            additions[key] = []
+            continue
+        merged.append(place)
+    # ...new ones go after the last place of their destino
+    for (destino, categoria), items in additions.items():
+        if not items:
+            continue
+        last = max((i for i, p in enumerate(merged) if p["destino"] == destino), default=len(merged) - 1)
+        merged[last + 1:last + 1] = items
+    return merged
+
+
+def stage_dedup(places, ctx):
+    """
+    Near-duplicates (within the input and against --dedup-sources) merged into one place each
+    """
+    sources = [(ctx.args.input, places)] + [(path, load_source(path)) for path in ctx.args.dedup_sources]
+    before = sum(len(source) for _, source in sources)
+    places, report = dedup_places(sources, deduplicator_from_args(ctx.args))
+    print_report(report, before, len(places))
+    save_report(ctx.args.dedup_report, report)
+    return places
+
+
+def stage_intensity(places, ctx):
+    for place, intensity in zip(places, ctx.cpu.map("intensity", places)):
+        place.update(intensity)
+        place.pop('search_query', None)
+        place.setdefault('links', [])
+    return places
+
+
+def stage_requirements(places, ctx):
+    for place, requisitos in zip(places, ctx.cpu.map("requirements", places)):
+        place['requisitos_especificos'] = requisitos
+        place.setdefault('links_utiles', place.get('links', []))
+    return places
+
+
+async def _crawl(places, engine, errors_path):
+    async with engine:
+        results = await asyncio.gather(*(
+            search_and_extract_info(place.get('nombre', 'Unknown'), place.get('destino', ''), engine)
+            for place in places
+        ))
+    engine.report()
+    engine.failures.save(errors_path)
+    return results
+
+
+def stage_crawl(places, ctx):
+    scheduler = scheduler_from_args(ctx.args)
+    ids = [place_id(place) for place in places]
+    # Like crawl_and_enrich: rank on the last output's links, which places not crawled (or failing) keep
+    current = current_links(ctx.args.output) if scheduler.budget is not None else {}
+    selected = scheduled_ids(scheduler, zip(ids, places), current)
+    scheduler.report(selected)
+    for pid, place in zip(ids, places):
+        if current.get(pid):
+            place['links_utiles'] = current[pid]
+    chosen = [(pid, place) for pid, place in zip(ids, places) if pid in selected]
+    results = asyncio.run(_crawl([place for _, place in chosen], ctx.engine(), ctx.args.fetch_errors))
+    for (pid, place), crawled in zip(chosen, results):
+        ctx.metrics.observe_links(len(crawled['links_utiles']))
+        if crawled['links_utiles']:
+            place['links_utiles'] = crawled['links_utiles']
+        # Failed crawls keep their priority for the next run
+        if not crawled['error']:
+            scheduler.mark(pid, len(place.get('links_utiles') or []))
+    for place in places:
+        place.setdefault('links_utiles', place.get('links', []))
+    save_state(ctx.args.schedule_state, scheduler.state)
+    return places
+
+
+def stage_links(places, ctx):
+    counter = Counter()
+    places = list(merge_real_links(places, counter, links=ctx.real_links))
+    print(f"  ✓ REAL_LINKS merged into {counter['added']} places")
+    return places
+
+
+def stage_clean(places, ctx):
+    cleaned = 0
+    for place, cleaned_desc in zip(places, ctx.cpu.map("clean", places)):
+        original = place.get('descripcion', '')
+        if original != cleaned_desc:
+            place['descripcion'] = cleaned_desc
+            cleaned += 1
+    print(f"  ✓ {cleaned} descriptions cleaned")
+    return places
+
+
+def stage_linkcheck(places, ctx):
+    return asyncio.run(run_link_check(places, ctx.args))
+
+
+def stage_similar(places, ctx):
+    return run_similar(places, ctx.args)
+
+
+def stage_images(places, ctx):
+    return asyncio.run(run_images(places, ctx.args))
+
+
+STAGES = {
+    "locations": stage_locations,
+    "dedup": stage_dedup,
+    "intensity": stage_intensity,
+    "requirements": stage_requirements,
+    "crawl": stage_crawl,
+    "links": stage_links,
+    "linkcheck": stage_linkcheck,
+    "clean": stage_clean,
+    "similar": stage_similar,
+    "images": stage_images,
+}
+
+
+def load_places(path, ctx):
+    """
+    Accepts consolidated JSON (nested), enriched JSON ({metadata, places}) or NDJSON
+    """
+    if is_ndjson(path):
+        ctx.metadata = read_ndjson_metadata(path)
+        return list(iter_ndjson(path))
+    data = load_json(path)
+    if isinstance(data.get("places"), list):
+        ctx.metadata = data.get("metadata", {})
+        return data["places"]
+    ctx.nested = True
+    ctx.metadata = {"enriched_at": date.today().isoformat(), "version": "2.0"}
+    return [{**item, "destino": destino, "categoria": categoria} for destino, categoria, item in iter_places(data)]
+
+
+def save_places(path, places, ctx):
+    if ctx.nested:
+        # Same key order crawl_and_enrich produces: destino/categoria after the enrichment
+        places = [{**{k: v for k, v in p.items() if k not in PLACE_KEYS_LAST},
+                   **{k: p[k] for k in PLACE_KEYS_LAST if k in p}} for p in places]
+    metadata = release_metadata(places, {**ctx.metadata, "total_places": len(places)}, ctx.args)
+    if is_ndjson(path):
+        write_ndjson(path, places, metadata)
+    else:
+        write_indexed_places(path, places, metadata, compact=ctx.args.compact, precompress=ctx.args.precompress)
+
+
+def parse_stages(value):
+    stages = [s.strip() for s in value.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown stage(s): {', '.join(unknown)} (choose from {', '.join(STAGES)})")
+    # Always run in pipeline order, whatever order they were listed in
+    return [s for s in STAGES if s in stages]
+
+
+def run(args):
+    ctx = PipelineContext(args)
+    metrics = ctx.metrics
+    print(f"🚀 Pipeline: {' → '.join(args.stages)}\n")
+
+    with metrics.stage("load"):
+        places = load_places(args.input, ctx)
+    print(f"📂 Loaded {len(places)} places from {args.input}")
+
+    with ctx.cpu:
+        for name in args.stages:
+            print(f"\n▶️  {name}")
+            with metrics.stage(name):
+                places = STAGES[name](places, ctx)
+            print(f"  ⏱️  {metrics.stages[name]['wall_s']:.3f}s")
+
+    with metrics.stage("save"):
+        save_places(args.output, places, ctx)
+        if args.shard_dir:
+            manifest = write_shards(places, args.shard_dir, args.shard_by, ctx.metadata, args.precompress)
+            print(f"🧩 {len(manifest['shards'])} shards written to {args.shard_dir}")
+
+    print(f"\n✅ Wrote {len(places)} places to {args.output}")
+    metrics.report()
+    metrics.write(args.metrics_json, args.metrics_prom)
+    return ctx
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the enrichment stages over one in-memory load")
+    parser.add_argument("--input", default="src/app/consolidated-data.json")
+    parser.add_argument("--output", default="src/app/enriched-places.json")
+    parser.add_argument("--stages", type=parse_stages, default=list(DEFAULT_STAGES),
+                        help=f"comma-separated subset of: {','.join(STAGES)} (default: {','.join(DEFAULT_STAGES)})")
+    parser.add_argument("--with", dest="extra_stages", type=parse_stages, default=[],
+                        help="optional stages added to --stages, e.g. dedup,linkcheck,similar,images")
+    parser.add_argument("--skip", type=parse_stages, default=[], help="stages to leave out")
+    add_engine_arguments(parser)
+    add_metrics_arguments(parser)
+    add_shard_arguments(parser)
+    add_image_arguments(parser)
+    add_link_check_arguments(parser)
+    add_worker_arguments(parser)
+    add_dedup_arguments(parser)
+    add_scheduler_arguments(parser)
+    add_similar_arguments(parser)
+    add_release_arguments(parser)
+    add_output_arguments(parser)
+    args = parser.parse_args()
+    args.stages = [s for s in STAGES if s in args.stages + args.extra_stages and s not in args.skip]
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Prebuilt query index for the voting app
+Stable place ids (the same slug vote-enhanced.js uses) plus inverted indexes
+by destino, categoria, accesibilidad, each intensidad level and the tokens of
+nombre/descripcion. Postings are positions in the places array of
+enriched-places.json, so filtering in the app is a lookup instead of a scan.
+
+Writers build it in the same pass that writes the places; to rebuild it for an
+existing file:
+
+    python place_index.py src/app/enriched-places.json
+"""
+
+import argparse
+import re
+import unicodedata
+from collections import Counter
+from pathlib import Path
+
+from data_io import load_json, save_json, write_places_json, write_precompressed
+from link_extract import name_tokens
+
+INDEX_VERSION = 1
+INDEXED_FIELDS = ("destino", "categoria", "accesibilidad")
+INTENSITY_FIELDS = ("fisica", "vertigo", "atletico")
+NON_ALNUM = re.compile(r'[^a-zA-Z0-9]+')
+
+
+def slug(text):
+    """
+    Same as the app's slug(): strip accents, non-alphanumerics to "-", lowercase
+    """
+    decomposed = unicodedata.normalize("NFD", text)
+    stripped = "".join(c for c in decomposed if not "\u0300" <= c <= "\u036f")
+    return NON_ALNUM.sub("-", stripped).strip("-").lower()
+
+
+def _template(place, key):
+    # What `${item[key]}` renders to in JS
+    if key not in place:
+        return "undefined"
+    value = place[key]
+    return "null" if value is None else str(value)
+
+
+def place_id(place):
+    return slug(f"{_template(place, 'destino')}_{_template(place, 'categoria')}_{_template(place, 'nombre')}")
+
+
+def index_path_for(path):
+    """
+    src/app/enriched-places.json -> src/app/enriched-places.index.json
+    """
+    path = Path(path)
+    return path.with_name(path.stem + ".index.json")
+
+
+class PlaceIndex:
+    def __init__(self):
+        self.ids = []
+        self.fields = {field: {} for field in INDEXED_FIELDS}
+        self.intensity = {field: {} for field in INTENSITY_FIELDS}
+        self.tokens = {}
+
+    def add(self, place):
+        position = len(self.ids)
+        self.ids.append(place_id(place))
+        for field, postings in self.fields.items():
+            value = place.get(field)
+            if isinstance(value, str):
+                postings.setdefault(value, []).append(position)
+        intensidad = place.get("intensidad")
+        if isinstance(intensidad, dict):
+            for field, postings in self.intensity.items():
+                level = intensidad.get(field)
+                if isinstance(level, int):
+                    postings.setdefault(str(level), []).append(position)
+        text = f"{place.get('nombre') or ''} {place.get('descripcion') or ''}"
+        for token in sorted(name_tokens(text)):
+            self.tokens.setdefault(token, []).append(position)
+
+    def feed(self, places):
+        """
+        Index places as they stream past on their way to a writer
+        """
+        for place in places:
+            self.add(place)
+            yield place
+
+    def duplicates(self):
+        return [place_id for place_id, count in Counter(self.ids).items() if count > 1]
+
+    def to_dict(self):
+        return {
+            "version": INDEX_VERSION,
+            "total_places": len(self.ids),
+            "ids": self.ids,
+            **{f"by_{field}": postings for field, postings in self.fields.items()},
+            "by_intensidad": {
+                field: dict(sorted(postings.items(), key=lambda kv: int(kv[0])))
+                for field, postings in self.intensity.items()
+            },
+            "tokens": dict(sorted(self.tokens.items())),
+        }
+
+    def save(self, path):
+        save_json(path, self.to_dict(), compact=True)
+
+
+def write_indexed_places(path, places, metadata, index_path=None, compact=False, precompress=()):
+    """
+    Write the places JSON and its index in one pass over the places, plus
+    .gz/.br variants of both when `precompress` names formats
+    """
+    index = PlaceIndex()
+    index_path = index_path or index_path_for(path)
+    write_places_json(path, index.feed(places), metadata, compact)
+    index.save(index_path)
+    if precompress:
+        for artifact in (path, index_path):
+            write_precompressed(artifact, precompress)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the query index for an enriched places file")
+    parser.add_argument("places", nargs="?", default="src/app/enriched-places.json")
+    parser.add_argument("--output", help="defaults to <places>.index.json")
+    args = parser.parse_args()
+
+    index = PlaceIndex()
+    for place in load_json(args.places)["places"]:
+        index.add(place)
+    output = args.output or index_path_for(args.places)
+    index.save(output)
+
+    print(f"✅ Indexed {len(index.ids)} places, {len(index.tokens)} tokens → {output}")
+    for duplicate in index.duplicates():
+        print(f"  ⚠️  Duplicate id: {duplicate}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Compact in-memory place store
+Places are kept as columns instead of one dict per place: destino, categoria
+and accesibilidad become small integer codes into interned tables, intensidad
+is packed three bytes per place, and each place's key order is a code into a
+shared table of key tuples. Anything that doesn't fit a column stays in a
+per-place extras dict, so conversion back to the JSON dicts is lossless.
+
+    python place_store.py                      # round-trip + memory/filter comparison
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from array import array
+
+from data_io import load_json
+
+INTENSITY_FIELDS = ("fisica", "vertigo", "atletico")
+CATEGORICAL_FIELDS = ("destino", "categoria", "accesibilidad")
+TEXT_LIST_FIELDS = ("requisitos_especificos",)
+
+
+class Categorical:
+    """
+    Interned value table: value <-> small integer code
+    """
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(sys.intern(value) if isinstance(value, str) else value)
+        return code
+
+    def __len__(self):
+        return len(self.values)
+
+
+def _packable_intensity(value):
+    return (
+        isinstance(value, dict)
+        and tuple(value) == INTENSITY_FIELDS
+        and all(type(v) is int and -128 <= v <= 127 for v in value.values())
+    )
+
+
+class PlaceStore:
+    """
+    Columnar storage for enriched places; store[i] rebuilds place i as a dict
+    """
+
+    __slots__ = ("nombre", "descripcion", "tables", "columns", "intensidad", "layouts", "layout", "extras")
+
+    def __init__(self):
+        self.nombre = []
+        self.descripcion = []
+        self.tables = {field: Categorical() for field in CATEGORICAL_FIELDS}
+        self.columns = {field: array('H') for field in CATEGORICAL_FIELDS}
+        self.intensidad = array('b')
+        # A layout is the place's keys in order, each flagged True if its value is in extras
+        self.layouts = Categorical()
+        self.layout = array('H')
+        self.extras = []
+
+    @classmethod
+    def from_places(cls, places):
+        store = cls()
+        for place in places:
+            store.append(place)
+        return store
+
+    @classmethod
+    def from_json(cls, data):
+        store = cls.from_places(data["places"])
+        return store, data.get("metadata", {})
+
+    def _columnar(self, key, value):
+        if key in ("nombre", "descripcion") or key in self.columns:
+            return isinstance(value, str)
+        return key == "intensidad" and _packable_intensity(value)
+
+    def append(self, place):
+        layout = []
+        extras = []
+        for key, value in place.items():
+            columnar = self._columnar(key, value)
+            layout.append((key, not columnar))
+            if columnar:
+                continue
+            if isinstance(value, list):
+                # Tuples are smaller than lists and JSON never produces them, so they mark "was a list"
+                value = tuple(sys.intern(v) if isinstance(v, str) else v for v in value)
+            extras.append(value)
+
+        def text(key):
+            value = place.get(key)
+            return value if isinstance(value, str) else ""
+
+        self.nombre.append(text("nombre"))
+        self.descripcion.append(text("descripcion"))
+        for field, column in self.columns.items():
+            value = place.get(field)
+            column.append(self.tables[field].code(value if isinstance(value, str) else None))
+        intensidad = place.get("intensidad")
+        self.intensidad.extend(intensidad.values() if _packable_intensity(intensidad) else (0, 0, 0))
+        self.layout.append(self.layouts.code(tuple(layout)))
+        self.extras.append(tuple(extras) if extras else ())
+
+    def _value(self, i, key, extra):
+        if extra is not None:
+            value = self.extras[i][extra]
+            return list(value) if isinstance(value, tuple) else value
+        if key == "nombre":
+            return self.nombre[i]
+        if key == "descripcion":
+            return self.descripcion[i]
+        if key in self.columns:
+            return self.tables[key].values[self.columns[key][i]]
+        return dict(zip(INTENSITY_FIELDS, self.intensidad[3 * i:3 * i + 3]))
+
+    def _fields(self, i):
+        """
+        (key, position in extras or None) for place i, in the original key order
+        """
+        position = 0
+        for key, extra in self.layouts.values[self.layout[i]]:
+            if extra:
+                yield key, position
+                position += 1
+            else:
+                yield key, None
+
+    def get(self, i, field, default=None):
+        for key, extra in self._fields(i):
+            if key == field:
+                return self._value(i, key, extra)
+        return default
+
+    def __len__(self):
+        return len(self.nombre)
+
+    def __getitem__(self, i):
+        """
+        The place as the original dict (same keys, same order)
+        """
+        return {key: self._value(i, key, extra) for key, extra in self._fields(i)}
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def to_json(self, metadata=None):
+        return {"metadata": metadata or {}, "places": list(self)}
+
+    def group(self, by):
+        """
+        {(value, ...): [indices]} in first-seen order, read off the code columns;
+        same keys as shards.group_places (a missing field groups under "")
+        """
+        tables = [self.tables[field] for field in by]
+        columns = [self.columns[field] for field in by]
+        # Code of None: the field was missing or not a string, so look at the place itself
+        odd = [table.codes.get(None) for table in tables]
+        groups = {}
+        for i in range(len(self)):
+            key = tuple(
+                self.get(i, field, "") if column[i] == none else table.values[column[i]]
+                for field, table, column, none in zip(by, tables, columns, odd)
+            )
+            groups.setdefault(key, []).append(i)
+        return groups
+
+    def filter(self, destino=None, categoria=None, accesibilidad=None, **max_levels):
+        """
+        Indices of places matching the categorical values and intensity ceilings,
+        e.g. filter(destino="Cozumel", max_fisica=2)
+        """
+        wanted = {}
+        for field, value in (("destino", destino), ("categoria", categoria), ("accesibilidad", accesibilidad)):
+            if value is not None:
+                code = self.tables[field].codes.get(value)
+                if code is None:
+                    return []
+                wanted[field] = code
+        ceilings = []
+        for name, ceiling in max_levels.items():
+            field = name[len("max_"):] if name.startswith("max_") else name
+            if field not in INTENSITY_FIELDS:
+                raise TypeError(f"unknown filter: {name}")
+            ceilings.append((INTENSITY_FIELDS.index(field), ceiling))
+
+        indices = range(len(self))
+        for field, code in wanted.items():
+            column = self.columns[field]
+            indices = [i for i in indices if column[i] == code]
+        packed = self.intensidad
+        for offset, ceiling in ceilings:
+            indices = [i for i in indices if packed[3 * i + offset] <= ceiling]
+        if ceilings:
+            # Places whose intensidad didn't fit the packed column take the slow path
+            odd = {code for code, layout in enumerate(self.layouts.values) if ("intensidad", True) in layout}
+            if odd:
+                indices = [i for i in indices if self.layout[i] not in odd or self._fits(i, ceilings)]
+        return list(indices)
+
+    def _fits(self, i, ceilings):
+        intensidad = self.get(i, "intensidad")
+        if not isinstance(intensidad, dict):
+            return True
+        return all(intensidad.get(INTENSITY_FIELDS[offset], 0) <= ceiling for offset, ceiling in ceilings)
+
+
+def _filter_dicts(places, destino=None, max_fisica=None):
+    return [
+        i for i, p in enumerate(places)
+        if (destino is None or p.get("destino") == destino)
+        and (max_fisica is None or p.get("intensidad", {}).get("fisica", 0) <= max_fisica)
+    ]
+
+
+def _traced(build):
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the columnar place store with plain dicts")
+    parser.add_argument("--input", default="src/app/enriched-places.json")
+    parser.add_argument("--scale", type=int, default=1, help="replicate the places N times")
+    args = parser.parse_args()
+
+    raw = load_json(args.input)
+    data = {"metadata": raw.get("metadata", {}), "places": raw["places"] * args.scale}
+    store, metadata = PlaceStore.from_json(data)
+    assert store.to_json(metadata) == data, "round trip changed the data"
+    print(f"✅ Lossless round trip for {len(store)} places")
+
+    # Retained memory of each representation, built from its own fresh parse
+    text = json.dumps(data["places"], ensure_ascii=False)
+    dicts, dict_bytes = _traced(lambda: json.loads(text))
+    compact, store_bytes = _traced(lambda: PlaceStore.from_places(json.loads(text)))
+    print(f"🧠 dicts: {dict_bytes / 1024:.0f} KB   store: {store_bytes / 1024:.0f} KB "
+          f"({100 * (1 - store_bytes / dict_bytes):.0f}% less)")
+
+    destino = store.tables["destino"].values[0]
+    start = time.perf_counter()
+    slow = _filter_dicts(dicts, destino, 2)
+    dict_time = time.perf_counter() - start
+    start = time.perf_counter()
+    fast = compact.filter(destino=destino, max_fisica=2)
+    store_time = time.perf_counter() - start
+    assert slow == fast
+    print(f"🔎 filter destino={destino!r} fisica<=2: dicts {dict_time * 1000:.2f} ms, "
+          f"store {store_time * 1000:.2f} ms ({len(fast)} places)")
+
+
+if __name__ == "__main__":
+    main()
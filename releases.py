@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Versioned dataset releases with per-place delta patches
+Each published places file gets a content-derived version (a hash of its
+places and metadata) in metadata.release. With a release directory the full
+release is kept there along with a delta against the previous one: places
+added, removed and changed (only the fields that changed), keyed by stable
+place id. Clients that have release A apply the deltas A → B → C instead of
+downloading C.
+
+    python pipeline.py --release-dir public/releases
+    python releases.py apply old.json public/releases/a1..b2.delta.json --output new.json
+    python releases.py diff old.json new.json --output patch.json
+    python releases.py log public/releases
+    python releases.py log public/releases --since a1          # deltas a client on a1 needs
+"""
+
+import argparse
+import hashlib
+import json
+import time
+from pathlib import Path
+
+from data_io import load_json, save_json
+from place_index import place_id
+
+MANIFEST = "manifest.json"
+RELEASE_KEYS = ("release", "previous_release")
+
+
+def _canonical(value):
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def content_version(places, metadata):
+    """
+    Same places and metadata (release stamps aside), same version
+    """
+    digest = hashlib.sha256()
+    digest.update(_canonical({k: v for k, v in metadata.items() if k not in RELEASE_KEYS}).encode("utf-8"))
+    for place in places:
+        digest.update(b"\n" + _canonical(place).encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def stable_ids(places):
+    """
+    place_id per place; repeats get ~2, ~3... in file order so every id is unique
+    """
+    seen = {}
+    ids = []
+    for place in places:
+        pid = place_id(place)
+        seen[pid] = seen.get(pid, 0) + 1
+        ids.append(pid if seen[pid] == 1 else f"{pid}~{seen[pid]}")
+    return ids
+
+
+def diff_places(old, new, old_metadata=None, new_metadata=None):
+    """
+    Delta that turns `old` into `new`: {added, removed, changed, order?, metadata?}
+    """
+    old_by_id = dict(zip(stable_ids(old), old))
+    new_ids = stable_ids(new)
+    new_by_id = dict(zip(new_ids, new))
+
+    delta = {
+        "added": {pid: place for pid, place in new_by_id.items() if pid not in old_by_id},
+        "removed": [pid for pid in old_by_id if pid not in new_by_id],
+        "changed": {},
+    }
+    for pid, place in new_by_id.items():
+        before = old_by_id.get(pid)
+        if before is None or before == place:
+            continue
+        change = {}
+        updated = {field: value for field, value in place.items() if before.get(field, object()) != value}
+        if updated:
+            change["set"] = updated
+        unset = [field for field in before if field not in place]
+        if unset:
+            change["unset"] = unset
+        # Field order is part of the file; only spell it out when it moved
+        if list(place) != _apply_fields(before, change):
+            change["fields"] = list(place)
+        delta["changed"][pid] = change
+
+    kept = [pid for pid in old_by_id if pid in new_by_id]
+    if kept + [pid for pid in new_ids if pid not in old_by_id] != new_ids:
+        delta["order"] = new_ids
+    if old_metadata is not None and new_metadata is not None:
+        strip = lambda m: {k: v for k, v in m.items() if k not in RELEASE_KEYS}
+        if strip(old_metadata) != strip(new_metadata):
+            delta["metadata"] = strip(new_metadata)
+    return delta
+
+
+def _apply_fields(place, change):
+    """
+    Field names after applying `change`, in the order apply_delta produces
+    """
+    fields = [field for field in place if field not in change.get("unset", ())]
+    return fields + [field for field in change.get("set", {}) if field not in fields]
+
+
+def apply_delta(places, delta, metadata=None):
+    """
+    New (places, metadata) with `delta` applied, release stamps dropped; places are not modified in place
+    """
+    ids = stable_ids(places)
+    by_id = dict(zip(ids, places))
+    removed = set(delta["removed"])
+    for pid, change in delta["changed"].items():
+        place = {k: v for k, v in by_id[pid].items() if k not in change.get("unset", ())}
+        place.update(change.get("set", {}))
+        if "fields" in change:
+            place = {field: place[field] for field in change["fields"]}
+        by_id[pid] = place
+    by_id.update(delta["added"])
+    order = delta.get("order") or [pid for pid in ids if pid not in removed] + list(delta["added"])
+    new_metadata = None
+    if metadata is not None:
+        new_metadata = delta.get("metadata") or {k: v for k, v in metadata.items() if k not in RELEASE_KEYS}
+    return [by_id[pid] for pid in order], new_metadata
+
+
+class ReleaseStore:
+    """
+    <dir>/manifest.json, the newest `keep` full releases (<version>.json) and every
+    delta (<from>..<to>.delta.json)
+    """
+
+    def __init__(self, path, keep=2):
+        self.path = Path(path)
+        self.keep = max(1, keep)
+        manifest = self.path / MANIFEST
+        self.manifest = load_json(manifest) if manifest.exists() else {"latest": None, "releases": []}
+
+    def latest(self):
+        """
+        (places, metadata) of the newest release, or None
+        """
+        version = self.manifest["latest"]
+        if not version or not (self.path / f"{version}.json").exists():
+            return None
+        data = load_json(self.path / f"{version}.json")
+        return data["places"], data["metadata"]
+
+    def publish(self, places, metadata):
+        """
+        Stamped metadata for `places`; a new release (+ delta) unless the content is unchanged
+        """
+        version = content_version(places, metadata)
+        parent = self.manifest["latest"]
+        stamped = {**{k: v for k, v in metadata.items() if k not in RELEASE_KEYS}, "release": version}
+        if parent == version:
+            previous = self._entry(version).get("parent")
+            return {**stamped, "previous_release": previous} if previous else stamped
+        if parent:
+            stamped["previous_release"] = parent
+        self.path.mkdir(parents=True, exist_ok=True)
+        full = self.path / f"{version}.json"
+        save_json(full, {"metadata": stamped, "places": places}, compact=True)
+        entry = {"version": version, "parent": parent, "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                 "places": len(places), "bytes": full.stat().st_size}
+
+        previous = self.latest()
+        if previous:
+            delta = {"from": parent, "to": version, **diff_places(previous[0], places, previous[1], stamped)}
+            delta_path = self.path / f"{parent}..{version}.delta.json"
+            save_json(delta_path, delta, compact=True)
+            entry.update(delta=delta_path.name, delta_bytes=delta_path.stat().st_size,
+                         added=len(delta["added"]), removed=len(delta["removed"]), changed=len(delta["changed"]))
+
+        self.manifest["releases"].append(entry)
+        self.manifest["latest"] = version
+        self._prune()
+        save_json(self.path / MANIFEST, self.manifest)
+        return stamped
+
+    def _entry(self, version):
+        return next((e for e in self.manifest["releases"] if e["version"] == version), {})
+
+    def _prune(self):
+        for entry in self.manifest["releases"][:-self.keep]:
+            full = self.path / f"{entry['version']}.json"
+            if full.exists():
+                full.unlink()
+
+    def chain(self, since):
+        """
+        Delta file names that take release `since` to the latest one
+        """
+        by_parent = {e["parent"]: e for e in self.manifest["releases"] if e.get("delta")}
+        chain, version = [], since
+        while version != self.manifest["latest"]:
+            entry = by_parent.get(version)
+            if entry is None:
+                raise ValueError(f"no delta chain from {since} to {self.manifest['latest']}")
+            chain.append(entry["delta"])
+            version = entry["version"]
+        return chain
+
+
+def add_release_arguments(parser):
+    parser.add_argument("--release-dir", help="keep versioned releases and deltas here")
+    parser.add_argument("--keep-releases", type=int, default=2, help="full releases kept (deltas are all kept)")
+
+
+def release_metadata(places, metadata, args):
+    """
+    metadata stamped with the content version, publishing a release when --release-dir is set
+    """
+    if args.release_dir:
+        stamped = ReleaseStore(args.release_dir, args.keep_releases).publish(places, metadata)
+        print(f"🏷️  Release {stamped['release']} (previous: {stamped.get('previous_release') or 'none'})")
+        return stamped
+    return {**{k: v for k, v in metadata.items() if k not in RELEASE_KEYS},
+            "release": content_version(places, metadata)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff, apply and list place releases")
+    sub = parser.add_subparsers(dest="command", required=True)
+    diff = sub.add_parser("diff", help="delta between two places files")
+    diff.add_argument("old")
+    diff.add_argument("new")
+    diff.add_argument("--output", required=True)
+    apply = sub.add_parser("apply", help="apply a chain of deltas to a places file")
+    apply.add_argument("base")
+    apply.add_argument("deltas", nargs="+")
+    apply.add_argument("--output", required=True)
+    log = sub.add_parser("log", help="list the releases in a release directory")
+    log.add_argument("release_dir")
+    log.add_argument("--since", metavar="VERSION", help="only print the deltas from VERSION to the latest")
+    args = parser.parse_args()
+
+    if args.command == "diff":
+        old, new = load_json(args.old), load_json(args.new)
+        delta = {"from": old["metadata"].get("release") or content_version(old["places"], old["metadata"]),
+                 "to": new["metadata"].get("release") or content_version(new["places"], new["metadata"]),
+                 **diff_places(old["places"], new["places"], old["metadata"], new["metadata"])}
+        save_json(args.output, delta, compact=True)
+        print(f"🩹 {len(delta['added'])} added, {len(delta['removed'])} removed, {len(delta['changed'])} changed "
+              f"→ {args.output} ({Path(args.output).stat().st_size / 1024:.1f} KB)")
+    elif args.command == "apply":
+        from place_index import write_indexed_places
+        data = load_json(args.base)
+        places, metadata = data["places"], data["metadata"]
+        version = metadata.get("release") or content_version(places, metadata)
+        for path in args.deltas:
+            delta = load_json(path)
+            if delta["from"] != version:
+                raise SystemExit(f"❌ {path} applies to release {delta['from']}, not {version}")
+            places, metadata = apply_delta(places, delta, metadata)
+            version = content_version(places, metadata)
+            if version != delta["to"]:
+                raise SystemExit(f"❌ {path} produced {version}, expected {delta['to']}")
+            metadata = {**metadata, "release": version, "previous_release": delta["from"]}
+        write_indexed_places(args.output, places, metadata)
+        print(f"✅ Release {version}: {len(places)} places → {args.output}")
+    else:
+        store = ReleaseStore(args.release_dir)
+        if args.since:
+            print("\n".join(str(store.path / name) for name in store.chain(args.since)))
+            return
+        for entry in store.manifest["releases"]:
+            delta = (f"+{entry['added']} -{entry['removed']} ~{entry['changed']} "
+                     f"({entry['delta_bytes'] / 1024:.1f} KB vs {entry['bytes'] / 1024:.0f} KB full)"
+                     if entry.get("delta") else "first release")
+            latest = " ← latest" if entry["version"] == store.manifest["latest"] else ""
+            print(f"  {entry['version']}  {entry['created_at']}  {entry['places']} places  {delta}{latest}")
+
+
+if __name__ == "__main__":
+    main()
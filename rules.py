@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Keyword rules for intensity ratings and specific requirements
+The rules are plain tables; every keyword they mention is compiled once into a
+single trie-shaped regex, so a place's text is scanned in one pass and the
+tables are then evaluated against the set of keywords found.
+"""
+
+import operator
+import re
+
+# Intensity: (dimension, op, value, keywords) applied in order.
+# "set" overwrites the dimension, "cap" lowers it to at most `value`.
+INTENSITY_RULES = (
+    ("fisica", "set", 2, ("nadar", "snorkel", "buceo", "caminar", "recorrer")),
+    ("fisica", "set", 3, ("tirolesa", "zipline", "atv", "aventura", "exploración", "caverna")),
+    ("fisica", "set", 4, ("extrema", "adrenalina", "bungee", "clavados", "tiburón")),
+    ("fisica", "cap", 1, ("museo", "restaurante", "playa", "descansar", "relajación")),
+    ("vertigo", "set", 2, ("altura", "faro", "torre", "acantilado", "mirador")),
+    ("vertigo", "set", 3, ("tirolesa", "zipline", "clavados")),
+    ("vertigo", "set", 4, ("bungee", "columpio")),
+    ("vertigo", "set", 1, ("profund", "submarino", "buceo", "cueva", "cenote cerrado")),
+    ("atletico", "set", 1, ("caminar", "nadar", "snorkel")),
+    ("atletico", "set", 2, ("buceo", "exploración", "sendero", "bicicleta")),
+    ("atletico", "set", 2, ("tirolesa", "atv", "aventura", "circuito")),
+    ("atletico", "set", 3, ("extrema", "adrenalina", "certificado")),
+    ("atletico", "set", 4, ("tiburón toro", "avanzado", "profesional")),
+)
+
+# Requirements: groups of (level, when, text); the first matching entry of each
+# group is added. `level` is None or (intensidad field, op, value). `when` is a
+# tuple of clauses that must all hold; a clause holds if any of its keywords is
+# in the description ("cat:" keywords are looked up in the categoria instead).
+REQUIREMENT_RULES = (
+    # Physical requirements
+    (
+        (("fisica", "==", 0), (), "👌 Puedes ir en pijama - cero esfuerzo físico"),
+        (("fisica", "==", 1), (), "🚶 Caminar tranquilo por 15-30 minutos"),
+        (("fisica", "==", 2), (("snorkel", "nadar"),), "🏊 Nadar/snorkelear por 30-60 minutos"),
+        (("fisica", "==", 2), (), "🚶 Caminar 1-2 horas, pausas incluidas"),
+        (("fisica", "==", 3), (("buceo",),), "🤿 Bucear 1-2 horas - certificación recomendada"),
+        (("fisica", "==", 3), (("cenote",),), "💦 Nadar en cenote 1-2 horas, escaleras/rocas"),
+        (("fisica", "==", 3), (), "🏃 Actividad física moderada 2-3 horas"),
+        (("fisica", "==", 4), (("tirolesa", "zipline"),), "🎢 Circuito de tirolesas - resistencia y fuerza en brazos"),
+        (("fisica", "==", 4), (("atv",),), "🏍️ Manejar ATV por terreno irregular - fuerza y coordinación"),
+        (("fisica", "==", 4), (), "💪 Alta energía - 3+ horas de actividad intensa"),
+        (None, (), "🔥 Nivel atlético extremo - entrenamiento previo recomendado"),
+    ),
+    # Emotion/Thrill requirements
+    (
+        (("vertigo", ">=", 3), (("tirolesa",),), "🎢 Alturas de 10-30 metros - no apto si tienes miedo a las alturas"),
+        (("vertigo", ">=", 3), (("acantilado", "mirador"),), "🏔️ Vistas desde acantilados - puede dar vértigo"),
+        (("vertigo", ">=", 3), (("faro",),), "🗼 Subir torre/faro - escaleras empinadas"),
+    ),
+    (
+        (None, (("clavados", "salto"),), "🤸 Plataformas de salto disponibles (opcionales)"),
+    ),
+    # Skill requirements
+    (
+        (("atletico", ">=", 3), (("buceo",), ("certificado", "certificación")), "📜 Certificación de buceo REQUERIDA"),
+        (("atletico", ">=", 3), (("buceo",),), "🤿 Experiencia en buceo recomendada"),
+        (("atletico", ">=", 3), (("tiburón",),), "🦈 Experiencia de snorkel/buceo + no tener miedo"),
+    ),
+    # Environmental
+    (
+        (None, (("sol", "cat:playa"),), "☀️ Protector solar obligatorio - sol caribeño fuerte"),
+    ),
+    (
+        (None, (("cenote",),), "🧊 Agua fría (22-25°C) - wetsuit opcional pero ayuda"),
+    ),
+    # Time requirements
+    (
+        (None, (("día completo", "full day"),), "🕐 Día completo (6-8 horas)"),
+        (None, (("medio día", "half day"),), "🕐 Medio día (3-4 horas)"),
+        (None, (("cat:tour",),), "🕐 Duración: 2-4 horas típicamente"),
+    ),
+    # Special requirements
+    (
+        (None, (("lancha", "barco", "ferry"),), "⛵ Transporte en lancha/barco incluido"),
+    ),
+    (
+        (None, (("reserva", "tour"),), "📅 Reservación anticipada recomendada"),
+    ),
+    # Food requirements
+    (
+        (None, (("cat:restaurante", "cat:gastronom"), ("picante", "habanero")),
+         "🌶️ Comida puede ser picante - pide 'sin chile' si prefieres"),
+    ),
+    (
+        (None, (("cat:restaurante", "cat:gastronom"), ("precio", "económico")),
+         "💰 Económico - menos de $200 MXN por persona"),
+        (None, (("cat:restaurante", "cat:gastronom"), ("gourmet", "exclusiv")),
+         "💰💰 Precio alto - $500+ MXN por persona"),
+    ),
+)
+
+OPERATORS = {"==": operator.eq, ">=": operator.ge}
+CATEGORY_PREFIX = "cat:"
+
+
+def _trie_pattern(words):
+    """
+    Regex for a set of words shaped like their trie; optional suffix groups are
+    greedy so each match is the longest keyword starting at that position
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node):
+        end = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if end:
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Finds every keyword occurring in a text (substring semantics, overlaps
+    included) with a single regex scan
+    """
+
+    def __init__(self, keywords):
+        self.keywords = frozenset(keywords)
+        self._search = re.compile(_trie_pattern(self.keywords)).search if self.keywords else None
+        # A match is the longest keyword at its position; shorter keywords that
+        # are prefixes of it start there too
+        self._implied = {
+            word: frozenset(other for other in self.keywords if word.startswith(other))
+            for word in self.keywords
+        }
+
+    def find(self, text):
+        found = set()
+        if self._search is None:
+            return found
+        search, implied = self._search, self._implied
+        # Resume one character after each hit so overlapping keywords are seen too
+        hit = search(text)
+        while hit is not None:
+            found |= implied[hit.group()]
+            hit = search(text, hit.start() + 1)
+        return found
+
+
+INTENSITY_MATCHER = KeywordMatcher(word for _, _, _, words in INTENSITY_RULES for word in words)
+_TERMS = {
+    term
+    for group in REQUIREMENT_RULES
+    for _, when, _ in group
+    for clause in when
+    for term in clause
+}
+_REQUIREMENTS = tuple(
+    tuple(
+        (level[0], OPERATORS[level[1]], level[2], tuple(frozenset(c) for c in when), text) if level
+        else (None, None, None, tuple(frozenset(c) for c in when), text)
+        for level, when, text in group
+    )
+    for group in REQUIREMENT_RULES
+)
+DESCRIPTION_MATCHER = KeywordMatcher(t for t in _TERMS if not t.startswith(CATEGORY_PREFIX))
+CATEGORY_MATCHER = KeywordMatcher(t[len(CATEGORY_PREFIX):] for t in _TERMS if t.startswith(CATEGORY_PREFIX))
+
+
+def estimate_intensity(descripcion, nombre):
+    """
+    Estimate intensity ratings based on keywords in description
+    """
+    found = INTENSITY_MATCHER.find((descripcion + " " + nombre).lower())
+    levels = {"fisica": 0, "vertigo": 0, "atletico": 0}
+    for dimension, op, value, words in INTENSITY_RULES:
+        if not found.isdisjoint(words):
+            levels[dimension] = value if op == "set" else min(levels[dimension], value)
+
+    fisica, vertigo, atletico = levels["fisica"], levels["vertigo"], levels["atletico"]
+    # Accessibility
+    if fisica <= 1 and vertigo == 0 and atletico <= 1:
+        accesibilidad = "alta"
+    elif fisica >= 4 or vertigo >= 4 or atletico >= 3:
+        accesibilidad = "baja"
+    else:
+        accesibilidad = "media"
+
+    return {
+        "intensidad": levels,
+        "accesibilidad": accesibilidad
+    }
+
+
+def generate_specific_requirements(item):
+    """
+    Generate SPECIFIC human-readable requirements based on the place
+    """
+    found = DESCRIPTION_MATCHER.find(item.get('descripcion', '').lower())
+    found.update(CATEGORY_PREFIX + word for word in CATEGORY_MATCHER.find(item.get('categoria', '').lower()))
+    intensidad = item.get('intensidad', {})
+
+    requisitos = []
+    for group in _REQUIREMENTS:
+        for field, op, value, when, text in group:
+            if field is not None and not op(intensidad.get(field, 0), value):
+                continue
+            for clause in when:
+                if found.isdisjoint(clause):
+                    break
+            else:
+                requisitos.append(text)
+                break
+    return requisitos
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Sharded output for lazy loading
+Splits the enriched places into one JSON shard per destino (optionally per
+destino + categoria) named after a hash of its content, plus a small
+manifest.json with counts and hashes. The client reads the manifest and fetches
+only the shard it needs; a shard whose places didn't change keeps its filename
+and stays cached.
+
+    python shards.py                                   # public/places/<destino>.<hash>.json
+    python shards.py --by destino,categoria --out-dir /tmp/shards
+"""
+
+import argparse
+import hashlib
+import json
+from pathlib import Path
+
+from data_io import (is_ndjson, iter_ndjson, load_json, parse_formats, precompressed_variants, read_ndjson_metadata,
+                     save_json, write_places_json, write_precompressed)
+from place_index import slug
+from place_store import PlaceStore
+
+MANIFEST = "manifest.json"
+SHARD_KEYS = ("destino", "categoria")
+MANIFEST_VERSION = 1
+
+
+def group_places(places, by):
+    """
+    {(destino[, categoria]): [places]} in first-seen order, places kept in input order
+    """
+    groups = {}
+    for place in places:
+        key = tuple(place.get(field, "") for field in by)
+        groups.setdefault(key, []).append(place)
+    return groups
+
+
+def shard_name(key, digest):
+    return "--".join(slug(str(value)) or "sin-nombre" for value in key) + f".{digest[:12]}.json"
+
+
+def _shard_bytes(shard_metadata, places, tmp):
+    # Render through the streaming writer so shards look like enriched-places.json
+    write_places_json(tmp, places, shard_metadata)
+    return tmp.read_bytes()
+
+
+def write_shards(places, out_dir, by=("destino",), metadata=None, precompress=()):
+    """
+    Write one content-hashed shard per group and the manifest; returns the manifest.
+    `places` is a list of dicts or a PlaceStore, whose groups come from its code
+    columns and are rebuilt as dicts one shard at a time. Unchanged shards aren't rewritten and stale ones from the previous manifest are removed.
+    `precompress` formats get .gz/.br variants of new shards and the manifest
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    previous = _load_manifest(out_dir)
+    scratch = out_dir / ".shard.tmp.json"
+
+    store = places if isinstance(places, PlaceStore) else None
+    groups = store.group(by) if store else group_places(places, by)
+    entries = []
+    for key, group in groups.items():
+        if store:
+            group = [store[i] for i in group]
+        # Only shard-local values go in the shard, so a new run date doesn't change every hash
+        shard_metadata = {**dict(zip(by, key)), "total_places": len(group)}
+        content = _shard_bytes(shard_metadata, group, scratch)
+        digest = hashlib.sha256(content).hexdigest()
+        path = out_dir / shard_name(key, digest)
+        if not path.exists():
+            scratch.replace(path)
+            if precompress:
+                write_precompressed(path, precompress)
+        entries.append({
+            **dict(zip(by, key)),
+            "file": path.name,
+            "sha256": digest,
+            "places": len(group),
+            "bytes": len(content),
+        })
+    scratch.unlink(missing_ok=True)
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "by": list(by),
+        "metadata": {**(metadata or {}), "total_places": sum(entry["places"] for entry in entries)},
+        "shards": entries,
+    }
+    save_json(out_dir / MANIFEST, manifest)
+    if precompress:
+        write_precompressed(out_dir / MANIFEST, precompress)
+
+    current = {entry["file"] for entry in entries}
+    for entry in previous.get("shards", []):
+        if entry["file"] not in current:
+            for stale in [out_dir / entry["file"], *precompressed_variants(out_dir / entry["file"])]:
+                stale.unlink(missing_ok=True)
+    return manifest
+
+
+def _load_manifest(out_dir):
+    path = Path(out_dir) / MANIFEST
+    if not path.exists():
+        return {}
+    try:
+        return load_json(path)
+    except json.JSONDecodeError:
+        return {}
+
+
+def parse_shard_keys(value):
+    keys = [k.strip() for k in value.split(",") if k.strip()]
+    if not keys or keys[0] != "destino" or any(k not in SHARD_KEYS for k in keys):
+        raise argparse.ArgumentTypeError("use 'destino' or 'destino,categoria'")
+    return tuple(keys)
+
+
+def add_shard_arguments(parser):
+    parser.add_argument("--shard-dir", help="also write per-destino shards + manifest.json here")
+    parser.add_argument("--shard-by", type=parse_shard_keys, default=("destino",),
+                        help="'destino' (default) or 'destino,categoria'")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Split enriched places into content-hashed shards")
+    parser.add_argument("--input", default="src/app/enriched-places.json")
+    parser.add_argument("--out-dir", default="public/places")
+    parser.add_argument("--by", type=parse_shard_keys, default=("destino",),
+                        help="'destino' (default) or 'destino,categoria'")
+    parser.add_argument("--precompress", type=parse_formats, default=(), help="also write .gz/.br variants: gzip,br")
+    args = parser.parse_args()
+
+    # Places are held as columns rather than one dict each while the shards are written
+    if is_ndjson(args.input):
+        metadata, store = read_ndjson_metadata(args.input), PlaceStore.from_places(iter_ndjson(args.input))
+    else:
+        store, metadata = PlaceStore.from_json(load_json(args.input))
+    previous = {entry["file"] for entry in _load_manifest(args.out_dir).get("shards", [])}
+
+    manifest = write_shards(store, args.out_dir, args.by, metadata, args.precompress)
+    for entry in manifest["shards"]:
+        status = "unchanged" if entry["file"] in previous else "written"
+        print(f"  {entry['file']:<60} {entry['places']:>5} places  {entry['bytes'] / 1024:8.1f} KB  {status}")
+    print(f"\n✅ {len(manifest['shards'])} shards + {MANIFEST} in {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+"Similar places" precomputation
+Every place becomes a TF-IDF vector over nombre, descripcion and
+requisitos_especificos (accents folded, Spanish stopwords dropped) plus its
+intensidad; the top-k cosine neighbours are found with blocked matrix products
+(one block of rows against the whole catalog at a time, so memory stays bounded)
+and written into each place as `similares`. Vocabularies larger than --dims are
+randomly projected down to --dims columns first. Needs NumPy, imported lazily.
+
+    python similar_places.py                              # src/app/enriched-places.json in place
+    python similar_places.py --bench 100000               # time it on a synthetic catalog
+"""
+
+import argparse
+import math
+import re
+import time
+from collections import Counter
+
+from data_io import is_ndjson, iter_ndjson, load_json, read_ndjson_metadata, write_ndjson
+from link_extract import STOPWORDS, fold
+from place_index import place_id, write_indexed_places
+
+NON_WORD = re.compile(r'[^a-z0-9]+')
+SPANISH_STOPWORDS = STOPWORDS | set(
+    "un una unos unas al lo le les se su sus que es son como mas muy sin sobre entre desde hasta "
+    "por para este esta estos estas ese esa eso donde cuando tambien pero o ni ya hay ser puede "
+    "todo toda todos todas cada otro otra hace tiene tienen solo mejor mejores".split()
+)
+INTENSITY_FIELDS = ("fisica", "vertigo", "atletico")
+MAX_INTENSITY = 5
+DEFAULT_TOP_K = 5
+DEFAULT_DIMS = 512
+DEFAULT_BLOCK = 256
+# Name tokens count this many times: two places called "Cenote ..." matter more than a shared word in the description
+NAME_WEIGHT = 2
+
+
+def tokens(text):
+    return [t for t in NON_WORD.split(fold(text or "")) if len(t) > 2 and t not in SPANISH_STOPWORDS]
+
+
+def place_terms(place):
+    requisitos = " ".join(r for r in place.get("requisitos_especificos") or [] if isinstance(r, str))
+    terms = Counter(tokens(place.get("nombre")) * NAME_WEIGHT)
+    terms.update(tokens(place.get("descripcion")))
+    terms.update(tokens(requisitos))
+    return terms
+
+
+def tfidf_matrix(places, min_df=2, max_df=0.5):
+    """
+    L2-normalized sublinear TF-IDF as CSR arrays (indptr, indices, data) and the vocabulary size.
+    Terms in fewer than min_df places can't make two places similar; terms in more than
+    max_df of them say nothing about which ones are
+    """
+    import numpy as np
+    docs = [place_terms(place) for place in places]
+    df = Counter(term for doc in docs for term in doc)
+    limit = max_df * len(docs)
+    vocabulary = {term: i for i, term in enumerate(t for t, n in df.items() if min_df <= n <= limit)}
+
+    indptr, indices, counts = [0], [], []
+    for doc in docs:
+        for term, count in doc.items():
+            column = vocabulary.get(term)
+            if column is not None:
+                indices.append(column)
+                counts.append(count)
+        indptr.append(len(indices))
+    indptr = np.asarray(indptr, dtype=np.int64)
+    indices = np.asarray(indices, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.float64)
+
+    doc_freq = np.bincount(indices, minlength=len(vocabulary))
+    idf = np.log((1 + len(docs)) / (1 + doc_freq)) + 1
+    data = (1 + np.log(counts)) * idf[indices] if len(counts) else counts
+    # Row norms through a cumulative sum, which (unlike reduceat) copes with empty rows
+    squares = np.concatenate([[0.0], np.cumsum(data ** 2)])
+    norms = np.sqrt(squares[indptr[1:]] - squares[indptr[:-1]])
+    row_nnz = np.diff(indptr)
+    norms[row_nnz == 0] = 1
+    data = data / np.repeat(norms, row_nnz)
+    return indptr, indices, data, len(vocabulary)
+
+
+def embed(indptr, indices, data, vocab_size, dims=DEFAULT_DIMS, block=DEFAULT_BLOCK * 16, seed=0):
+    """
+    Dense float32 rows: the TF-IDF itself when the vocabulary fits in `dims`
+    columns, a random sign projection of it otherwise (cosines are preserved
+    approximately), built `block` rows at a time
+    """
+    import numpy as np
+    rows = len(indptr) - 1
+    if vocab_size <= dims:
+        dense = np.zeros((rows, max(vocab_size, 1)), dtype=np.float32)
+        dense[np.repeat(np.arange(rows), np.diff(indptr)), indices] = data
+        return dense
+
+    rng = np.random.default_rng(seed)
+    projection = (rng.integers(0, 2, size=(vocab_size, dims), dtype=np.int8) * 2 - 1).astype(np.float32)
+    projection /= math.sqrt(dims)
+    dense = np.empty((rows, dims), dtype=np.float32)
+    for start in range(0, rows, block):
+        end = min(rows, start + block)
+        lo, hi = indptr[start], indptr[end]
+        contrib = projection[indices[lo:hi]] * data[lo:hi, None]
+        # Row sums through a cumulative sum: empty rows come out as zeros
+        cumulative = np.vstack([np.zeros((1, dims)), np.cumsum(contrib, axis=0, dtype=np.float64)])
+        offsets = indptr[start:end + 1] - lo
+        dense[start:end] = cumulative[offsets[1:]] - cumulative[offsets[:-1]]
+    return dense
+
+
+def place_vectors(places, dims=DEFAULT_DIMS, intensity_weight=0.3):
+    """
+    Unit rows: text part and intensidad (scaled to 0..1 and weighted) side by side
+    """
+    import numpy as np
+    text = embed(*tfidf_matrix(places), dims=dims)
+    norms = np.linalg.norm(text, axis=1, keepdims=True)
+    text /= np.where(norms > 0, norms, 1)
+    intensity = np.array([[(place.get("intensidad") or {}).get(field, 0) or 0 for field in INTENSITY_FIELDS]
+                          for place in places], dtype=np.float32).reshape(len(places), len(INTENSITY_FIELDS))
+    vectors = np.hstack([text, intensity * (intensity_weight / MAX_INTENSITY)])
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+def top_k_neighbours(vectors, k=DEFAULT_TOP_K, block=DEFAULT_BLOCK, groups=None):
+    """
+    (indices, scores), each rows x k, best first. One block x N similarity matrix
+    at a time; `groups` (an int per row) keeps neighbours within the same group
+    """
+    import numpy as np
+    rows = len(vectors)
+    k = min(k, rows - 1)
+    all_indices = np.empty((rows, max(k, 0)), dtype=np.int64)
+    all_scores = np.empty((rows, max(k, 0)), dtype=np.float32)
+    if k <= 0:
+        return all_indices, all_scores
+    for start in range(0, rows, block):
+        end = min(rows, start + block)
+        scores = vectors[start:end] @ vectors.T
+        scores[np.arange(end - start), np.arange(start, end)] = -np.inf
+        if groups is not None:
+            scores[groups[start:end, None] != groups[None, :]] = -np.inf
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1)
+        all_indices[start:end] = np.take_along_axis(best, order, axis=1)
+        all_scores[start:end] = np.take_along_axis(best_scores, order, axis=1)
+    return all_indices, all_scores
+
+
+def add_similar_places(places, k=DEFAULT_TOP_K, dims=DEFAULT_DIMS, block=DEFAULT_BLOCK,
+                       intensity_weight=0.3, same_destino=False):
+    """
+    Writes `similares` ([{id, score}], best first) into every place
+    """
+    import numpy as np
+    if not places:
+        return places
+    vectors = place_vectors(places, dims, intensity_weight)
+    groups = None
+    if same_destino:
+        codes = {}
+        groups = np.array([codes.setdefault(place.get("destino"), len(codes)) for place in places])
+    indices, scores = top_k_neighbours(vectors, k, block, groups)
+    ids = [place_id(place) for place in places]
+    for place, row_indices, row_scores in zip(places, indices, scores):
+        place["similares"] = [{"id": ids[j], "score": round(float(s), 3)}
+                              for j, s in zip(row_indices, row_scores) if s > 0]
+    return places
+
+
+def add_similar_arguments(parser):
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K, help="neighbours kept per place")
+    parser.add_argument("--dims", type=int, default=DEFAULT_DIMS,
+                        help="columns per vector; bigger vocabularies are randomly projected down")
+    parser.add_argument("--block-size", type=int, default=DEFAULT_BLOCK, help="rows per similarity block")
+    parser.add_argument("--intensity-weight", type=float, default=0.3, help="weight of intensidad vs. text")
+    parser.add_argument("--same-destino", action="store_true", help="only suggest places of the same destino")
+
+
+def run_similar(places, args):
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        raise SystemExit("❌ Similar places need NumPy (pip install numpy)")
+    return add_similar_places(places, args.top_k, args.dims, args.block_size, args.intensity_weight,
+                              args.same_destino)
+
+
+def bench(count, args):
+    from benchmark import synthetic_catalog
+    from data_io import iter_places
+    places = [{**item, "destino": destino, "categoria": categoria}
+              for destino, categoria, item in iter_places(synthetic_catalog(count))]
+    start = time.perf_counter()
+    run_similar(places, args)
+    elapsed = time.perf_counter() - start
+    print(f"🧭 {len(places):,} places: top-{args.top_k} neighbours in {elapsed:.1f}s "
+          f"({len(places) / elapsed:,.0f} places/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute similar places for the voting UI")
+    parser.add_argument("--input", default="src/app/enriched-places.json")
+    parser.add_argument("--output", help="defaults to --input")
+    parser.add_argument("--bench", type=int, metavar="N", help="time it on N synthetic places instead")
+    add_similar_arguments(parser)
+    args = parser.parse_args()
+    if args.bench:
+        bench(args.bench, args)
+        return
+    output = args.output or args.input
+
+    start = time.perf_counter()
+    if is_ndjson(args.input):
+        places = run_similar(list(iter_ndjson(args.input)), args)
+        write_ndjson(output, places, read_ndjson_metadata(args.input))
+    else:
+        data = load_json(args.input)
+        places = run_similar(data["places"], args)
+        write_indexed_places(output, places, data["metadata"])
+    print(f"🧭 Top-{args.top_k} similar places for {len(places)} places in {time.perf_counter() - start:.2f}s")
+    print(f"📁 Updated: {output}")
+
+
+if __name__ == "__main__":
+    main()
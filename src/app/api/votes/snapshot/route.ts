@@ -0,0 +1,30 @@
+import { readFile } from 'fs/promises';
+import path from 'path';
+import { NextResponse } from 'next/server';
+
+// Written offline by votes_aggregate.py
+const SNAPSHOT_PATH = process.env.VOTES_SNAPSHOT_PATH || path.join(process.cwd(), 'data', 'votes-snapshot.json');
+
+// GET /api/votes/snapshot - Latest aggregated results, no table scan
+export async function GET() {
+  try {
+    const snapshot = JSON.parse(await readFile(SNAPSHOT_PATH, 'utf-8'));
+
+    return NextResponse.json({
+      success: true,
+      ...snapshot,
+    });
+  } catch (error: any) {
+    if (error.code === 'ENOENT') {
+      return NextResponse.json(
+        { success: false, error: 'No snapshot yet, run votes_aggregate.py' },
+        { status: 404 }
+      );
+    }
+    console.error('Error reading votes snapshot:', error);
+    return NextResponse.json(
+      { success: false, error: error.message },
+      { status: 500 }
+    );
+  }
+}
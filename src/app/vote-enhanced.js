@@ -23,6 +23,8 @@ import {
   Waves
 } from "lucide-react";
 import ENHANCED_DATA from "./enriched-places.json";
+// Prebuilt by place_index.py: ids + inverted indexes (positions in ENHANCED_DATA.places)
+import PLACE_INDEX from "./enriched-places.index.json";
 
 const VOTERS = [
   "José", "Lolis", "Montse", "Marco", "Leo", "Caro", "Diego",
@@ -387,15 +389,33 @@ function LinksModal({ isOpen, onClose, item }) {
   );
 }
 
+// The index only applies if it was built from this same places array
+const INDEXED = Array.isArray(ENHANCED_DATA.places) && PLACE_INDEX.total_places === ENHANCED_DATA.places.length;
+
+const ACCESIBILIDAD_BY_INTENSIDAD = { "Fácil": "alta", "Moderado": "media", "Desafiante": "baja" };
+
+// Intersect posting lists (smallest first) instead of scanning every place
+function lookupItems({ destino, categoria, accesibilidad }) {
+  const lists = [];
+  if (destino) lists.push(PLACE_INDEX.by_destino[destino] || []);
+  if (categoria) lists.push(PLACE_INDEX.by_categoria[categoria] || []);
+  if (accesibilidad) lists.push(PLACE_INDEX.by_accesibilidad[accesibilidad] || []);
+  if (lists.length === 0) return ALL_ITEMS;
+  lists.sort((a, b) => a.length - b.length);
+  const [smallest, ...rest] = lists;
+  const others = rest.map(list => new Set(list));
+  return smallest.filter(i => others.every(set => set.has(i))).map(i => ALL_ITEMS[i]);
+}
+
 // FIXED: Flatten data properly - works with both enriched and consolidated formats
 function flattenData() {
   const out = [];
   
   // Check if we have enriched format (with places array)
   if (ENHANCED_DATA.places && Array.isArray(ENHANCED_DATA.places)) {
-    return ENHANCED_DATA.places.map(item => ({
+    return ENHANCED_DATA.places.map((item, i) => ({
       ...item,
-      id: slug(`${item.destino}_${item.categoria}_${item.nombre}`)
+      id: INDEXED ? PLACE_INDEX.ids[i] : slug(`${item.destino}_${item.categoria}_${item.nombre}`)
     }));
   }
   
@@ -487,16 +507,23 @@ export default function VotingAppEnhanced() {
   }, [votes]);
 
   const destinos = useMemo(() => {
-    const unique = new Set(ALL_ITEMS.map(it => it.destino));
+    const unique = INDEXED ? Object.keys(PLACE_INDEX.by_destino) : new Set(ALL_ITEMS.map(it => it.destino));
     return ["Todos", ...Array.from(unique).sort()];
   }, []);
 
   const categorias = useMemo(() => {
-    const unique = new Set(ALL_ITEMS.map(it => it.categoria));
+    const unique = INDEXED ? Object.keys(PLACE_INDEX.by_categoria) : new Set(ALL_ITEMS.map(it => it.categoria));
     return ["Todas", ...Array.from(unique).sort()];
   }, []);
 
   const filteredItems = useMemo(() => {
+    if (INDEXED) {
+      return lookupItems({
+        destino: filterDestino === "Todos" ? null : filterDestino,
+        categoria: filterCategoria === "Todas" ? null : filterCategoria,
+        accesibilidad: ACCESIBILIDAD_BY_INTENSIDAD[filterIntensidad] || null
+      });
+    }
     return ALL_ITEMS.filter(it => {
       const matchDestino = filterDestino === "Todos" || it.destino === filterDestino;
       const matchCategoria = filterCategoria === "Todas" || it.categoria === filterCategoria;
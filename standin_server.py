@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Google result pages we crawl
+Serves a small markdown page of fake results for any /search?q=... so the
+crawl engine can be exercised offline:
+
+    python standin_server.py --port 8765
+    python crawl_and_enrich.py --stand-in --search-url "http://127.0.0.1:8765/search?q={query}"
+
+A few extra paths mimic the link behaviours the health checker has to handle:
+/status/<code>, /redirect/<code>/<path>, /nohead/<path> (405 on HEAD) and
+/page/<path> (ETag + 304 on If-None-Match).
+
+With --fail-rate/--hang-rate/--reset-rate a share of the requests is answered
+503, held for --hang seconds, or dropped without an answer, to test the crawl's
+timeouts, retries and circuit breaker (see fetch_policy.py).
+"""
+
+import argparse
+import hashlib
+import random
+import socket
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+def fake_results(query, count=5):
+    words = [w for w in query.lower().split() if w.isalnum()][:3] or ["lugar"]
+    slug = "-".join(words)
+    lines = [f"# Resultados para {query}", ""]
+    for i in range(count):
+        lines.append(f"[{query} - Guía {i + 1}](https://www.guia{i}-caribe.example/{slug}/guia-{i + 1})")
+        lines.append(f"Información de viaje sobre {query}.")
+    lines.append("[Más resultados](https://www.google.com/search?q=more)")
+    return "\n".join(lines)
+
+
+class Faults:
+    """
+    Seeded fault injection, shared by all handler threads
+    """
+
+    def __init__(self, fail_rate=0.0, hang_rate=0.0, hang=10.0, reset_rate=0.0, seed=None):
+        self.fail_rate = fail_rate
+        self.hang_rate = hang_rate
+        self.hang = hang
+        self.reset_rate = reset_rate
+        self.seed = seed
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._rng = random.Random(self.seed)
+
+    def pick(self):
+        """
+        'fail', 'hang', 'reset' or None for a normal answer
+        """
+        with self._lock:
+            roll = self._rng.random()
+        for fault, rate in (("fail", self.fail_rate), ("hang", self.hang_rate), ("reset", self.reset_rate)):
+            if roll < rate:
+                return fault
+            roll -= rate
+        return None
+
+
+def make_handler(delay=0.0, faults=None):
+    class StandInHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self, status, body=b"", content_type="text/html; charset=utf-8", headers=None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            if self.command == "HEAD":
+                return
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # client gave up (crash/timeout tests)
+
+        def _link_paths(self, path):
+            """
+            True if `path` is one of the link-checker paths (and was answered)
+            """
+            parts = path.strip("/").split("/")
+            if parts[0] == "status" and len(parts) > 1 and parts[1].isdigit():
+                self._reply(int(parts[1]), f"status {parts[1]}".encode())
+            elif parts[0] == "redirect" and len(parts) > 1 and parts[1].isdigit():
+                self._reply(int(parts[1]), headers={"Location": "/" + "/".join(parts[2:])})
+            elif parts[0] == "nohead":
+                if self.command == "HEAD":
+                    self._reply(405)
+                else:
+                    self._reply(200, b"<html>ok</html>")
+            elif parts[0] == "page":
+                etag = '"' + hashlib.sha256(path.encode()).hexdigest()[:12] + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self._reply(304, headers={"ETag": etag})
+                else:
+                    self._reply(200, f"<html>{path}</html>".encode(), headers={"ETag": etag})
+            else:
+                return False
+            return True
+
+        def _inject(self):
+            """
+            True if a fault was injected instead of the normal answer
+            """
+            fault = faults.pick() if faults else None
+            if fault == "fail":
+                self._reply(503, b"injected failure", headers={"Retry-After": "1"})
+            elif fault == "reset":
+                # RST instead of FIN: the client sees a connection reset, not an empty answer
+                self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+                self.close_connection = True
+            elif fault == "hang":
+                time.sleep(faults.hang)
+                return False
+            return fault is not None
+
+        def do_GET(self):
+            if delay:
+                time.sleep(delay)
+            if self._inject():
+                return
+            path = urlsplit(self.path).path
+            if self._link_paths(path):
+                return
+            query = parse_qs(urlsplit(self.path).query).get("q", [""])[0]
+            self._reply(200, fake_results(query).encode("utf-8"), "text/markdown; charset=utf-8")
+
+        do_HEAD = do_GET
+
+        def log_message(self, *args):
+            pass
+
+    return StandInHandler
+
+
+def serve(port=8765, delay=0.0, faults=None):
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(delay, faults))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for crawled search pages")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before answering")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered 503")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="share of requests held for --hang seconds")
+    parser.add_argument("--hang", type=float, default=10.0)
+    parser.add_argument("--reset-rate", type=float, default=0.0, help="share of connections dropped unanswered")
+    parser.add_argument("--seed", type=int, help="seed for the injected faults")
+    args = parser.parse_args()
+
+    faults = None
+    if args.fail_rate or args.hang_rate or args.reset_rate:
+        faults = Faults(args.fail_rate, args.hang_rate, args.hang, args.reset_rate, args.seed)
+    server = serve(args.port, args.delay, faults)
+    print(f"🧪 Stand-in search server on http://127.0.0.1:{args.port}/search?q={{query}}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
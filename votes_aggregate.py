@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Offline vote aggregation
+Streams a votes export (CSV with id,voter_name,place_id,created_at, a SQLite
+copy of the votes table, or Postgres when psycopg is installed), joins it with
+enriched-places.json and writes a versioned snapshot: votes per voter, counts
+per place / destino / categoria / accesibilidad and voter overlap, ready to be
+served as-is.
+
+Reruns are incremental: only rows with an id above the snapshot's high-water
+mark are read. Votes can also be removed, so if the source has fewer older rows
+than the snapshot read (duplicates included), the snapshot is rebuilt from scratch.
+
+    python votes_aggregate.py --source votes.csv
+    python votes_aggregate.py --source votes.sqlite --full
+    python votes_aggregate.py --source postgresql://user@host/db
+"""
+
+import argparse
+import csv
+import sqlite3
+import time
+from pathlib import Path
+
+from data_io import load_json, save_json
+from place_index import index_path_for, place_id
+
+SNAPSHOT_PATH = "data/votes-snapshot.json"
+SNAPSHOT_SCHEMA = 2
+GROUP_FIELDS = ("destino", "categoria", "accesibilidad")
+UNKNOWN = "(desconocido)"
+
+
+def load_place_lookup(places_path):
+    """
+    place id -> place, using the prebuilt index ids when they match the file
+    """
+    places = load_json(places_path)["places"]
+    index_path = index_path_for(places_path)
+    ids = None
+    if index_path.exists():
+        index = load_json(index_path)
+        if index.get("total_places") == len(places):
+            ids = index["ids"]
+    ids = ids or [place_id(place) for place in places]
+    return dict(zip(ids, places))
+
+
+class VoteSource:
+    """
+    Vote rows as (id, voter_name, place_id) in id order, from CSV, SQLite or Postgres
+    """
+
+    def __init__(self, source):
+        self.source = source
+
+    @property
+    def kind(self):
+        if self.source.startswith(("postgres://", "postgresql://")):
+            return "postgres"
+        return "csv" if Path(self.source).suffix == ".csv" else "sqlite"
+
+    def rows(self, after=0):
+        """
+        Rows with id > after
+        """
+        if self.kind == "csv":
+            yield from (row for row in self._csv_rows() if row[0] > after)
+        else:
+            yield from self._query("SELECT id, voter_name, place_id FROM votes WHERE id > {p} ORDER BY id", (after,))
+
+    def count_upto(self, upto):
+        """
+        How many rows with id <= upto still exist
+        """
+        if self.kind == "csv":
+            return sum(1 for row in self._csv_rows() if row[0] <= upto)
+        return next(iter(self._query("SELECT COUNT(*) FROM votes WHERE id <= {p}", (upto,))))[0]
+
+    def _csv_rows(self):
+        with open(self.source, newline='', encoding='utf-8') as f:
+            for record in csv.DictReader(f):
+                yield int(record["id"]), record["voter_name"], record["place_id"]
+
+    def _query(self, sql, params):
+        if self.kind == "postgres":
+            # Imported here so CSV/SQLite runs don't need a Postgres driver
+            import psycopg
+            with psycopg.connect(self.source) as connection, connection.cursor() as cursor:
+                cursor.execute(sql.format(p="%s"), params)
+                yield from cursor
+        else:
+            connection = sqlite3.connect(f"file:{self.source}?mode=ro", uri=True)
+            try:
+                yield from connection.execute(sql.format(p="?"), params)
+            finally:
+                connection.close()
+
+
+class VoteAggregate:
+    def __init__(self, places):
+        self.places = places
+        self.votes = {}
+        self.voters_by_place = {}
+        self.counts = {}
+        self.groups = {field: {} for field in GROUP_FIELDS}
+        self.unknown = {}
+        self.overlap = {}
+        self.total = 0
+        # Source rows read, duplicate (voter, place) rows included: what count_upto compares against
+        self.rows = 0
+        self.high_water_mark = 0
+        self.snapshot = 0
+
+    @classmethod
+    def from_snapshot(cls, snapshot, places):
+        aggregate = cls(places)
+        aggregate.snapshot = snapshot["snapshot"]
+        aggregate.high_water_mark = snapshot["high_water_mark"]
+        aggregate.rows = snapshot["source_rows"]
+        for voter, place_ids in snapshot["votes"].items():
+            for pid in place_ids:
+                aggregate.add(voter, pid)
+        return aggregate
+
+    def add(self, voter, pid, row_id=0):
+        """
+        One vote; row_id is the source row's id (0 when replaying a snapshot's votes)
+        """
+        if row_id:
+            self.high_water_mark = max(self.high_water_mark, row_id)
+            self.rows += 1
+        voted = self.votes.setdefault(voter, [])
+        voters = self.voters_by_place.setdefault(pid, [])
+        if voter in voters:
+            return False  # same (voter, place) twice; the table forbids it anyway
+        # Overlap: every earlier voter of this place now shares one more place with `voter`
+        for other in voters:
+            row = self.overlap.setdefault(voter, {})
+            row[other] = row.get(other, 0) + 1
+            row = self.overlap.setdefault(other, {})
+            row[voter] = row.get(voter, 0) + 1
+        voted.append(pid)
+        voters.append(voter)
+        self.counts[pid] = self.counts.get(pid, 0) + 1
+        place = self.places.get(pid)
+        if place is None:
+            self.unknown[pid] = self.unknown.get(pid, 0) + 1
+        for field, counts in self.groups.items():
+            value = place.get(field) or UNKNOWN if place else UNKNOWN
+            counts[value] = counts.get(value, 0) + 1
+        self.total += 1
+        return True
+
+    def to_dict(self):
+        def ranked(counts):
+            return dict(sorted(counts.items(), key=lambda kv: (-kv[1], kv[0])))
+
+        return {
+            "schema": SNAPSHOT_SCHEMA,
+            "snapshot": self.snapshot,
+            "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "high_water_mark": self.high_water_mark,
+            "source_rows": self.rows,
+            "total_votes": self.total,
+            "votes": self.votes,
+            "counts": ranked(self.counts),
+            **{f"by_{field}": ranked(counts) for field, counts in self.groups.items()},
+            "unknown_places": ranked(self.unknown),
+            "voter_overlap": {voter: ranked(row) for voter, row in sorted(self.overlap.items())},
+        }
+
+
+def aggregate_votes(source, places_path, snapshot_path=SNAPSHOT_PATH, full=False):
+    """
+    Update (or rebuild) the snapshot from `source`; returns (snapshot dict, new rows, rebuilt)
+    """
+    places = load_place_lookup(places_path)
+    votes = VoteSource(source)
+    previous = load_json(snapshot_path) if Path(snapshot_path).exists() and not full else None
+    if previous and previous.get("schema") != SNAPSHOT_SCHEMA:
+        previous = None
+    if previous and votes.count_upto(previous["high_water_mark"]) != previous["source_rows"]:
+        print("♻️  Votes were removed since the last snapshot; rebuilding from scratch")
+        previous = None
+
+    aggregate = VoteAggregate.from_snapshot(previous, places) if previous else VoteAggregate(places)
+    new_rows = 0
+    for row_id, voter, pid in votes.rows(after=aggregate.high_water_mark):
+        aggregate.add(voter, pid, row_id)
+        new_rows += 1
+    aggregate.snapshot += 1
+
+    snapshot = aggregate.to_dict()
+    Path(snapshot_path).parent.mkdir(parents=True, exist_ok=True)
+    save_json(snapshot_path, snapshot)
+    return snapshot, new_rows, previous is None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate votes into a snapshot the API can serve")
+    parser.add_argument("--source", required=True, help="votes .csv, SQLite file or postgresql:// URL")
+    parser.add_argument("--places", default="src/app/enriched-places.json")
+    parser.add_argument("--output", default=SNAPSHOT_PATH)
+    parser.add_argument("--full", action="store_true", help="ignore the previous snapshot and rebuild")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    snapshot, new_rows, rebuilt = aggregate_votes(args.source, args.places, args.output, args.full)
+    mode = "full rebuild" if rebuilt else "incremental"
+    print(f"🗳️  Snapshot #{snapshot['snapshot']} ({mode}): {new_rows} new rows, {snapshot['total_votes']} votes "
+          f"from {len(snapshot['votes'])} voters in {time.perf_counter() - start:.2f}s → {args.output}")
+    for destino, count in snapshot["by_destino"].items():
+        print(f"  {destino:<20} {count}")
+    if snapshot["unknown_places"]:
+        print(f"⚠️  {len(snapshot['unknown_places'])} voted place ids aren't in {args.places}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Watch mode: rebuild only what an edit affects
+Polls consolidated-data.json, enrich_data.py (ADDITIONAL_LOCATIONS) and
+add_real_links.py (REAL_LINKS). Once a burst of saves settles (--debounce) the
+changed source records are traced through a dependency graph (record → places
+→ artifacts): only the affected places go through the local stages again
+(locations, dedup, intensity, requirements, REAL_LINKS, clean) and only outputs
+whose content changed are rewritten. Fields the network stages produce (crawled
+links_utiles, images, similares) are carried over from the current output by
+place id; refresh those with pipeline.py.
+
+    python watch.py                                   # consolidated-data.json → enriched-places.json
+    python watch.py --once --shard-dir public/places  # one incremental build, then exit
+"""
+
+import argparse
+import ast
+import copy
+import hashlib
+import json
+import time
+from collections import Counter
+from datetime import date
+from pathlib import Path
+from types import SimpleNamespace
+
+from add_real_links import merge_real_links
+from cpu_pool import CpuPool
+from data_io import add_output_arguments, iter_places, load_json
+from dedup import add_dedup_arguments, dedup_places, deduplicator_from_args, load_source, save_report
+from metrics import Metrics
+from name_match import DEFAULT_THRESHOLD, NameIndex
+from pipeline import PLACE_KEYS_LAST, stage_clean, stage_intensity, stage_locations, stage_requirements
+from place_index import place_id, write_indexed_places
+from releases import RELEASE_KEYS, add_release_arguments, content_version, release_metadata
+from shards import add_shard_arguments, write_shards
+
+# Written by the network stages (images, similar); kept from the current output
+CARRIED_FIELDS = ("image_urls", "image_sources", "similares")
+
+
+def read_literal(path, name):
+    """
+    Value of the top-level `name = {...}` in a Python file, read without importing
+    it, so a half-finished edit can't run code or take the watcher down
+    """
+    tree = ast.parse(Path(path).read_text(encoding="utf-8"), str(path))
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == name for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise ValueError(f"no top-level {name} in {path}")
+
+
+def digest(value):
+    raw = json.dumps(value, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class FileWatcher:
+    """
+    Polls (mtime, size) of a few files. poll() returns the files that changed
+    once no file has changed for `debounce` seconds, so an editor's save burst
+    (or a script rewriting several files) triggers one rebuild
+    """
+
+    def __init__(self, paths, debounce=0.3):
+        self.paths = [Path(p) for p in paths]
+        self.debounce = debounce
+        self.seen = {path: self._stat(path) for path in self.paths}
+        self.pending = set()
+        self.last_change = None
+
+    @staticmethod
+    def _stat(path):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def poll(self):
+        now = time.monotonic()
+        for path in self.paths:
+            stat = self._stat(path)
+            if stat != self.seen[path]:
+                self.seen[path] = stat
+                self.pending.add(path)
+                self.last_change = now
+        if self.pending and now - self.last_change >= self.debounce:
+            ready, self.pending = self.pending, set()
+            return ready
+        return set()
+
+
+class IncrementalBuild:
+    """
+    Source records → places → artifacts, kept between rebuilds.
+
+    Records are consolidated items (destino, categoria, nombre), researched
+    categories (destino, categoria) and REAL_LINKS entries, each with a content
+    digest. Places remember the records they came from; the local stages run
+    once per distinct input place (memoized by its digest), and the outputs are
+    only written when the content version of the result changes
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.ctx = SimpleNamespace(args=args, nested=True, cpu=CpuPool(1), metrics=Metrics(), metadata={},
+                                   locations={}, real_links={})
+        self.records = {}
+        self.memo = {}
+        self.graph = {}
+        self.base = None
+        self.keys = None
+        self.sources = None
+        self.version = None
+        self.metadata = {"enriched_at": date.today().isoformat(), "version": "2.0"}
+        self.carried = {}
+        if Path(args.output).exists():
+            current = load_json(args.output)
+            self.version = current["metadata"].get("release")
+            self.metadata = {k: v for k, v in current["metadata"].items() if k not in RELEASE_KEYS}
+            self.carried = {place_id(place): place for place in current["places"]}
+
+    def _load(self):
+        data = load_json(self.args.input)
+        self.ctx.locations = read_literal(self.args.locations_file, "ADDITIONAL_LOCATIONS")
+        self.ctx.real_links = read_literal(self.args.real_links_file, "REAL_LINKS")
+        records = {}
+        for destino, categoria, item in iter_places(data):
+            records[("consolidated", destino, categoria, item.get("nombre", ""))] = digest(item)
+        for destino, categories in self.ctx.locations.items():
+            for categoria, items in categories.items():
+                records[("locations", destino, categoria)] = digest(items)
+        for key, links in self.ctx.real_links.items():
+            records[("real_links", key)] = digest(links)
+        return data, records
+
+    def _base_places(self, data):
+        """
+        Consolidated places with the researched categories merged in and
+        near-duplicates merged; {place id: source record keys} alongside
+        """
+        places = [{**item, "destino": destino, "categoria": categoria} for destino, categoria, item in iter_places(data)]
+        places = stage_locations(places, self.ctx)
+        sources = {}
+        for place in places:
+            if place["categoria"] in self.ctx.locations.get(place["destino"], {}):
+                record = ("locations", place["destino"], place["categoria"])
+            else:
+                record = ("consolidated", place["destino"], place["categoria"], place.get("nombre", ""))
+            sources.setdefault(place_id(place), set()).add(record)
+        if self.args.no_dedup:
+            return places, sources
+        extra = [(path, load_source(path)) for path in self.args.dedup_sources]
+        places, report = dedup_places([(self.args.input, places)] + extra, deduplicator_from_args(self.args))
+        for cluster in report:
+            for member in cluster["members"]:
+                sources.setdefault(cluster["id"], set()).update(sources.get(member["id"], ()))
+        save_report(self.args.dedup_report, report)
+        return places, sources
+
+    def _local_stages(self, base, keys):
+        """
+        intensity → requirements → clean for the places not seen before (keys: their digests);
+        returns how many ran
+        """
+        fresh = {}
+        for place, key in zip(base, keys):
+            if key not in self.memo and key not in fresh:
+                fresh[key] = copy.deepcopy(place)
+        if fresh:
+            todo = list(fresh.values())
+            for stage in (stage_intensity, stage_requirements, stage_clean):
+                todo = stage(todo, self.ctx)
+            self.memo.update(zip(fresh, todo))
+        # Only digests of current places are worth keeping
+        live = set(keys)
+        self.memo = {key: value for key, value in self.memo.items() if key in live}
+        return len(fresh)
+
+    def _crawled_links(self, pid, place):
+        """
+        links_utiles a previous crawl found for this place, if any (REAL_LINKS are re-merged, not carried)
+        """
+        links = self.carried.get(pid, {}).get("links_utiles")
+        if not links or links == place.get("links") or links in self.ctx.real_links.values():
+            return None
+        return links
+
+    def rebuild(self):
+        """
+        One incremental build; returns a short summary dict (or None if no record changed)
+        """
+        started = time.perf_counter()
+        data, records = self._load()
+        changed = {key for key in records.keys() | self.records.keys() if records.get(key) != self.records.get(key)}
+        if not changed:
+            return None
+        self.records = records
+
+        base_changed = any(key[0] != "real_links" for key in changed)
+        if self.base is None or base_changed:
+            self.base, self.sources = self._base_places(data)
+            self.keys = [digest(place) for place in self.base]
+        ran = self._local_stages(self.base, self.keys)
+
+        index = NameIndex(self.ctx.real_links)
+        places, graph, relink = [], {}, []
+        for base, key in zip(self.base, self.keys):
+            pid = place_id(base)
+            place = copy.copy(self.memo[key])
+            crawled = self._crawled_links(pid, base)
+            if crawled:
+                place["links_utiles"] = crawled
+            for field in CARRIED_FIELDS:
+                if field in self.carried.get(pid, {}):
+                    place[field] = self.carried[pid][field]
+            hit = index.match(place.get("nombre", ""), self.args.threshold) if place.get("nombre") else None
+            sources = set(self.sources.get(pid, ()))
+            if hit:
+                sources.add(("real_links", hit[0]))
+                relink.append((pid, place, hit[0]))
+            graph[pid] = {"sources": sources, "shard": tuple(str(place.get(k, "")) for k in self.args.shard_by)}
+            places.append(place)
+
+        # REAL_LINKS stage, quiet for places whose match didn't change
+        affected = {pid for pid, node in graph.items() if node["sources"] & changed}
+        affected |= graph.keys() ^ self.graph.keys()
+        loud = [place for pid, place, _ in relink if pid in affected]
+        for _ in merge_real_links(loud, Counter(), self.args.threshold, index, links=self.ctx.real_links):
+            pass
+        for pid, place, key in relink:
+            if pid not in affected:
+                place["links_utiles"] = self.ctx.real_links[key]
+
+        shards = {graph[pid]["shard"] for pid in affected if pid in graph}
+        shards |= {self.graph[pid]["shard"] for pid in affected if pid in self.graph}
+        self.graph = graph
+        wrote = self._write(places)
+        # None without --shard-dir: no shard files are written, so there's nothing to count
+        shard_groups = (len(shards) if wrote else 0) if self.args.shard_dir else None
+        return {"records": len(changed), "places": len(affected), "ran": ran, "shards": shard_groups,
+                "wrote": wrote, "seconds": time.perf_counter() - started}
+
+    def _write(self, places):
+        """
+        Write the places (+ index, shards, release) unless their content version is unchanged
+        """
+        places = [{**{k: v for k, v in p.items() if k not in PLACE_KEYS_LAST},
+                   **{k: p[k] for k in PLACE_KEYS_LAST if k in p}} for p in places]
+        metadata = {**self.metadata, "total_places": len(places)}
+        version = content_version(places, metadata)
+        if version == self.version:
+            return False
+        stamped = release_metadata(places, metadata, self.args)
+        write_indexed_places(self.args.output, places, stamped, compact=self.args.compact,
+                             precompress=self.args.precompress)
+        if self.args.shard_dir:
+            write_shards(places, self.args.shard_dir, self.args.shard_by, stamped, self.args.precompress)
+        self.version = version
+        return True
+
+
+def report(summary, changed_files):
+    names = ", ".join(sorted(path.name for path in changed_files)) if changed_files else "initial build"
+    if summary is None:
+        print(f"👀 {names}: no record changed")
+        return
+    if not summary["wrote"]:
+        outputs = "outputs unchanged"
+    elif summary["shards"] is None:
+        outputs = "wrote output"
+    else:
+        outputs = f"wrote output + {summary['shards']} shard group(s)"
+    print(f"🔁 {names}: {summary['records']} records changed → {summary['places']} places, "
+          f"local stages ran for {summary['ran']}; {outputs} ({summary['seconds'] * 1000:.0f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the enriched places incrementally as the sources change")
+    parser.add_argument("--input", default="src/app/consolidated-data.json")
+    parser.add_argument("--output", default="src/app/enriched-places.json")
+    parser.add_argument("--locations-file", default="enrich_data.py", help="file defining ADDITIONAL_LOCATIONS")
+    parser.add_argument("--real-links-file", default="add_real_links.py", help="file defining REAL_LINKS")
+    parser.add_argument("--interval", type=float, default=0.2, help="seconds between polls")
+    parser.add_argument("--debounce", type=float, default=0.3, help="seconds the files must stay unchanged")
+    parser.add_argument("--once", action="store_true", help="build once and exit")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="REAL_LINKS name match score")
+    parser.add_argument("--no-dedup", action="store_true", help="skip the near-duplicate merge")
+    add_dedup_arguments(parser)
+    add_shard_arguments(parser)
+    add_release_arguments(parser)
+    add_output_arguments(parser)
+    args = parser.parse_args()
+
+    build = IncrementalBuild(args)
+    report(build.rebuild(), ())
+    if args.once:
+        return
+    watcher = FileWatcher([args.input, args.locations_file, args.real_links_file], args.debounce)
+    print(f"👀 Watching {args.input}, {args.locations_file} and {args.real_links_file} (Ctrl+C to stop)")
+    try:
+        while True:
+            changed = watcher.poll()
+            if changed:
+                try:
+                    report(build.rebuild(), changed)
+                except (SyntaxError, ValueError, OSError) as e:
+                    # Mid-edit saves (unbalanced braces, broken JSON, a file being replaced): wait for the next one
+                    print(f"⚠️  {', '.join(path.name for path in changed)}: {e}; waiting for a valid save")
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()